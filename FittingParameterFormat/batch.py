@@ -0,0 +1,347 @@
+"""
+拟合参数文件的批量格式化，不需要界面
+
+支持两类输入：
+1. CSV/TSV 表格 (.csv 以逗号分隔，.tsv/.tab 以制表符分隔)。
+   单元格为 "数值 ± 误差" 或 "数值 +- 误差" 的列，以及由表头认出的相邻 数值/误差 列
+   (如 A 与 A_err、W_coef 与 W_sigma、Estimate 与 SE)，各替换为 数值、误差、合并 三列，其余列原样保留。
+2. 其他文本文件，如 Igor 的拟合报告 ("A =1.234 ± 0.05") 和 MATLAB 的系数表
+   (表头 Estimate SE tStat pValue，其下每行为 名称 数值 误差 ...)。
+   报告文字中的 数值/误差 必须以 ± 或 +- 分隔，"10-19" 之类的日期和范围不认作参数。
+   每个认出的参数输出一行：名称、数值、误差、合并。
+
+取整规则与界面中的 transfer_text 相同 (formatter.format_pairs)，含倍率。
+文件按块流式读写，内存占用与文件大小无关。
+
+命令行用法：python batch.py 输入文件 [-o 输出文件] [--factor 1]；python batch.py --check 检查报告解析
+"""
+import csv
+import itertools
+import os
+import re
+from formatter import NUMBER, PATTERN, format_pairs
+
+SPACE = re.compile(r'\s+')
+NUMBER_ONLY = re.compile(rf'^{NUMBER}$')
+# 报告的自由文本中只认 ± 和 +-，单独的 + 或 - 会把 "Date: 10-19" 之类的文字误认为参数；
+# 表格单元格仍按 formatter.PATTERN 接受单独的 + 和 -
+SEPARATOR = r'(?:±|\+-)'
+# 报告中的一行："名称 = 数值 ± 误差"、"名称: 数值 +- 误差"、"名称 数值 ± 误差" 或只有 "数值 ± 误差"
+REPORT_LINE = re.compile(rf'^\s*(?:(?P<label>[^=:]*?)\s*[=:]\s*|(?P<name>\S*[^\d\s.+\-±]\S*)\s+)?'
+                         rf'(?P<value>{NUMBER})\s*{SEPARATOR}\s*(?P<error>{NUMBER})\s*$')
+# 表格下的分隔线，如 MATLAB 的 ________
+RULE = re.compile(r'^[\s_\-=]+$')
+
+# 表头中表示误差和表示数值的词
+ERROR_WORDS = {'err', 'error', 'errors', 'stderr', 'std', 'stdev', 'stddev', 'sd', 'se',
+               'sigma', 'σ', 'δ', 'unc', 'uncertainty', '±', '+-'}
+VALUE_WORDS = {'value', 'val', 'coef', 'coefficient', 'estimate', 'est', 'mean', 'fit'}
+
+# 各扩展名对应的分隔符，其余扩展名按报告处理
+DELIMITERS = {'.csv': ',', '.tsv': '\t', '.tab': '\t'}
+
+
+def _header_tokens(header):
+    """表头拆成小写的词，σA、δA 拆为 σ 和 a"""
+    tokens = []
+    for token in re.findall(r'±|\+-|[^\W_]+', header.lower()):
+        if len(token) > 1 and token[0] in 'σδ':
+            tokens.extend((token[0], token[1:]))
+        else:
+            tokens.append(token)
+    return tokens
+
+
+def is_error_column(value_header, error_header):
+    """error_header 是否为紧邻其前的 value_header 列的误差"""
+    value = [t for t in _header_tokens(value_header) if t not in VALUE_WORDS]
+    error = _header_tokens(error_header)
+    rest = [t for t in error if t not in ERROR_WORDS]
+    if len(rest) == len(error) or any(t in ERROR_WORDS for t in value):
+        return False
+    return not rest or rest == value
+
+
+def pair_columns(header):
+    """表头中相邻的 数值/误差 列，返回 [(数值列, 误差列), ...]"""
+    pairs = []
+    i = 0
+    while i < len(header) - 1:
+        if is_error_column(header[i], header[i + 1]):
+            pairs.append((i, i + 1))
+            i += 2
+        else:
+            i += 1
+    return pairs
+
+
+def _number(cell):
+    """单元格为单个数值时返回去掉空白的文本，否则为 None"""
+    cell = SPACE.sub('', cell)
+    return cell if NUMBER_ONLY.match(cell) else None
+
+
+def _pair(cell):
+    """单元格为 "数值 ± 误差" 时返回 (数值, 误差) 文本，否则为 None"""
+    match = PATTERN.match(SPACE.sub('', cell))
+    return (match.group(1), match.group(3)) if match else None
+
+
+def _is_header(row):
+    return any(cell.strip() for cell in row) and not any(_number(cell) or _pair(cell) for cell in row)
+
+
+def table_layout(header, rows):
+    """
+    由表头和前若干行确定输出的列
+    返回 [('keep', i) | ('pair', i) | ('columns', i, j), ...]：
+    原样保留第 i 列；第 i 列为 "数值 ± 误差"；第 i、j 列为相邻的数值和误差
+    """
+    width = max([len(header or ())] + [len(row) for row in rows])
+    pm_columns = {i for row in rows for i, cell in enumerate(row) if _pair(cell)}
+    pairs = {i: j for i, j in pair_columns(header or [])
+             if i not in pm_columns and j not in pm_columns}
+    layout = []
+    skip = set(pairs.values())
+    for i in range(width):
+        if i in pm_columns:
+            layout.append(('pair', i))
+        elif i in pairs:
+            layout.append(('columns', i, pairs[i]))
+        elif i not in skip:
+            layout.append(('keep', i))
+    return layout
+
+
+def layout_header(header, layout):
+    """输出的表头"""
+    def name(i):
+        return header[i] if header is not None and i < len(header) and header[i] else f"column {i + 1}"
+
+    output = []
+    for spec in layout:
+        if spec[0] == 'keep':
+            output.append(header[spec[1]] if header is not None and spec[1] < len(header) else '')
+        elif spec[0] == 'pair':
+            output.extend((name(spec[1]), f"{name(spec[1])} error", f"{name(spec[1])} ± error"))
+        else:
+            output.extend((name(spec[1]), name(spec[2]), f"{name(spec[1])} ± {name(spec[2])}"))
+    return output
+
+
+def format_rows(rows, layout, factor=1.0):
+    """
+    按 layout 格式化一块表格行，块内所有数值一次向量化取整
+    不能解析的单元格原样保留："数值 ± 误差" 列复制到三列，相邻列的合并列为空
+    """
+    width = max((spec[-1] for spec in layout), default=-1) + 1
+    targets = []
+    value_texts = []
+    error_texts = []
+    output = []
+    for row in rows:
+        cells = []
+        for spec in layout:
+            cell = row[spec[1]] if spec[1] < len(row) else ''
+            if spec[0] == 'keep':
+                cells.append(cell)
+                continue
+            if spec[0] == 'pair':
+                pair = _pair(cell)
+                fallback = (cell, cell, cell)
+            else:
+                error = row[spec[2]] if spec[2] < len(row) else ''
+                value_text, error_text = _number(cell), _number(error)
+                pair = (value_text, error_text) if value_text and error_text else None
+                fallback = (cell, error, '')
+            if pair is None:
+                cells.extend(fallback)
+            else:
+                targets.append((len(output), len(cells)))
+                value_texts.append(pair[0])
+                error_texts.append(pair[1])
+                cells.extend(('', '', ''))
+        # 比前几行更长的行，多出的单元格原样附在末尾
+        cells.extend(row[width:])
+        output.append(cells)
+
+    if targets:
+        for (r, c), *texts in zip(targets, *format_pairs(value_texts, error_texts, factor)):
+            output[r][c:c + 3] = texts
+    return output
+
+
+def format_table(source, destination, delimiter=',', factor=1.0, chunk_size=10000):
+    """CSV/TSV 表格逐块格式化，列的布局由表头和第一块确定"""
+    reader = csv.reader(source, delimiter=delimiter)
+    writer = csv.writer(destination, delimiter=delimiter, lineterminator='\n')
+    first = next(reader, None)
+    if first is None:
+        return
+    if _is_header(first):
+        header, body = first, reader
+    else:
+        header, body = None, itertools.chain([first], reader)
+
+    chunk = list(itertools.islice(body, chunk_size))
+    layout = table_layout(header, chunk)
+    if header is not None:
+        writer.writerow(layout_header(header, layout))
+    while chunk:
+        writer.writerows(format_rows(chunk, layout, factor))
+        chunk = list(itertools.islice(body, chunk_size))
+
+
+def report_records(lines):
+    """
+    从拟合报告中逐个取出参数，生成 (名称, 数值文本, 误差文本)
+    认出带名称的 "数值 ± 误差" 行，以及表头含相邻 数值/误差 列的空白分隔表格；
+    表格的数据行比表头多出的开头部分作为名称
+    """
+    header = None
+    pairs = []
+    in_rows = False  # 当前表格是否已经出现数据行
+    for line in lines:
+        if not line.strip():
+            # MATLAB 在分隔线与数据行之间有一个空行，数据行开始之后的空行才表示表格结束
+            if in_rows:
+                header = None
+            continue
+        if RULE.match(line):
+            continue
+        match = REPORT_LINE.match(line)
+        if match:
+            label = match.group('label') or match.group('name') or ''
+            yield label.strip(), match.group('value'), match.group('error')
+            continue
+
+        tokens = line.split()
+        numbers = [_number(token) for token in tokens]
+        if len(tokens) >= 2 and not any(numbers):
+            header = tokens
+            pairs = pair_columns(header)
+            in_rows = False
+            continue
+        records = []
+        if header is not None and len(tokens) >= len(header):
+            name = ' '.join(tokens[:len(tokens) - len(header)])
+            cells = numbers[len(tokens) - len(header):]
+            for i, j in pairs:
+                if cells[i] and cells[j]:
+                    label = f"{name} {header[i]}" if len(pairs) > 1 or not name else name
+                    records.append((label.strip(), cells[i], cells[j]))
+        if records:
+            in_rows = True
+            yield from records
+        else:
+            # 不是表格数据行的文本，表格到此结束
+            header = None
+
+
+# MATLAB fitlm 显示的系数表，用于 --check
+MATLAB_FITLM = """
+Linear regression model:
+    y ~ 1 + x1
+
+Estimated Coefficients:
+                   Estimate       SE        tStat       pValue  
+                   ________    ________    _______    __________
+
+    (Intercept)      1.2345    0.054321     22.726    1.2074e-10
+    x1             -0.004567    0.00023412    -19.507    3.0471e-09
+
+
+Number of observations: 100, Error degrees of freedom: 98
+Root Mean Squared Error: 0.512
+R-squared: 0.795,  Adjusted R-Squared: 0.793
+F-statistic vs. constant model: 381, p-value = 3.05e-09
+"""
+# Igor 曲线拟合在历史窗口中输出的系数
+IGOR_REPORT = """
+  Fit converged properly
+  Coefficient values ± one standard deviation
+  \ty0\t=0.012345 ± 0.0031
+  \tA\t=1.23456 ± 0.0512
+"""
+
+# 带日期、范围等文字的报告，其中的 "数值-数值" 不是参数
+PROSE_REPORT = """
+Date: 10-19
+Range 2800-3000
+k = 3.2 +- 0.4
+tau: 12.5 ± 1.1
+"""
+
+
+def check():
+    """用 MATLAB 和 Igor 的真实输出格式检查报告解析"""
+    records = list(report_records(MATLAB_FITLM.splitlines()))
+    assert records == [('(Intercept)', '1.2345', '0.054321'), ('x1', '-0.004567', '0.00023412')], records
+    records = list(report_records(IGOR_REPORT.splitlines()))
+    assert records == [('y0', '0.012345', '0.0031'), ('A', '1.23456', '0.0512')], records
+    records = list(report_records(PROSE_REPORT.splitlines()))
+    assert records == [('k', '3.2', '0.4'), ('tau', '12.5', '1.1')], records
+
+
+def format_report(source, destination, factor=1.0, chunk_size=10000):
+    """拟合报告中的参数逐块格式化，写为 CSV：名称、数值、误差、合并"""
+    writer = csv.writer(destination, lineterminator='\n')
+    writer.writerow(['name', 'value', 'error', 'value ± error'])
+    records = report_records(source)
+    chunk = list(itertools.islice(records, chunk_size))
+    while chunk:
+        labels, value_texts, error_texts = zip(*chunk)
+        writer.writerows(zip(labels, *format_pairs(value_texts, error_texts, factor)))
+        chunk = list(itertools.islice(records, chunk_size))
+
+
+def output_path(path, kind):
+    """默认的输出文件：原文件名加 _formatted，报告输出为 .csv"""
+    stem, extension = os.path.splitext(path)
+    return f"{stem}_formatted{extension if kind != 'report' else '.csv'}"
+
+
+def format_file(path, output=None, factor=1.0, kind='auto', encoding='utf-8-sig', chunk_size=10000):
+    """
+    格式化一个文件
+    kind: 'csv'、'tsv'、'report'，'auto' 时由扩展名决定
+    返回输出文件路径
+    """
+    if kind == 'auto':
+        delimiter = DELIMITERS.get(os.path.splitext(path)[1].lower())
+        kind = 'report' if delimiter is None else ('csv' if delimiter == ',' else 'tsv')
+    output = output or output_path(path, kind)
+    with open(path, 'r', encoding=encoding, newline='') as source, \
+            open(output, 'w', encoding='utf-8', newline='') as destination:
+        if kind == 'report':
+            format_report(source, destination, factor, chunk_size)
+        else:
+            format_table(source, destination, ',' if kind == 'csv' else '\t', factor, chunk_size)
+    return output
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="批量格式化拟合参数文件 (数值 ± 误差)")
+    parser.add_argument('files', nargs='*', help="输入文件")
+    parser.add_argument('-o', '--output', help="输出文件，只有一个输入文件时可用；默认为原文件名加 _formatted")
+    parser.add_argument('--factor', type=float, default=1.0, help="倍率，数值和误差先乘以倍率再取整")
+    parser.add_argument('--format', dest='kind', choices=('auto', 'csv', 'tsv', 'report'), default='auto',
+                        help="输入格式，默认由扩展名决定：.csv、.tsv/.tab 为表格，其余为拟合报告")
+    parser.add_argument('--encoding', default='utf-8-sig', help="输入文件编码")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="每次处理的行数")
+    parser.add_argument('--check', action='store_true', help="只检查 MATLAB/Igor 报告的解析")
+    args = parser.parse_args()
+    if args.check:
+        check()
+        print("报告解析检查通过")
+        parser.exit()
+    if not args.files:
+        parser.error("需要输入文件")
+    if args.output and len(args.files) > 1:
+        parser.error("多个输入文件时不能指定 --output")
+
+    for path in args.files:
+        written = format_file(path, args.output, args.factor, args.kind, args.encoding, args.chunk_size)
+        print(f"{path} -> {written}")
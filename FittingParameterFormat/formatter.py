@@ -0,0 +1,158 @@
+"""
+"数值 ± 误差" 文本的批量格式化
+
+规则与逐行处理完全相同：误差保留一位有效数字，数值按误差的数量级取整。
+所有行用一个预编译的正则表达式一次匹配，数值和误差放入 NumPy 数组后向量化取整。
+Python 的 round 按二进制精确值做十进制舍入，与 np.rint 在恰好为 .5 附近的情况可能不同，
+log10 在 10 的整数次幂附近也可能差一位；这些少数情况退回逐个用 Python 计算，
+保证输出与逐行处理逐字相同。
+"""
+import math
+import re
+import numpy as np
+
+NUMBER = r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?'
+# 匹配去掉空白后的整行: "数值 +- 误差" 或 "数值 ± 误差" 或科学计数法(e/E)
+PATTERN = re.compile(rf'^({NUMBER})([\+\-\±]|\+\-)({NUMBER})$', re.MULTILINE)
+# 除换行外的所有空白，去掉后各行仍一一对应
+WHITESPACE = re.compile(r'[^\S\n]+')
+
+# 10 的整数次幂，正次幂为整数 10**m 换算的浮点数，负次幂为 Python 计算的 10**m，
+# 与逐行处理中 10 ** error_magnitude 参与运算时的值相同
+_MAX_POWER = 22
+
+
+def parse_factor(text):
+    """倍率输入框的文本转为倍率，空或无效时为 1"""
+    try:
+        return float(text or "1")
+    except ValueError:
+        return 1.0
+
+
+def round_scalar(value, error):
+    """单个数值和误差的取整，返回 (取整后的数值, 取整后的误差)"""
+    if error == 0:
+        error_magnitude = 0
+        rounded_error = 0.0
+    else:
+        error_magnitude = int(math.floor(math.log10(abs(error))))
+        first_digit = round(abs(error) / (10 ** error_magnitude), 1)
+        rounded_error = first_digit * (10 ** error_magnitude)
+    return round(value, -error_magnitude), rounded_error
+
+
+def _powers(exponents):
+    """各指数对应的 10 ** m，只对出现过的指数用 Python 计算一次"""
+    unique, inverse = np.unique(exponents, return_inverse=True)
+    return np.array([float(10 ** int(m)) for m in unique])[inverse.reshape(exponents.shape)]
+
+
+def _round_half(y, tolerance=1e-9):
+    """
+    y 四舍五入到整数，返回 (结果, 是否需要退回 Python 计算)
+    y 的小数部分接近 0.5 或 |y| 太大时计算误差可能改变舍入方向
+    """
+    with np.errstate(invalid='ignore'):
+        fraction = np.abs(y - np.floor(y) - 0.5)
+        unsure = ~(fraction > tolerance * np.maximum(1.0, np.abs(y))) | ~(np.abs(y) < 2.0**52)
+    return np.rint(y), unsure
+
+
+def round_arrays(values, errors):
+    """
+    向量化的取整，结果与逐个调用 round_scalar 相同
+    返回 (取整后的数值, 取整后的误差)
+    """
+    values = np.asarray(values, dtype=float)
+    errors = np.asarray(errors, dtype=float)
+    magnitude_error = np.abs(errors)
+    finite = np.isfinite(values) & np.isfinite(errors) & (magnitude_error < 1e300)
+    nonzero = errors != 0
+    safe = np.where(finite & nonzero, magnitude_error, 1.0)
+
+    # 误差的数量级，log10 接近整数时不确定
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logarithm = np.log10(safe)
+    magnitude = np.floor(logarithm)
+    unsure = ~finite | (nonzero & (np.abs(logarithm - np.rint(logarithm)) < 1e-9))
+    magnitude = np.where(nonzero, magnitude, 0).astype(int)
+    unsure |= np.abs(magnitude) > _MAX_POWER
+    magnitude = np.clip(magnitude, -_MAX_POWER, _MAX_POWER)
+    power = _powers(magnitude)
+
+    # 误差保留一位小数的首位数字
+    first_digit, unsure_digit = _round_half(safe / power * 10)
+    rounded_error = np.where(nonzero, first_digit / 10 * power, 0.0)
+    unsure |= unsure_digit & nonzero
+
+    # 数值按误差数量级取整：round(value, -magnitude)
+    scale = _powers(np.abs(magnitude))
+    with np.errstate(invalid='ignore', over='ignore'):
+        scaled = np.where(magnitude <= 0, values * scale, values / scale)
+        rounded, unsure_value = _round_half(scaled)
+        rounded_value = np.where(magnitude <= 0, rounded / scale, rounded * scale)
+    unsure |= unsure_value
+
+    # 不确定的少数元素按逐行处理的方式计算
+    for i in np.flatnonzero(unsure):
+        rounded_value[i], rounded_error[i] = round_scalar(float(values[i]), float(errors[i]))
+    # -0.0 与 0.0 的文本不同，符号以 Python 的 round 为准（与原数值相同）
+    zero = (rounded_value == 0) & ~unsure
+    rounded_value[zero] = np.copysign(0.0, values[zero])
+    return rounded_value, rounded_error
+
+
+def format_error(rounded_error):
+    """取整后误差的文本，与数值同时输出时相同"""
+    if abs(rounded_error) >= 1 or rounded_error == 0:
+        return f"{rounded_error:.1f}"
+    return f"{rounded_error:.1g}"
+
+
+def format_pairs(value_texts, error_texts, factor=1.0):
+    """
+    一批已匹配的数值和误差文本乘以倍率后取整并格式化
+    返回 (数值文本, 误差文本, "数值 ± 误差" 文本) 三个列表
+    """
+    with np.errstate(over='ignore'):
+        values = np.array([float(value) for value in value_texts]) * factor
+        errors = np.array([float(error) for error in error_texts]) * factor
+    rounded_values, rounded_errors = round_arrays(values, errors)
+
+    # 取整后的误差只有少数几种，每种只格式化一次
+    unique_errors, inverse = np.unique(rounded_errors, return_inverse=True)
+    unique_texts = [format_error(error) for error in unique_errors.tolist()]
+    error_texts = [unique_texts[i] for i in inverse.ravel().tolist()]
+    value_texts = list(map(repr, rounded_values.tolist()))
+    combined_texts = [f"{value} ± {error}" for value, error in zip(value_texts, error_texts)]
+    return value_texts, error_texts, combined_texts
+
+
+def format_text(text, factor=1.0):
+    """
+    格式化整段文本
+    匹配 "数值 ± 误差" 的行乘以倍率后取整，其余行原样保留
+    返回 (格式化输出, 无误差输出, 误差输出)，均为以换行连接的文本
+    """
+    lines = text.split('\n')
+    cleaned = WHITESPACE.sub('', text)
+    matches = list(PATTERN.finditer(cleaned))
+    output_lines = list(lines)
+    clean_lines = list(lines)
+    error_lines = list(lines)
+    if not matches:
+        return '\n'.join(output_lines), '\n'.join(clean_lines), '\n'.join(error_lines)
+
+    # 每个匹配所在的行号
+    newlines = np.array([m.start() for m in re.finditer('\n', cleaned)], dtype=np.int64)
+    starts = np.array([m.start() for m in matches], dtype=np.int64)
+    rows = np.searchsorted(newlines, starts, side='right').tolist()
+
+    value_texts, error_texts, combined_texts = format_pairs(
+        [m.group(1) for m in matches], [m.group(3) for m in matches], factor)
+    for row, value_text, error_text, combined_text in zip(rows, value_texts, error_texts, combined_texts):
+        output_lines[row] = combined_text
+        clean_lines[row] = value_text
+        error_lines[row] = error_text
+    return '\n'.join(output_lines), '\n'.join(clean_lines), '\n'.join(error_lines)
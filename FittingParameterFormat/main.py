@@ -1,15 +1,66 @@
 import sys
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QTextEdit, QVBoxLayout, QHBoxLayout, 
-    QWidget, QPushButton, QLabel, QLineEdit
+    QWidget, QPushButton, QLabel, QLineEdit, QCheckBox, QProgressBar
 )
-from PyQt6.QtGui import QDoubleValidator
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QDoubleValidator, QTextCursor
+from formatter import format_text, parse_factor
+
+
+def replace_lines(edit, first, last, lines):
+    """用 lines 替换 edit 中第 first 到 last 行 (含两端)，只改动这些文本块"""
+    document = edit.document()
+    cursor = QTextCursor(document.findBlockByNumber(first))
+    block = document.findBlockByNumber(last)
+    cursor.setPosition(block.position() + block.length() - 1, QTextCursor.MoveMode.KeepAnchor)
+    cursor.insertText('\n'.join(lines))
+
+
+def contiguous_runs(rows):
+    """升序的行号分为连续的段，返回各段在 rows 中的下标区间 [(start, stop), ...]"""
+    runs = []
+    start = 0
+    for i in range(1, len(rows) + 1):
+        if i == len(rows) or rows[i] != rows[i - 1] + 1:
+            runs.append((start, i))
+            start = i
+    return runs
+
+
+class FormatWorker(QObject):
+    """在后台线程中逐块格式化若干行，每块算完发出 (行号列表, (输出, 无误差输出, 误差输出))"""
+    chunk_ready = pyqtSignal(object, object)
+    finished = pyqtSignal()
+
+    def __init__(self, rows, texts, factor, lines_per_chunk=2000):
+        super().__init__()
+        self.rows = rows
+        self.texts = texts
+        self.factor = factor
+        self.lines_per_chunk = lines_per_chunk
+        self.cancelled = False
+
+    def run(self):
+        for start in range(0, len(self.rows), self.lines_per_chunk):
+            # 输入再次改动时旧的计算在块之间停止
+            if self.cancelled:
+                break
+            stop = start + self.lines_per_chunk
+            results = format_text('\n'.join(self.texts[start:stop]), self.factor)
+            self.chunk_ready.emit(self.rows[start:stop], [text.split('\n') for text in results])
+        self.finished.emit()
+
 
 class TextEditorApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("科学数据格式化工具")
         self.setGeometry(100, 100, 1000, 400)
+        self.format_threads = []  # 正在运行的格式化线程
+        self.format_worker = None
+        self.dirty_lines = set()  # 增量模式下尚未格式化的输入行
+        self.input_blocks = 1  # 上次改动后输入的行数
         
         # 创建主部件和主水平布局
         central_widget = QWidget()
@@ -43,6 +94,14 @@ class TextEditorApp(QMainWindow):
         factor_layout.addWidget(self.factor_input)
         control_layout.addLayout(factor_layout)
         
+        # 增量模式：输入改动后在后台只重新格式化改动的行
+        self.incremental_check = QCheckBox("实时格式化")
+        self.incremental_check.toggled.connect(self.toggle_incremental)
+        control_layout.addWidget(self.incremental_check)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        control_layout.addWidget(self.progress_bar)
+        
         control_layout.addStretch()
         main_layout.addLayout(control_layout, stretch=1)
         
@@ -79,65 +138,135 @@ class TextEditorApp(QMainWindow):
         right_group.addLayout(right_layout)
         right_group.addLayout(error_layout)
         main_layout.addLayout(right_group, stretch=2)
+        
+        # 输出只读，不需要撤销记录
+        for edit in (self.output_text, self.clean_output, self.error_output):
+            edit.document().setUndoRedoEnabled(False)
+        
+        # 连续输入时稍等片刻再开始格式化
+        self.format_timer = QTimer()
+        self.format_timer.setSingleShot(True)
+        self.format_timer.setInterval(150)
+        self.format_timer.timeout.connect(self.start_format_worker)
+        self.input_text.document().contentsChange.connect(self.input_changed)
+        self.factor_input.textChanged.connect(self.factor_changed)
 
     def transfer_text(self):
         """处理输入文本并格式化输出"""
-        import re
-        import math
-        
-        input_lines = self.input_text.toPlainText().split('\n')
-        output_lines = []
-        clean_lines = []
-        error_lines = []
-        
-        for line in input_lines:
-            # 匹配多种数值格式: "数值 +- 误差" 或 "数值 ± 误差" 或科学计数法(e/E)
-            # Remove all whitespace from line before matching
-            clean_line = re.sub(r'\s+', '', line)
-            match = re.match(r'^([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)([\+\-\±]|\+\-)([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)$', clean_line)
-            if match:
-                # 获取倍率值，默认为1
-                try:
-                    factor = float(self.factor_input.text() or "1")
-                except ValueError:
-                    factor = 1.0
-                
-                value = float(match.group(1)) * factor
-                error = float(match.group(3)) * factor  # 修正：从第三组获取误差值
-                
-                # 计算误差的数量级和有效数字
-                if error == 0:
-                    error_magnitude = 0
-                    rounded_error = 0.0
-                else:
-                    error_magnitude = int(math.floor(math.log10(abs(error))))
-                    first_digit = round(abs(error) / (10 ** error_magnitude), 1)
-                    rounded_error = first_digit * (10 ** error_magnitude)
-                
-                # 根据误差调整数值精度
-                rounded_value = round(value, -error_magnitude)
-                
-                # 格式化输出，避免科学计数法
-                if abs(rounded_error) >= 1 or rounded_error == 0:
-                    formatted_line = f"{rounded_value} ± {rounded_error:.1f}"
-                else:
-                    formatted_line = f"{rounded_value} ± {rounded_error:.1g}"
-                
-                output_lines.append(formatted_line)
-                clean_lines.append(f"{rounded_value}")
-                # 格式化误差输出，与主输出保持一致
-                if abs(rounded_error) >= 1 or rounded_error == 0:
-                    error_lines.append(f"{rounded_error:.1f}")
-                else:
-                    error_lines.append(f"{rounded_error:.1g}")
-            else:
-                output_lines.append(line)
-                clean_lines.append(line)
-                error_lines.append(line)
-        
-        self.output_text.setPlainText('\n'.join(output_lines))
-        self.clean_output.setPlainText('\n'.join(clean_lines))
-        self.error_output.setPlainText('\n'.join(error_lines))
+        if self.incremental_check.isChecked():
+            self.reformat_all()
+            return
+        output, clean, error = format_text(self.input_text.toPlainText(),
+                                           parse_factor(self.factor_input.text()))
+        self.output_text.setPlainText(output)
+        self.clean_output.setPlainText(clean)
+        self.error_output.setPlainText(error)
+
+    def toggle_incremental(self, checked):
+        """打开增量模式时全部重新格式化一次，关闭时停止后台计算"""
+        if checked:
+            self.reformat_all()
+        else:
+            self.cancel_format_worker()
+            self.format_timer.stop()
+            self.dirty_lines = set()
+            self.progress_bar.setVisible(False)
+
+    def reformat_all(self):
+        """输出先与输入逐行相同，再在后台格式化全部行"""
+        text = self.input_text.toPlainText()
+        for edit in (self.output_text, self.clean_output, self.error_output):
+            edit.setPlainText(text)
+        self.input_blocks = self.input_text.document().blockCount()
+        self.dirty_lines = set(range(self.input_blocks))
+        self.cancel_format_worker()
+        self.start_format_worker()
+
+    def factor_changed(self):
+        if self.incremental_check.isChecked():
+            self.dirty_lines = set(range(self.input_blocks))
+            self.cancel_format_worker()
+            self.format_timer.start()
+
+    def input_changed(self, position, removed, added):
+        """
+        输入改动后，输出中对应的行先替换为新的输入行，使各输出与输入行数一致，
+        改动的行记为待格式化，稍后在后台重新计算
+        """
+        if not self.incremental_check.isChecked():
+            return
+        document = self.input_text.document()
+        first = document.findBlock(position).blockNumber()
+        last = document.findBlock(min(position + added, document.characterCount() - 1)).blockNumber()
+        shift = document.blockCount() - self.input_blocks
+        old_last = last - shift
+        self.input_blocks = document.blockCount()
+
+        lines = [document.findBlockByNumber(i).text().replace('\xa0', ' ') for i in range(first, last + 1)]
+        for edit in (self.output_text, self.clean_output, self.error_output):
+            replace_lines(edit, first, old_last, lines)
+        self.dirty_lines = ({i for i in self.dirty_lines if i < first}
+                            | {i + shift for i in self.dirty_lines if i > old_last}
+                            | set(range(first, last + 1)))
+        # 行号已经改变，正在进行的计算作废
+        self.cancel_format_worker()
+        self.format_timer.start()
+
+    def cancel_format_worker(self):
+        if self.format_worker is not None:
+            self.format_worker.cancelled = True
+            self.format_worker = None
+
+    def start_format_worker(self):
+        """在后台格式化所有待格式化的行"""
+        if not self.dirty_lines:
+            self.progress_bar.setVisible(False)
+            return
+        rows = sorted(self.dirty_lines)
+        document = self.input_text.document()
+        texts = [document.findBlockByNumber(i).text().replace('\xa0', ' ') for i in rows]
+        self.progress_bar.setRange(0, len(rows))
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+
+        thread = QThread()
+        worker = FormatWorker(rows, texts, parse_factor(self.factor_input.text()))
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.chunk_ready.connect(self.apply_format_chunk)
+        worker.finished.connect(self.format_finished)
+        worker.finished.connect(thread.quit)
+        thread.finished.connect(self.cleanup_format_threads)
+        self.format_threads.append((thread, worker))
+        self.format_worker = worker
+        thread.start()
+
+    def apply_format_chunk(self, rows, results):
+        """把一块结果按连续的行段写入三个输出"""
+        # 已作废的计算发出的结果不再使用
+        if self.sender() is not self.format_worker:
+            return
+        for start, stop in contiguous_runs(rows):
+            for edit, lines in zip((self.output_text, self.clean_output, self.error_output), results):
+                replace_lines(edit, rows[start], rows[stop - 1], lines[start:stop])
+        self.dirty_lines.difference_update(rows)
+        self.progress_bar.setValue(self.progress_bar.value() + len(rows))
+
+    def format_finished(self):
+        if self.sender() is self.format_worker:
+            self.format_worker = None
+            self.progress_bar.setVisible(False)
+
+    def cleanup_format_threads(self):
+        """释放已结束的格式化线程"""
+        self.format_threads = [(thread, worker) for thread, worker in self.format_threads if not thread.isFinished()]
+
+    def closeEvent(self, event):
+        self.cancel_format_worker()
+        for thread, worker in self.format_threads:
+            thread.quit()
+            thread.wait()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
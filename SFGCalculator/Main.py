@@ -1,15 +1,51 @@
 import sys
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget,
-                            QVBoxLayout, QGridLayout, QLabel, QLineEdit, QFrame,
-                            QPushButton)
-from PyQt6.QtCore import Qt
+                            QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QLineEdit, QFrame,
+                            QPushButton, QComboBox, QFileDialog, QMessageBox, QTextEdit,
+                            QCheckBox)
+from PyQt6.QtCore import Qt, QRectF, QObject, QThread, pyqtSignal
 import pyqtgraph as pg
-import math
+import numpy as np
+import os
+from fresnel import (COMBINATION_NAMES, quartz_refractive_index, quartz_chi2, require_real, refraction_angle,
+                     fresnel_factor, interface_factors, parse_refractive_index, load_columns, load_refractive_index,
+                     interpolate_refractive_index, fresnel_correct)
+from thinfilm import stack_interface_factors, parse_layers
+from optimizer import TARGETS, target_function, optimize_angles
+from uncertainty import propagate
+from overlap import overlap_map
+from beampath import BeamPath, parse_elements, update_caustics
+from focus import focus_parameters
+from orientation import RATIOS, OrientationTable
+from deconvolution import METHODS, instrument_fwhm, deconvolve
+
+class CalculationWorker(QObject):
+    """在后台线程中执行耗时计算"""
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, func, *args, **kwargs):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        try:
+            result = self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(result)
+
 
 class SFGCalculator(QMainWindow):
     def __init__(self):
         super().__init__()
         
+        # 正在运行的后台线程
+        self.threads = []
+        
         # Set window properties
         self.setWindowTitle('SFG Calculation Tool')
         self.setGeometry(100, 100, 800, 600)
@@ -22,63 +58,71 @@ class SFGCalculator(QMainWindow):
         self.quartz_tab = QWidget()
         self.focus_tab = QWidget()
         self.fresnel_tab = QWidget()
+        self.thinfilm_tab = QWidget()
+        self.optimizer_tab = QWidget()
+        self.beampath_tab = QWidget()
+        self.orientation_tab = QWidget()
         
         self.tabs.addTab(self.quartz_tab, "石英计算")
         self.tabs.addTab(self.focus_tab, "聚焦计算")
         self.tabs.addTab(self.fresnel_tab, "Fresnel计算")
+        self.tabs.addTab(self.thinfilm_tab, "多层膜计算")
+        self.tabs.addTab(self.optimizer_tab, "角度优化")
+        self.tabs.addTab(self.beampath_tab, "光束传播")
+        self.tabs.addTab(self.orientation_tab, "取向分析")
         
         # Set up basic layouts for each tab
         self.setup_quartz_tab()
         self.setup_focus_tab()
         self.setup_fresnel_tab()
+        self.setup_thinfilm_tab()
+        self.setup_optimizer_tab()
+        self.setup_beampath_tab()
+        self.setup_orientation_tab()
         
         # Initialize with default values after all widgets are created
         self.calculate_focus()
         self.update_sfg_results()
         self.calculate_fresnel_factors()
+        self.calculate_thinfilm_map()
+        self.calculate_beam_paths()
+
+    def run_in_background(self, on_finished, on_failed, func, *args, **kwargs):
+        """在后台线程中执行 func，完成后在GUI线程中回调"""
+        thread = QThread()
+        worker = CalculationWorker(func, *args, **kwargs)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.finished.connect(on_finished)
+        worker.failed.connect(on_failed)
+        worker.finished.connect(thread.quit)
+        worker.failed.connect(thread.quit)
+        thread.finished.connect(self.cleanup_threads)
+        self.threads.append((thread, worker))
+        thread.start()
+
+    def cleanup_threads(self):
+        """释放已结束的后台线程"""
+        self.threads = [(thread, worker) for thread, worker in self.threads if not thread.isFinished()]
 
     def calculate_refraction_angle(self, incident_angle, n1, n2):
-        """计算折射角度"""
-        return math.degrees(math.asin(n1 * math.sin(math.radians(incident_angle)) / n2))
+        """计算折射角度（n2 为复数时返回复折射角）"""
+        return refraction_angle(incident_angle, n1, n2)
         
     def calculate_fresnel(self, n1, n2, theta1, theta2, polarization):
-        """计算菲涅耳因子"""
-        theta1_rad = math.radians(theta1)
-        theta2_rad = math.radians(theta2)
-        
-        cos_theta1 = math.cos(theta1_rad)
-        cos_theta2 = math.cos(theta2_rad)
-        
-        # 计算n_prime
-        n_prime = math.sqrt((n2**2 * (n2**2 + 5)) / (4 * n2**2 + 2))
-        
-        if polarization == 'xx':
-            # Lxx = (2 * n1 * cosθ2) / (n1 * cosθ2 + n2 * cosθ1)
-            numerator = 2 * n1 * cos_theta2
-            denominator = n1 * cos_theta2 + n2 * cos_theta1
-            return numerator / denominator
-        elif polarization == 'yy':
-            # Lyy = (2 * n1 * cosθ1) / (n1 * cosθ1 + n2 * cosθ2)
-            numerator = 2 * n1 * cos_theta1
-            denominator = n1 * cos_theta1 + n2 * cos_theta2
-            return numerator / denominator
-        elif polarization == 'zz':
-            # Lzz = (2 * n2 * cosθ1) / (n1 * cosθ2 + n2 * cosθ1) * (n1/n')^2
-            numerator = 2 * n2 * cos_theta1
-            denominator = n1 * cos_theta2 + n2 * cos_theta1
-            return (numerator / denominator) * (n1 / n_prime)**2
-        else:
-            return 0.0
+        """计算菲涅耳因子（支持复折射率）"""
+        return fresnel_factor(n1, n2, theta1, theta2, polarization)
         
     def calculate_quartz_refractive_index(self, wavelength):
         """根据波长计算石英折射率"""
-        # 将波长转换为微米
-        wavelength_um = wavelength / 1000
-        # 使用给定的Sellmeier方程计算折射率
-        n_squared = 1.28604141 + \
-                    1.07044083 * wavelength_um**2 / (wavelength_um**2 - 0.0100585997) + \
-                    1.10202242 * wavelength_um**2 / (wavelength_um**2 - 100)
-        return math.sqrt(n_squared)
+        return quartz_refractive_index(wavelength)
+
+    def format_value(self, value, precision=4):
+        """格式化输出，复数显示为 a±bi"""
+        value = complex(value)
+        if abs(value.imag) < 0.5 * 10**(-precision):
+            return f"{value.real:.{precision}f}"
+        return f"{value.real:.{precision}f}{value.imag:+.{precision}f}i"
 
     def update_sfg_results(self):
         """当输入值变化时更新计算结果"""
@@ -109,107 +153,41 @@ class SFGCalculator(QMainWindow):
             if not (0 <= vis_angle <= 90) or not (0 <= ir_angle <= 90):
                 raise ValueError("入射角度必须在0到90度之间")
                 
-            # 计算SFG波长
-            ir_wavelength = 1e7 / ir_wavenumber
-            sfg_wavelength = 1/(1/vis_wavelength + 1/ir_wavelength)
-            
-            # 计算SFG反射角度（使用更精确的公式）
-            n_air = 1.0  # 空气折射率
-            # 计算各波长对应的石英折射率
-            n_quartz_vis = self.calculate_quartz_refractive_index(vis_wavelength)
-            n_quartz_ir = self.calculate_quartz_refractive_index(1e7 / ir_wavenumber)
-            n_quartz_sfg = self.calculate_quartz_refractive_index(sfg_wavelength)
-            
-            # 计算可见光和红外光的折射角度
-            vis_ref_angle = self.calculate_refraction_angle(vis_angle, n_air, n_quartz_vis)
-            ir_ref_angle = self.calculate_refraction_angle(ir_angle, n_air, n_quartz_ir)
-            
-            # 计算SFG反射角度
-            vis_angle_rad = math.radians(vis_angle)
-            ir_angle_rad = math.radians(ir_angle)
-            sfg_angle = math.degrees(math.asin(
-                sfg_wavelength * (math.sin(vis_angle_rad)/vis_wavelength + 
-                                math.sin(ir_angle_rad)/ir_wavelength)
-            ))
-            
-            # 计算SFG折射角度
-            sfg_ref_angle = self.calculate_refraction_angle(sfg_angle, n_air, n_quartz_sfg)
+            # 折射率、折射角、相干长度、菲涅耳因子和二阶极化率
+            # 全反射或折射率公式不适用时结果为复数或 nan，与无效输入一样清空输出
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result = require_real(quartz_chi2(vis_angle, ir_angle, vis_wavelength, ir_wavenumber))
             
             # 更新输出框
-            self.sfg_wavelength_output.setText(f"{sfg_wavelength:.2f}")
-            self.sfg_angle_output.setText(f"{sfg_angle:.2f}")
-            
-            # 计算并更新红外波长
-            ir_wavelength = 1e7 / ir_wavenumber
-            self.ir_wavelength_output.setText(f"{ir_wavelength:.2f}")
+            self.sfg_wavelength_output.setText(f"{result['sfg_wavelength']:.2f}")
+            self.sfg_angle_output.setText(f"{result['sfg_angle']:.2f}")
+            self.ir_wavelength_output.setText(f"{result['ir_wavelength']:.2f}")
             
             # 更新折射率和折射角度
-            self.vis_refractive_index_output.setText(f"{n_quartz_vis:.3f}")
-            self.ir_refractive_index_output.setText(f"{n_quartz_ir:.3f}")
-            self.sfg_refractive_index_output.setText(f"{n_quartz_sfg:.3f}")
-            
-            self.vis_refraction_angle_output.setText(f"{vis_ref_angle:.2f} °")
-            self.ir_refraction_angle_output.setText(f"{ir_ref_angle:.2f} °")
-            self.sfg_refraction_angle_output.setText(f"{sfg_ref_angle:.2f} °")
+            self.vis_refractive_index_output.setText(f"{result['n_vis']:.3f}")
+            self.ir_refractive_index_output.setText(f"{result['n_ir']:.3f}")
+            self.sfg_refractive_index_output.setText(f"{result['n_sfg']:.3f}")
             
-            # 计算并更新相干长度
-            sfg_angle_rad = math.radians(sfg_angle)
-            vis_angle_rad = math.radians(vis_angle)
-            ir_angle_rad = math.radians(ir_angle)
+            self.vis_refraction_angle_output.setText(f"{result['vis_ref_angle']:.2f} °")
+            self.ir_refraction_angle_output.setText(f"{result['ir_ref_angle']:.2f} °")
+            self.sfg_refraction_angle_output.setText(f"{result['sfg_ref_angle']:.2f} °")
             
-            sfg_term = math.sqrt(n_quartz_sfg**2 - math.sin(sfg_angle_rad)**2) / sfg_wavelength
-            vis_term = math.sqrt(n_quartz_vis**2 - math.sin(vis_angle_rad)**2) / vis_wavelength
-            ir_term = math.sqrt(n_quartz_ir**2 - math.sin(ir_angle_rad)**2) / ir_wavelength
+            # 相干长度
+            self.coherence_length_output.setText(f"{result['coherence_length']:.2f}")
             
-            # 使用用户提供的新公式计算相干长度，单位为nm
-            coherence_length = 1 / (2 * math.pi * (sfg_term + vis_term + ir_term))
-            self.coherence_length_output.setText(f"{coherence_length:.2f}")
-            
-            # 计算并更新菲涅耳因子
-            # SFG
-            lxx_sfg = self.calculate_fresnel(n_air, n_quartz_sfg, sfg_angle, sfg_ref_angle, 'xx')
-            lyy_sfg = self.calculate_fresnel(n_air, n_quartz_sfg, sfg_angle, sfg_ref_angle, 'yy')
-            self.fresnel_xx_sfg.setText(f"{lxx_sfg:.3f}")
-            self.fresnel_yy_sfg.setText(f"{lyy_sfg:.3f}")
-            
-            # VIS
-            lxx_vis = self.calculate_fresnel(n_air, n_quartz_vis, vis_angle, vis_ref_angle, 'xx')
-            lyy_vis = self.calculate_fresnel(n_air, n_quartz_vis, vis_angle, vis_ref_angle, 'yy')
-            self.fresnel_xx_vis.setText(f"{lxx_vis:.3f}")
-            self.fresnel_yy_vis.setText(f"{lyy_vis:.3f}")
-            
-            # IR
-            lxx_ir = self.calculate_fresnel(n_air, n_quartz_ir, ir_angle, ir_ref_angle, 'xx')
-            lyy_ir = self.calculate_fresnel(n_air, n_quartz_ir, ir_angle, ir_ref_angle, 'yy')
-            self.fresnel_xx_ir.setText(f"{lxx_ir:.3f}")
-            self.fresnel_yy_ir.setText(f"{lyy_ir:.3f}")
-
-            # 计算二阶极化率
-            # 将角度转换为弧度
-            sfg_angle_rad = math.radians(sfg_angle)
-            vis_angle_rad = math.radians(vis_angle)
-            ir_angle_rad = math.radians(ir_angle)
-
-            # SSP
-            chi2_ssp = math.cos(ir_angle_rad) * lyy_sfg * lyy_vis * lxx_ir * coherence_length * 1e-9 * 1.6e-12
-            self.chi2_ssp_output.setText(f"{chi2_ssp:.3e}")
-            self.chi2_ssp_sq_output.setText(f"{abs(chi2_ssp)**2:.3e}")
-
-            # PPP
-            chi2_ppp = math.cos(sfg_angle_rad) * math.cos(vis_angle_rad) * math.cos(ir_angle_rad) * \
-                      lxx_sfg * lxx_vis * lxx_ir * coherence_length * 1.6e-21
-            self.chi2_ppp_output.setText(f"{chi2_ppp:.3e}")
-            self.chi2_ppp_sq_output.setText(f"{abs(chi2_ppp)**2:.3e}")
-
-            # SPS
-            chi2_sps = math.cos(vis_angle_rad) * lyy_sfg * lxx_vis * lyy_ir * coherence_length * 1.6e-21
-            self.chi2_sps_output.setText(f"{chi2_sps:.3e}")
-            self.chi2_sps_sq_output.setText(f"{abs(chi2_sps)**2:.3e}")
-
-            # PSS
-            chi2_pss = math.cos(ir_angle_rad) * lxx_sfg * lyy_vis * lyy_ir * coherence_length * 1.6e-21
-            self.chi2_pss_output.setText(f"{chi2_pss:.3e}")
-            self.chi2_pss_sq_output.setText(f"{abs(chi2_pss)**2:.3e}")
+            # 菲涅耳因子
+            self.fresnel_xx_sfg.setText(f"{result['lxx_sfg']:.3f}")
+            self.fresnel_yy_sfg.setText(f"{result['lyy_sfg']:.3f}")
+            self.fresnel_xx_vis.setText(f"{result['lxx_vis']:.3f}")
+            self.fresnel_yy_vis.setText(f"{result['lyy_vis']:.3f}")
+            self.fresnel_xx_ir.setText(f"{result['lxx_ir']:.3f}")
+            self.fresnel_yy_ir.setText(f"{result['lyy_ir']:.3f}")
+
+            # 二阶极化率及其模平方
+            for pol in ['ssp', 'ppp', 'sps', 'pss']:
+                chi2 = result[f'chi2_{pol}']
+                getattr(self, f'chi2_{pol}_output').setText(f"{chi2:.3e}")
+                getattr(self, f'chi2_{pol}_sq_output').setText(f"{abs(chi2)**2:.3e}")
             
         except ValueError:
             # 输入无效时清空所有输出
@@ -238,6 +216,53 @@ class SFGCalculator(QMainWindow):
             self.chi2_pss_sq_output.clear()
             self.chi2_ppp_sq_output.clear()
         
+    def run_uncertainty_analysis(self):
+        """在后台线程中对石英选项卡的输出做蒙特卡洛不确定度传递"""
+        try:
+            nominal = {
+                'vis_angle': float(self.quartz_vis_angle_input.text()),
+                'ir_angle': float(self.quartz_ir_angle_input.text()),
+                'vis_wavelength': float(self.quartz_vis_wavelength_input.text()),
+                'ir_wavenumber': float(self.quartz_ir_wavenumber_input.text()),
+            }
+            spreads = {
+                'vis_angle': float(self.mc_vis_angle_sigma.text()),
+                'ir_angle': float(self.mc_ir_angle_sigma.text()),
+                'vis_wavelength': float(self.mc_vis_wavelength_sigma.text()),
+                'ir_wavenumber': float(self.mc_ir_wavenumber_sigma.text()),
+            }
+            n_samples = int(self.mc_samples_input.text())
+            if n_samples <= 0 or any(value < 0 for value in spreads.values()):
+                raise ValueError("样本数和误差必须为正")
+        except ValueError as e:
+            self.mc_result_label.setText(f"输入无效: {e}")
+            return
+        
+        outputs = ['sfg_angle', 'coherence_length', 'chi2_ssp', 'chi2_ppp', 'chi2_sps', 'chi2_pss']
+        self.mc_button.setEnabled(False)
+        self.mc_result_label.setText(f"正在计算 {n_samples} 个样本...")
+        self.run_in_background(self.show_uncertainty_result, self.show_uncertainty_error,
+                               propagate, quartz_chi2, nominal, spreads, outputs, n_samples)
+
+    def show_uncertainty_result(self, stats):
+        """显示不确定度分析结果：均值 ± 标准差 [2.5%, 97.5%]"""
+        labels = {'sfg_angle': 'SFG反射角度 (°)', 'coherence_length': '相干长度 (nm)',
+                  'chi2_ssp': 'χ²(SSP)', 'chi2_ppp': 'χ²(PPP)', 'chi2_sps': 'χ²(SPS)', 'chi2_pss': 'χ²(PSS)'}
+        lines = []
+        for name, stat in stats.items():
+            fmt = '.3e' if name.startswith('chi2') else '.3f'
+            lines.append(f"{labels[name]}: {stat['mean']:{fmt}} ± {stat['std']:{fmt}}  "
+                         f"[95%: {stat['low']:{fmt}}, {stat['high']:{fmt}}]")
+        valid = min(stat['valid_fraction'] for stat in stats.values())
+        if valid < 1:
+            lines.append(f"有效样本比例: {valid:.2%}")
+        self.mc_result_label.setText('\n'.join(lines))
+        self.mc_button.setEnabled(True)
+
+    def show_uncertainty_error(self, message):
+        self.mc_result_label.setText(f"计算失败: {message}")
+        self.mc_button.setEnabled(True)
+
     def calculate_focus(self):
         """计算可见光和红外光的焦点直径"""
         try:
@@ -249,34 +274,23 @@ class SFGCalculator(QMainWindow):
             vis_focal = float(self.Visible_focal_input.text())  # 可见透镜焦距 mm
             ir_focal = float(self.IR_focal_input.text())  # 红外透镜焦距 mm
 
-            # 计算可见光焦点直径 (μm)
-            vis_focus_diameter = (4 * vis_focal * vis_wavelength * 1e-3) / (math.pi * vis_spot_size)
-            
-            # 计算红外光焦点直径 (μm)
-            ir_focus_diameter = (4 * ir_focal * ir_wavelength * 1e-3) / (math.pi * ir_spot_size)
-
-            # 计算可见光焦点深度 (mm)
-            vis_focus_depth = (2 * math.pi * (vis_focus_diameter * 1e-3 / 2)**2) / (vis_wavelength * 1e-6)
-            
-            # 计算红外光焦点深度 (mm)
-            ir_focus_depth = (2 * math.pi * (ir_focus_diameter * 1e-3 / 2)**2) / (ir_wavelength * 1e-6)
-
-            # 计算可见光斑直径 (μm)
-            vis_defocus = float(self.Visible_defocus_input.text())
-            vis_spot_diameter = vis_focus_diameter * math.sqrt(1 + (vis_defocus / (vis_focus_depth / 2))**2)
-            
-            # 计算红外光斑直径 (μm)
-            ir_defocus = float(self.IR_defocus_input.text())
-            ir_spot_diameter = ir_focus_diameter * math.sqrt(1 + (ir_defocus / (ir_focus_depth / 2))**2)
-
-            # 计算SFG光斑直径 (mm)
-            sfg_focal = float(self.SFG_focal_input.text())
-            sfg_spot_diameter = vis_spot_size * (sfg_focal / vis_focal)
-
-            # 计算狭缝焦点大小 (μm)
-            spectrometer_focal = float(self.Spectrometer_focal_input.text())
-            sfg_wavelength = float(self.SFG_wavelength_input.text())
-            slit_spot_size = (4 * spectrometer_focal * sfg_wavelength) / (math.pi * sfg_spot_diameter) * 1e-3
+            vis_defocus = float(self.Visible_defocus_input.text())  # 可见焦点距离 mm
+            ir_defocus = float(self.IR_defocus_input.text())  # 红外焦点距离 mm
+            sfg_focal = float(self.SFG_focal_input.text())  # SFG透镜焦距 mm
+            spectrometer_focal = float(self.Spectrometer_focal_input.text())  # 光谱仪透镜焦距 mm
+            sfg_wavelength = float(self.SFG_wavelength_input.text())  # SFG波长 nm
+
+            # 焦点直径、焦点深度、光斑直径和狭缝焦点大小
+            result = focus_parameters(vis_wavelength, ir_wavelength, sfg_wavelength, vis_spot_size, ir_spot_size,
+                                      vis_focal, ir_focal, sfg_focal, spectrometer_focal, vis_defocus, ir_defocus)
+            vis_focus_diameter = result['vis_focus_diameter']
+            ir_focus_diameter = result['ir_focus_diameter']
+            vis_focus_depth = result['vis_focus_depth']
+            ir_focus_depth = result['ir_focus_depth']
+            vis_spot_diameter = result['vis_spot_diameter']
+            ir_spot_diameter = result['ir_spot_diameter']
+            sfg_spot_diameter = result['sfg_spot_diameter']
+            slit_spot_size = result['slit_spot_size']
 
             # 更新输出框
             self.Visible_spot_output.setText(f"{vis_focus_diameter:.4f}")
@@ -288,6 +302,18 @@ class SFGCalculator(QMainWindow):
             self.SFG_diameter_output.setText(f"{sfg_spot_diameter:.4f}")
             self.Slit_spot_output.setText(f"{slit_spot_size:.4f}")
 
+            # 计算光斑重叠 (w0、瑞利长度、离焦量单位 mm)
+            vis_beam = (vis_focus_diameter * 1e-3 / 2, vis_focus_depth / 2, vis_defocus,
+                        float(self.Visible_angle_input.text()))
+            ir_beam = (ir_focus_diameter * 1e-3 / 2, ir_focus_depth / 2, ir_defocus,
+                       float(self.IR_angle_input.text()))
+            self.calculate_overlap(vis_beam, ir_beam)
+
+            # 狭缝光斑和激光带宽合成的仪器函数宽度
+            self.instrument_fwhm = instrument_fwhm(slit_spot_size, float(self.Dispersion_input.text()),
+                                                   sfg_wavelength, float(self.Laser_bandwidth_input.text()))
+            self.Instrument_fwhm_output.setText(f"{self.instrument_fwhm:.4f}")
+
         except ValueError:
             # 输入无效时清空输出
             self.Visible_spot_output.clear()
@@ -295,6 +321,59 @@ class SFGCalculator(QMainWindow):
             self.Visible_diameter_output.clear()
             self.IR_diameter_output.clear()
             self.SFG_diameter_output.clear()
+            self.Overlap_efficiency_output.clear()
+            self.Overlap_integral_output.clear()
+            self.Instrument_fwhm_output.clear()
+            self.instrument_fwhm = None
+
+    def deconvolve_spectra_files(self):
+        """批量去除归一化光谱的仪器展宽，结果另存为 *_deconv.csv"""
+        if not getattr(self, 'instrument_fwhm', None):
+            QMessageBox.warning(self, "Input Error", "请先输入有效的聚焦和光谱仪参数")
+            return
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "Select normalized spectra",
+            "", "CSV Files (*.csv);;All Files (*)"
+        )
+        if not file_paths:
+            return
+        method = self.Deconvolution_method_combo.currentText()
+        saved = []
+        try:
+            for file_path in file_paths:
+                data = load_columns(file_path)
+                wavenumber = data[:, 0]
+                # 同一文件中的多条光谱共用波数轴，一次处理
+                result = deconvolve(wavenumber, data[:, 1:].T, self.instrument_fwhm, method).T
+                
+                base = os.path.splitext(os.path.basename(file_path))[0]
+                output_path = os.path.join(os.path.dirname(file_path), f"{base}_deconv.csv")
+                header = ','.join(['Wavenumber(cm-1)'] +
+                                  [f"{base}_deconv_{i}" if result.shape[1] > 1 else f"{base}_deconv"
+                                   for i in range(result.shape[1])])
+                np.savetxt(output_path, np.column_stack([wavenumber, result]),
+                           delimiter=',', header=header, comments='')
+                saved.append(output_path)
+            
+            QMessageBox.information(self, "Processing Complete",
+                                    "Results saved as:\n" + "\n".join(saved))
+        except (OSError, ValueError, IndexError) as e:
+            QMessageBox.critical(self, "Processing Error", f"Error processing data: {str(e)}")
+
+    def calculate_overlap(self, vis_beam, ir_beam):
+        """计算可见光和红外光斑在样品面上的重叠效率图"""
+        if not (0 <= vis_beam[3] < 90) or not (0 <= ir_beam[3] < 90):
+            raise ValueError("入射角度必须在0到90度之间")
+        shift = abs(float(self.Shift_range_input.text()))
+        offset = abs(float(self.Offset_range_input.text())) * 1e-3
+        # 奇数点数保证图中包含零位移、零偏移的位置
+        shifts, offsets, efficiency, cross = overlap_map(
+            vis_beam, ir_beam, (-shift, shift, 61), (-offset, offset, 61))
+        
+        self.Overlap_efficiency_output.setText(f"{efficiency[30, 30]:.4f}")
+        self.Overlap_integral_output.setText(f"{cross[30, 30]:.4e}")
+        self.overlap_image.setImage(efficiency.T, autoLevels=False)
+        self.overlap_image.setRect(QRectF(-offset * 1e3, -shift, 2 * offset * 1e3, max(2 * shift, 1e-9)))
 
     def setup_fresnel_tab(self):
         """设置Fresnel计算选项卡"""
@@ -349,6 +428,12 @@ class SFGCalculator(QMainWindow):
         self.ir_wavenumber_input.textChanged.connect(self.calculate_fresnel_factors)
         input_layout.addWidget(self.ir_wavenumber_input, 2, 3)
 
+        # 旧版按石英折射率计算折射角；取消勾选时按输入的折射率（吸收介质为复折射角）
+        self.quartz_refraction_check = QCheckBox("折射角使用石英折射率")
+        self.quartz_refraction_check.setChecked(True)
+        self.quartz_refraction_check.toggled.connect(self.calculate_fresnel_factors)
+        input_layout.addWidget(self.quartz_refraction_check, 2, 4, 1, 2)
+
         input_group.setLayout(input_layout)
         
         # 添加输入标题
@@ -512,6 +597,44 @@ class SFGCalculator(QMainWindow):
         output_group.setLayout(output_layout)
         main_layout.addWidget(output_group)
         
+        # 输出框与计算结果的对应关系
+        self.fresnel_outputs = {
+            'sfg_lxx': self.sfg_lxx_output, 'sfg_lyy': self.sfg_lyy_output, 'sfg_lzz': self.sfg_lzz_output,
+            'vis_lxx': self.vis_lxx_output, 'vis_lyy': self.vis_lyy_output, 'vis_lzz': self.vis_lzz_output,
+            'ir_lxx': self.ir_lxx_output, 'ir_lyy': self.ir_lyy_output, 'ir_lzz': self.ir_lzz_output,
+            'ssp_yyz': self.ssp_yyz_output, 'sps_yzy': self.sps_yzy_output, 'pss_zyy': self.pss_zyy_output,
+            'ppp_zxx': self.ppp_zxx_output, 'ppp_xxz': self.ppp_xxz_output,
+            'ppp_xzx': self.ppp_xzx_output, 'ppp_zzz': self.ppp_zzz_output,
+            'psp_zyx': self.psp_zyx_output, 'psp_xyz': self.psp_xyz_output,
+            'spp_yzx': self.spp_yzx_output, 'spp_yxz': self.spp_yxz_output,
+            'pps_zxy': self.pps_zxy_output, 'pps_xzy': self.pps_xzy_output,
+        }
+        
+        # 红外光谱范围内的组合因子（吸收介质）
+        self.ir_index_table = None
+        spectrum_layout = QHBoxLayout()
+        load_index_button = QPushButton("载入红外光学常数 (波数, n, k)")
+        load_index_button.clicked.connect(self.load_ir_index_file)
+        spectrum_layout.addWidget(load_index_button)
+        self.ir_index_label = QLabel("未载入")
+        spectrum_layout.addWidget(self.ir_index_label)
+        spectrum_layout.addWidget(QLabel("组合因子:"))
+        self.fresnel_factor_combo = QComboBox()
+        self.fresnel_factor_combo.addItems(COMBINATION_NAMES)
+        self.fresnel_factor_combo.currentIndexChanged.connect(self.update_fresnel_spectrum)
+        spectrum_layout.addWidget(self.fresnel_factor_combo)
+        correct_button = QPushButton("批量校正光谱")
+        correct_button.clicked.connect(self.correct_spectra_files)
+        spectrum_layout.addWidget(correct_button)
+        main_layout.addLayout(spectrum_layout)
+        
+        self.fresnel_plot = pg.PlotWidget()
+        self.fresnel_plot.setBackground('w')
+        self.fresnel_plot.setLabel('left', '|F|')
+        self.fresnel_plot.setLabel('bottom', 'Wavenumber (cm-1)')
+        self.fresnel_plot.showGrid(x=True, y=True, alpha=0.3)
+        main_layout.addWidget(self.fresnel_plot)
+        
         # 调整布局间距
         main_layout.setSpacing(15)
         main_layout.setContentsMargins(20, 20, 20, 20)
@@ -529,131 +652,635 @@ class SFGCalculator(QMainWindow):
         
         self.fresnel_tab.setLayout(main_layout)
 
+    def get_fresnel_inputs(self):
+        """读取Fresnel选项卡的输入参数，折射率可以写成复数 n+ki"""
+        return {
+            'n_sfg': parse_refractive_index(self.sfg_n_input.text()),
+            'n_vis': parse_refractive_index(self.vis_n_input.text()),
+            'n_ir': parse_refractive_index(self.ir_n_input.text()),
+            'vis_angle': float(self.vis_angle_input.text()),
+            'ir_angle': float(self.ir_angle_input.text()),
+            'vis_wavelength': float(self.vis_wavelength_input.text()),
+            'ir_wavenumber': float(self.ir_wavenumber_input.text()),
+            'quartz_refraction': self.quartz_refraction_check.isChecked(),
+        }
+
     def calculate_fresnel_factors(self):
         """计算菲涅耳因子"""
         try:
             # 获取输入参数
-            n_sfg = float(self.sfg_n_input.text())
-            n_vis = float(self.vis_n_input.text())
-            n_ir = float(self.ir_n_input.text())
-            vis_angle = float(self.vis_angle_input.text())
-            ir_angle = float(self.ir_angle_input.text())
-            vis_wavelength = float(self.vis_wavelength_input.text())
-            ir_wavenumber = float(self.ir_wavenumber_input.text())
-            
-            # 计算相干长度(使用选项卡3的参数但保持与选项卡1相同的计算逻辑)
-            ir_wavelength_fresnel = 1e7 / ir_wavenumber
-            sfg_wavelength_fresnel = 1/(1/vis_wavelength + 1/ir_wavelength_fresnel)
-            
-            sfg_angle_fresnel = math.degrees(math.asin(
-                sfg_wavelength_fresnel * (math.sin(math.radians(vis_angle))/vis_wavelength + 
-                                        math.sin(math.radians(ir_angle))/ir_wavelength_fresnel)
-            ))
-            
-            sfg_angle_rad_fresnel = math.radians(sfg_angle_fresnel)
-            vis_angle_rad_fresnel = math.radians(vis_angle)
-            ir_angle_rad_fresnel = math.radians(ir_angle)
+            inputs = self.get_fresnel_inputs()
             
-            sfg_term_fresnel = math.sqrt(n_sfg**2 - math.sin(sfg_angle_rad_fresnel)**2) / sfg_wavelength_fresnel
-            vis_term_fresnel = math.sqrt(n_vis**2 - math.sin(vis_angle_rad_fresnel)**2) / vis_wavelength
-            ir_term_fresnel = math.sqrt(n_ir**2 - math.sin(ir_angle_rad_fresnel)**2) / ir_wavelength_fresnel
+            # 相干长度、菲涅耳因子和组合因子一次算出（复折射率时折射角为复数）
+            factors = interface_factors(**inputs)
+            if not np.isfinite(factors['sfg_angle']):
+                raise ValueError("SFG反射角度无解")
             
-            coherence_length_fresnel = 1 / (2 * math.pi * (sfg_term_fresnel + vis_term_fresnel + ir_term_fresnel))
-            self.fresnel_coherence_length_output.setText(f"{coherence_length_fresnel:.2f}")
-            
-            # 计算波长
-            ir_wavelength = 1e7 / ir_wavenumber
-            sfg_wavelength = 1/(1/vis_wavelength + 1/ir_wavelength)
-            
-            # 计算折射率
-            n_air = 1.0
-            n_quartz_vis = self.calculate_quartz_refractive_index(vis_wavelength)
-            n_quartz_ir = self.calculate_quartz_refractive_index(ir_wavelength)
-            n_quartz_sfg = self.calculate_quartz_refractive_index(sfg_wavelength)
-            
-            # 计算折射角度
-            vis_ref_angle = self.calculate_refraction_angle(vis_angle, n_air, n_quartz_vis)
-            ir_ref_angle = self.calculate_refraction_angle(ir_angle, n_air, n_quartz_ir)
-            sfg_angle = math.degrees(math.asin(
-                sfg_wavelength * (math.sin(math.radians(vis_angle))/vis_wavelength + 
-                                math.sin(math.radians(ir_angle))/ir_wavelength)
-            ))
-            sfg_ref_angle = self.calculate_refraction_angle(sfg_angle, n_air, n_quartz_sfg)
-            
-            # 计算菲涅耳因子
-            sfg_lxx = self.calculate_fresnel(n_air, n_sfg, sfg_angle, sfg_ref_angle, 'xx')
-            sfg_lyy = self.calculate_fresnel(n_air, n_sfg, sfg_angle, sfg_ref_angle, 'yy')
-            sfg_lzz = self.calculate_fresnel(n_air, n_sfg, sfg_angle, sfg_ref_angle, 'zz')
-            vis_lxx = self.calculate_fresnel(n_air, n_vis, vis_angle, vis_ref_angle, 'xx')
-            vis_lyy = self.calculate_fresnel(n_air, n_vis, vis_angle, vis_ref_angle, 'yy')
-            vis_lzz = self.calculate_fresnel(n_air, n_vis, vis_angle, vis_ref_angle, 'zz')
-            ir_lxx = self.calculate_fresnel(n_air, n_ir, ir_angle, ir_ref_angle, 'xx')
-            ir_lyy = self.calculate_fresnel(n_air, n_ir, ir_angle, ir_ref_angle, 'yy')
-            ir_lzz = self.calculate_fresnel(n_air, n_ir, ir_angle, ir_ref_angle, 'zz')
-            
-            # 计算组合因子
-            ssp_yyz = sfg_lyy * vis_lyy * ir_lzz * math.sin(math.radians(ir_angle))
-            psp_zyx = sfg_lzz * vis_lyy * ir_lxx * math.sin(math.radians(sfg_angle)) * math.cos(math.radians(ir_angle))
-            psp_xyz = sfg_lxx * vis_lyy * ir_lzz * math.cos(math.radians(sfg_angle)) * math.sin(math.radians(ir_angle))
-            
-            # 新增PPP组合因子
-            ppp_zxx = sfg_lzz * vis_lxx * ir_lxx * math.sin(math.radians(sfg_angle)) * math.cos(math.radians(vis_angle)) * math.cos(math.radians(ir_angle))
-            ppp_xxz = sfg_lxx * vis_lxx * ir_lzz * math.cos(math.radians(sfg_angle)) * math.cos(math.radians(vis_angle)) * math.sin(math.radians(ir_angle))
-            ppp_xzx = sfg_lxx * vis_lzz * ir_lxx * math.cos(math.radians(sfg_angle)) * math.sin(math.radians(vis_angle)) * math.cos(math.radians(ir_angle))
-            ppp_zzz = sfg_lzz * vis_lzz * ir_lzz * math.sin(math.radians(sfg_angle)) * math.sin(math.radians(vis_angle)) * math.sin(math.radians(ir_angle))
+            # 更新输出
+            self.fresnel_coherence_length_output.setText(f"{factors['coherence_length']:.2f}")
+            for name, widget in self.fresnel_outputs.items():
+                widget.setText(self.format_value(factors[name]))
             
-            # 新增SPS组合因子
-            sps_yzy = sfg_lyy * vis_lzz * ir_lyy * math.sin(math.radians(vis_angle))
+        except (ValueError, ZeroDivisionError):
+            # 输入无效时清空输出
+            self.fresnel_coherence_length_output.clear()
+            for widget in self.fresnel_outputs.values():
+                widget.clear()
+
+        self.update_fresnel_spectrum()
+        self.update_orientation()
+
+    def load_ir_index_file(self):
+        """载入红外光学常数文件（波数, n, k）"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Select IR optical constants file",
+            "", "Data Files (*.csv *.txt *.dat);;All Files (*)"
+        )
+        if not file_path:
+            return
+        try:
+            self.ir_index_table = load_refractive_index(file_path)
+            self.ir_index_label.setText(os.path.basename(file_path))
+        except (OSError, ValueError, IndexError) as e:
+            self.ir_index_table = None
+            self.ir_index_label.setText("未载入")
+            QMessageBox.critical(self, "Loading Error", f"Error loading file: {str(e)}")
+        self.update_fresnel_spectrum()
+
+    def fresnel_spectrum_factor(self, wavenumber):
+        """在给定红外波数数组上计算当前所选组合因子"""
+        inputs = self.get_fresnel_inputs()
+        inputs['ir_wavenumber'] = wavenumber
+        if self.ir_index_table is not None:
+            inputs['n_ir'] = interpolate_refractive_index(wavenumber, *self.ir_index_table)
+        return interface_factors(**inputs)[self.fresnel_factor_combo.currentText()]
+
+    def update_fresnel_spectrum(self):
+        """绘制整条红外光谱上的组合因子 |F|"""
+        if not hasattr(self, 'fresnel_plot'):
+            return
+        self.fresnel_plot.clear()
+        if self.ir_index_table is None:
+            return
+        try:
+            wavenumber = self.ir_index_table[0]
+            factor = self.fresnel_spectrum_factor(wavenumber)
+            self.fresnel_plot.plot(wavenumber, np.abs(factor), pen='k')
+        except ValueError:
+            pass
+
+    def correct_spectra_files(self):
+        """批量校正归一化后的SFG光谱：I / |F|^2，结果另存为 *_fresnel.csv"""
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "Select normalized spectra",
+            "", "CSV Files (*.csv);;All Files (*)"
+        )
+        if not file_paths:
+            return
+        name = self.fresnel_factor_combo.currentText()
+        saved = []
+        try:
+            for file_path in file_paths:
+                data = load_columns(file_path)
+                wavenumber = data[:, 0]
+                factor = self.fresnel_spectrum_factor(wavenumber)
+                corrected = fresnel_correct(data[:, 1:].T, factor).T
+                
+                base = os.path.splitext(os.path.basename(file_path))[0]
+                output_path = os.path.join(os.path.dirname(file_path), f"{base}_fresnel.csv")
+                header = ','.join(['Wavenumber(cm-1)'] +
+                                  [f"{base}_{name}_{i}" if corrected.shape[1] > 1 else f"{base}_{name}"
+                                   for i in range(corrected.shape[1])])
+                np.savetxt(output_path, np.column_stack([wavenumber, corrected]),
+                           delimiter=',', header=header, comments='')
+                saved.append(output_path)
             
-            # 新增PSS组合因子
-            pss_zyy = sfg_lzz * vis_lyy * ir_lyy * math.sin(math.radians(sfg_angle))
+            QMessageBox.information(self, "Processing Complete",
+                                    "Results saved as:\n" + "\n".join(saved))
+        except (OSError, ValueError, IndexError) as e:
+            QMessageBox.critical(self, "Processing Error", f"Error processing data: {str(e)}")
+
+    def setup_thinfilm_tab(self):
+        """设置多层膜计算选项卡"""
+        main_layout = QVBoxLayout()
+        
+        # 创建输入区域
+        input_group = QWidget()
+        input_layout = QGridLayout()
+        
+        # 第一行: 入射角和可见光波长
+        input_layout.addWidget(QLabel("可见光入射角(°):"), 0, 0)
+        self.film_vis_angle_input = QLineEdit("45")
+        input_layout.addWidget(self.film_vis_angle_input, 0, 1)
+        
+        input_layout.addWidget(QLabel("红外入射角(°):"), 0, 2)
+        self.film_ir_angle_input = QLineEdit("55")
+        input_layout.addWidget(self.film_ir_angle_input, 0, 3)
+        
+        input_layout.addWidget(QLabel("可见光波长(nm):"), 0, 4)
+        self.film_vis_wavelength_input = QLineEdit("532.1")
+        input_layout.addWidget(self.film_vis_wavelength_input, 0, 5)
+        
+        # 第二行: 波数范围和厚度范围
+        input_layout.addWidget(QLabel("红外波数范围(cm⁻¹):"), 1, 0)
+        self.film_wn_min_input = QLineEdit("2800")
+        input_layout.addWidget(self.film_wn_min_input, 1, 1)
+        self.film_wn_max_input = QLineEdit("3800")
+        input_layout.addWidget(self.film_wn_max_input, 1, 2)
+        
+        input_layout.addWidget(QLabel("扫描层厚度(nm):"), 1, 3)
+        self.film_d_min_input = QLineEdit("0")
+        input_layout.addWidget(self.film_d_min_input, 1, 4)
+        self.film_d_max_input = QLineEdit("2000")
+        input_layout.addWidget(self.film_d_max_input, 1, 5)
+        
+        # 第三行: 衬底折射率
+        input_layout.addWidget(QLabel("衬底折射率 SFG/VIS/IR:"), 2, 0)
+        self.film_sub_sfg_input = QLineEdit("4.64+0.14i")
+        input_layout.addWidget(self.film_sub_sfg_input, 2, 1)
+        self.film_sub_vis_input = QLineEdit("4.15+0.04i")
+        input_layout.addWidget(self.film_sub_vis_input, 2, 2)
+        self.film_sub_ir_input = QLineEdit("3.42")
+        input_layout.addWidget(self.film_sub_ir_input, 2, 3)
+        
+        input_layout.addWidget(QLabel("扫描层序号:"), 2, 4)
+        self.film_sweep_input = QLineEdit("1")
+        input_layout.addWidget(self.film_sweep_input, 2, 5)
+        
+        # 第四行: 膜层
+        input_layout.addWidget(QLabel("膜层 (从上到下，每行 n_SFG, n_VIS, n_IR, 厚度nm):"), 3, 0, 1, 3)
+        input_layout.addWidget(QLabel("组合因子:"), 3, 4)
+        self.film_factor_combo = QComboBox()
+        self.film_factor_combo.addItems(COMBINATION_NAMES)
+        self.film_factor_combo.currentIndexChanged.connect(self.calculate_thinfilm_map)
+        input_layout.addWidget(self.film_factor_combo, 3, 5)
+        
+        self.film_layers_input = QTextEdit()
+        self.film_layers_input.setPlainText("1.4631, 1.4607, 1.41, 300")
+        self.film_layers_input.setFixedHeight(70)
+        self.film_layers_input.textChanged.connect(self.calculate_thinfilm_map)
+        input_layout.addWidget(self.film_layers_input, 4, 0, 1, 6)
+        
+        input_group.setLayout(input_layout)
+        
+        # 添加输入标题
+        input_title = QLabel("输入参数")
+        input_title.setStyleSheet("font-weight: bold; font-size: 16px; color: #2c3e50; padding: 5px;")
+        main_layout.addWidget(input_title)
+        main_layout.addWidget(input_group)
+        
+        # 输出: 厚度 × 波数 的 |F| 图
+        self.film_status_label = QLabel()
+        main_layout.addWidget(self.film_status_label)
+        
+        self.film_plot = pg.PlotWidget()
+        self.film_plot.setBackground('w')
+        self.film_plot.setLabel('left', 'Thickness (nm)')
+        self.film_plot.setLabel('bottom', 'Wavenumber (cm-1)')
+        self.film_image = pg.ImageItem()
+        self.film_plot.addItem(self.film_image)
+        self.film_colorbar = pg.ColorBarItem(colorMap='viridis', interactive=False)
+        self.film_colorbar.setImageItem(self.film_image, insert_in=self.film_plot.getPlotItem())
+        main_layout.addWidget(self.film_plot)
+        
+        # 调整布局间距
+        main_layout.setSpacing(10)
+        main_layout.setContentsMargins(20, 20, 20, 20)
+        input_layout.setVerticalSpacing(10)
+        
+        # 设置输入框样式并连接信号
+        for widget in input_group.findChildren(QLineEdit):
+            widget.setStyleSheet("padding: 5px; border: 1px solid #bdc3c7; border-radius: 3px;")
+            widget.textChanged.connect(self.calculate_thinfilm_map)
+        
+        self.thinfilm_tab.setLayout(main_layout)
+
+    def calculate_thinfilm_map(self):
+        """计算 扫描层厚度 × 红外波数 的组合因子图"""
+        if not hasattr(self, 'film_image'):
+            return
+        try:
+            layers = parse_layers(self.film_layers_input.toPlainText(), parse_refractive_index)
+            n_sub = (parse_refractive_index(self.film_sub_sfg_input.text()),
+                     parse_refractive_index(self.film_sub_vis_input.text()),
+                     parse_refractive_index(self.film_sub_ir_input.text()))
+            wn_min = float(self.film_wn_min_input.text())
+            wn_max = float(self.film_wn_max_input.text())
+            d_min = float(self.film_d_min_input.text())
+            d_max = float(self.film_d_max_input.text())
+            sweep = int(self.film_sweep_input.text()) - 1
+            if not layers:
+                raise ValueError("请输入至少一层膜")
+            if not 0 <= sweep < len(layers):
+                raise ValueError("扫描层序号超出范围")
+            if wn_min <= 0 or wn_max <= wn_min or d_min < 0 or d_max <= d_min:
+                raise ValueError("范围无效")
             
-            # 新增SPP组合因子
-            spp_yzx = sfg_lyy * vis_lzz * ir_lxx * math.sin(math.radians(vis_angle)) * math.cos(math.radians(ir_angle))
-            spp_yxz = sfg_lyy * vis_lxx * ir_lzz * math.cos(math.radians(vis_angle)) * math.sin(math.radians(ir_angle))
+            wavenumber = np.linspace(wn_min, wn_max, 300)
+            thickness = np.linspace(d_min, d_max, 200)[:, None]
+            n_sfg, n_vis, n_ir, _ = layers[sweep]
+            layers[sweep] = (n_sfg, n_vis, n_ir, thickness)
             
-            # 新增PPS组合因子
-            pps_zxy = sfg_lzz * vis_lxx * ir_lyy * math.sin(math.radians(sfg_angle)) * math.cos(math.radians(vis_angle))
-            pps_xzy = sfg_lxx * vis_lzz * ir_lyy * math.cos(math.radians(sfg_angle)) * math.sin(math.radians(vis_angle))
+            factors = stack_interface_factors(
+                layers, n_sub,
+                float(self.film_vis_angle_input.text()),
+                float(self.film_ir_angle_input.text()),
+                float(self.film_vis_wavelength_input.text()),
+                wavenumber)
+            value = np.abs(factors[self.film_factor_combo.currentText()])
+            if not np.all(np.isfinite(value)):
+                raise ValueError("SFG反射角度无解")
             
-            # 更新输出
-            self.sfg_lxx_output.setText(f"{sfg_lxx:.4f}")
-            self.sfg_lyy_output.setText(f"{sfg_lyy:.4f}")
-            self.sfg_lzz_output.setText(f"{sfg_lzz:.4f}")
-            self.vis_lxx_output.setText(f"{vis_lxx:.4f}")
-            self.vis_lyy_output.setText(f"{vis_lyy:.4f}")
-            self.vis_lzz_output.setText(f"{vis_lzz:.4f}")
-            self.ir_lxx_output.setText(f"{ir_lxx:.4f}")
-            self.ir_lyy_output.setText(f"{ir_lyy:.4f}")
-            self.ir_lzz_output.setText(f"{ir_lzz:.4f}")
-            self.ssp_yyz_output.setText(f"{ssp_yyz:.4f}")
-            self.psp_zyx_output.setText(f"{psp_zyx:.4f}")
-            self.psp_xyz_output.setText(f"{psp_xyz:.4f}")
-            self.ppp_zxx_output.setText(f"{ppp_zxx:.4f}")
-            self.ppp_xxz_output.setText(f"{ppp_xxz:.4f}")
-            self.ppp_xzx_output.setText(f"{ppp_xzx:.4f}")
-            self.ppp_zzz_output.setText(f"{ppp_zzz:.4f}")
-            self.sps_yzy_output.setText(f"{sps_yzy:.4f}")
-            self.pss_zyy_output.setText(f"{pss_zyy:.4f}")
-            self.spp_yzx_output.setText(f"{spp_yzx:.4f}")
-            self.spp_yxz_output.setText(f"{spp_yxz:.4f}")
-            self.pps_zxy_output.setText(f"{pps_zxy:.4f}")
-            self.pps_xzy_output.setText(f"{pps_xzy:.4f}")
+            self.film_image.setImage(value.T, autoLevels=False)
+            self.film_image.setRect(QRectF(wn_min, d_min, wn_max - wn_min, d_max - d_min))
+            self.film_colorbar.setLevels((value.min(), value.max()))
+            self.film_status_label.setText(
+                f"|{self.film_factor_combo.currentText()}|: {value.min():.4f} ~ {value.max():.4f}")
+        except (ValueError, ZeroDivisionError) as e:
+            self.film_status_label.setText(f"输入无效: {e}")
+
+    def setup_optimizer_tab(self):
+        """设置角度优化选项卡"""
+        main_layout = QVBoxLayout()
+        
+        # 创建输入区域
+        input_group = QWidget()
+        input_layout = QGridLayout()
+        
+        # 第一行: 优化目标
+        input_layout.addWidget(QLabel("优化目标:"), 0, 0)
+        self.opt_target_combo = QComboBox()
+        self.opt_target_combo.setEditable(True)
+        self.opt_target_combo.addItems(TARGETS + ['ppp_zzz/ssp_yyz', 'chi2_ppp/chi2_ssp'])
+        self.opt_target_combo.setCurrentText('ppp_zzz')
+        input_layout.addWidget(self.opt_target_combo, 0, 1, 1, 2)
+        input_layout.addWidget(QLabel("（模平方；比值写成 a/b）"), 0, 3, 1, 3)
+        
+        # 第二行: 折射率（用于组合因子）
+        input_layout.addWidget(QLabel("折射率 SFG/VIS/IR:"), 1, 0)
+        self.opt_n_sfg_input = QLineEdit("1.4727")
+        input_layout.addWidget(self.opt_n_sfg_input, 1, 1)
+        self.opt_n_vis_input = QLineEdit("1.4727")
+        input_layout.addWidget(self.opt_n_vis_input, 1, 2)
+        self.opt_n_ir_input = QLineEdit("1.47")
+        input_layout.addWidget(self.opt_n_ir_input, 1, 3)
+        
+        # 第三行: 波长/波数
+        input_layout.addWidget(QLabel("可见光波长(nm):"), 2, 0)
+        self.opt_vis_wavelength_input = QLineEdit("532.1")
+        input_layout.addWidget(self.opt_vis_wavelength_input, 2, 1)
+        input_layout.addWidget(QLabel("红外波数(cm⁻¹):"), 2, 2)
+        self.opt_ir_wavenumber_input = QLineEdit("2900")
+        input_layout.addWidget(self.opt_ir_wavenumber_input, 2, 3)
+        
+        # 第四行: 角度范围
+        input_layout.addWidget(QLabel("可见光角度范围(°):"), 3, 0)
+        self.opt_vis_min_input = QLineEdit("0")
+        input_layout.addWidget(self.opt_vis_min_input, 3, 1)
+        self.opt_vis_max_input = QLineEdit("89")
+        input_layout.addWidget(self.opt_vis_max_input, 3, 2)
+        input_layout.addWidget(QLabel("红外角度范围(°):"), 3, 3)
+        self.opt_ir_min_input = QLineEdit("0")
+        input_layout.addWidget(self.opt_ir_min_input, 3, 4)
+        self.opt_ir_max_input = QLineEdit("89")
+        input_layout.addWidget(self.opt_ir_max_input, 3, 5)
+        
+        # 第五行: 可见光波长范围（可选）
+        self.opt_wavelength_check = QCheckBox("同时优化可见光波长(nm):")
+        input_layout.addWidget(self.opt_wavelength_check, 4, 0)
+        self.opt_wl_min_input = QLineEdit("400")
+        input_layout.addWidget(self.opt_wl_min_input, 4, 1)
+        self.opt_wl_max_input = QLineEdit("800")
+        input_layout.addWidget(self.opt_wl_max_input, 4, 2)
+        
+        input_group.setLayout(input_layout)
+        
+        # 添加输入标题
+        input_title = QLabel("输入参数")
+        input_title.setStyleSheet("font-weight: bold; font-size: 16px; color: #2c3e50; padding: 5px;")
+        main_layout.addWidget(input_title)
+        main_layout.addWidget(input_group)
+        
+        # 按钮
+        button_layout = QHBoxLayout()
+        run_button = QPushButton("开始优化")
+        run_button.clicked.connect(self.run_angle_optimizer)
+        button_layout.addWidget(run_button)
+        apply_button = QPushButton("应用到石英/Fresnel选项卡")
+        apply_button.clicked.connect(self.apply_optimum)
+        button_layout.addWidget(apply_button)
+        main_layout.addLayout(button_layout)
+        
+        # 输出结果
+        output_group = QWidget()
+        output_layout = QGridLayout()
+        output_layout.addWidget(QLabel("最优可见光角度(°):"), 0, 0)
+        self.opt_vis_angle_output = QLineEdit()
+        self.opt_vis_angle_output.setReadOnly(True)
+        output_layout.addWidget(self.opt_vis_angle_output, 0, 1)
+        output_layout.addWidget(QLabel("最优红外角度(°):"), 0, 2)
+        self.opt_ir_angle_output = QLineEdit()
+        self.opt_ir_angle_output.setReadOnly(True)
+        output_layout.addWidget(self.opt_ir_angle_output, 0, 3)
+        output_layout.addWidget(QLabel("可见光波长(nm):"), 1, 0)
+        self.opt_wavelength_output = QLineEdit()
+        self.opt_wavelength_output.setReadOnly(True)
+        output_layout.addWidget(self.opt_wavelength_output, 1, 1)
+        output_layout.addWidget(QLabel("目标值:"), 1, 2)
+        self.opt_value_output = QLineEdit()
+        self.opt_value_output.setReadOnly(True)
+        output_layout.addWidget(self.opt_value_output, 1, 3)
+        output_group.setLayout(output_layout)
+        main_layout.addWidget(output_group)
+        
+        self.opt_sensitivity_label = QLabel()
+        main_layout.addWidget(self.opt_sensitivity_label)
+        
+        # 粗网格结果
+        self.opt_plot = pg.PlotWidget()
+        self.opt_plot.setBackground('w')
+        self.opt_plot.setLabel('left', 'IR angle (°)')
+        self.opt_plot.setLabel('bottom', 'VIS angle (°)')
+        self.opt_image = pg.ImageItem()
+        self.opt_plot.addItem(self.opt_image)
+        self.opt_marker = pg.ScatterPlotItem(symbol='+', size=15, pen=pg.mkPen('r', width=2))
+        self.opt_plot.addItem(self.opt_marker)
+        main_layout.addWidget(self.opt_plot)
+        
+        # 调整布局间距
+        main_layout.setSpacing(10)
+        main_layout.setContentsMargins(20, 20, 20, 20)
+        input_layout.setVerticalSpacing(10)
+        
+        # 设置输入框样式
+        for widget in input_group.findChildren(QLineEdit):
+            widget.setStyleSheet("padding: 5px; border: 1px solid #bdc3c7; border-radius: 3px;")
+        for widget in output_group.findChildren(QLineEdit):
+            widget.setStyleSheet("padding: 5px; border: 1px solid #bdc3c7; border-radius: 3px; background-color: #ecf0f1;")
+        
+        self.optimizer_tab.setLayout(main_layout)
+
+    def run_angle_optimizer(self):
+        """粗网格 + 局部细化搜索最优入射角"""
+        try:
+            objective = target_function(
+                self.opt_target_combo.currentText(),
+                parse_refractive_index(self.opt_n_sfg_input.text()),
+                parse_refractive_index(self.opt_n_vis_input.text()),
+                parse_refractive_index(self.opt_n_ir_input.text()),
+                float(self.opt_ir_wavenumber_input.text()))
+            wavelength_bounds = None
+            if self.opt_wavelength_check.isChecked():
+                wavelength_bounds = (float(self.opt_wl_min_input.text()), float(self.opt_wl_max_input.text()))
+            vis_bounds = (float(self.opt_vis_min_input.text()), float(self.opt_vis_max_input.text()))
+            ir_bounds = (float(self.opt_ir_min_input.text()), float(self.opt_ir_max_input.text()))
+            if not (0 <= vis_bounds[0] < vis_bounds[1] <= 90) or not (0 <= ir_bounds[0] < ir_bounds[1] <= 90):
+                raise ValueError("入射角度范围必须在0到90度之间")
             
-        except ValueError:
-            # 输入无效时清空输出
-            self.sfg_lxx_output.clear()
-            self.sfg_lyy_output.clear()
-            self.sfg_lzz_output.clear()
-            self.vis_lxx_output.clear()
-            self.vis_lyy_output.clear()
-            self.vis_lzz_output.clear()
-            self.ir_lxx_output.clear()
-            self.ir_lyy_output.clear()
-            self.ir_lzz_output.clear()
-            self.ssp_yyz_output.clear()
-            self.psp_zyx_output.clear()
-            self.psp_xyz_output.clear()
+            result = optimize_angles(objective, float(self.opt_vis_wavelength_input.text()),
+                                     vis_bounds, ir_bounds, wavelength_bounds)
+        except (ValueError, ZeroDivisionError) as e:
+            self.opt_sensitivity_label.setText(f"优化失败: {e}")
+            return
+        
+        self.opt_result = result
+        self.opt_vis_angle_output.setText(f"{result['vis_angle']:.2f}")
+        self.opt_ir_angle_output.setText(f"{result['ir_angle']:.2f}")
+        self.opt_wavelength_output.setText(f"{result['vis_wavelength']:.2f}")
+        self.opt_value_output.setText(f"{result['value']:.4e}")
+        
+        # 灵敏度：偏离 ±1° / ±1 nm 时目标值的相对变化，偏移被搜索范围截断时标出实际偏移，
+        # 最优点在边界上时该侧显示“边界”
+        units = {'vis_angle': ('可见光角度', '°'), 'ir_angle': ('红外角度', '°'),
+                 'vis_wavelength': ('可见光波长', ' nm')}
+
+        def change(side, unit):
+            value, shift = side
+            if not np.isfinite(value):
+                return "边界"
+            return f"{shift:+.2g}{unit} {value:+.2%}"
+
+        text = "灵敏度（目标值相对变化）: "
+        text += "; ".join(f"{units[name][0]} {change(minus, units[name][1])} / {change(plus, units[name][1])}"
+                          for name, (minus, plus) in result['sensitivity'].items())
+        self.opt_sensitivity_label.setText(text)
+        
+        coarse = result['coarse']
+        values = np.where(np.isfinite(coarse['values']), coarse['values'], np.nan)
+        vis, ir = coarse['vis_angle'], coarse['ir_angle']
+        self.opt_image.setImage(values, levels=(np.nanmin(values), np.nanmax(values)))
+        self.opt_image.setRect(QRectF(vis[0], ir[0], vis[-1] - vis[0], ir[-1] - ir[0]))
+        self.opt_marker.setData([result['vis_angle']], [result['ir_angle']])
+
+    def apply_optimum(self):
+        """将最优角度（和波长）填入石英和Fresnel选项卡"""
+        result = getattr(self, 'opt_result', None)
+        if result is None:
+            return
+        for widget in [self.quartz_vis_angle_input, self.vis_angle_input]:
+            widget.setText(f"{result['vis_angle']:.2f}")
+        for widget in [self.quartz_ir_angle_input, self.ir_angle_input]:
+            widget.setText(f"{result['ir_angle']:.2f}")
+        if self.opt_wavelength_check.isChecked():
+            for widget in [self.quartz_vis_wavelength_input, self.vis_wavelength_input]:
+                widget.setText(f"{result['vis_wavelength']:.2f}")
+
+    def setup_beampath_tab(self):
+        """设置光束传播选项卡"""
+        main_layout = QVBoxLayout()
+        
+        input_group = QWidget()
+        input_layout = QGridLayout()
+        input_layout.addWidget(QLabel("波长 (nm)"), 0, 1)
+        input_layout.addWidget(QLabel("束腰直径 (mm)"), 0, 2)
+        input_layout.addWidget(QLabel("束腰位置 (mm)"), 0, 3)
+        input_layout.addWidget(QLabel("光路 (每行: space 距离 / lens 焦距 / mirror 曲率半径)"), 0, 4)
+        
+        # 默认光路与聚焦计算选项卡的默认参数一致
+        defaults = {
+            'vis': ("VIS", "532", "5", "0", "space 100\nlens 250\nspace 265"),
+            'ir': ("IR", "3300", "5", "0", "space 100\nlens 150\nspace 157"),
+            'sfg': ("SFG", "458", "0.034", "0", "space 200\nlens 200\nspace 300\nlens 100\nspace 100"),
+        }
+        self.beam_inputs = {}
+        for row, (key, (name, wavelength, waist, position, train)) in enumerate(defaults.items(), start=1):
+            input_layout.addWidget(QLabel(name), row, 0)
+            wavelength_input = QLineEdit(wavelength)
+            waist_input = QLineEdit(waist)
+            position_input = QLineEdit(position)
+            train_input = QTextEdit()
+            train_input.setPlainText(train)
+            train_input.setFixedHeight(80)
+            input_layout.addWidget(wavelength_input, row, 1)
+            input_layout.addWidget(waist_input, row, 2)
+            input_layout.addWidget(position_input, row, 3)
+            input_layout.addWidget(train_input, row, 4)
+            for widget in (wavelength_input, waist_input, position_input):
+                widget.setStyleSheet("padding: 5px; border: 1px solid #bdc3c7; border-radius: 3px;")
+                widget.textChanged.connect(self.calculate_beam_paths)
+            train_input.textChanged.connect(self.calculate_beam_paths)
+            self.beam_inputs[key] = (wavelength_input, waist_input, position_input, train_input)
+        input_group.setLayout(input_layout)
+        
+        input_title = QLabel("输入参数")
+        input_title.setStyleSheet("font-weight: bold; font-size: 16px; color: #2c3e50; padding: 5px;")
+        main_layout.addWidget(input_title)
+        main_layout.addWidget(input_group)
+        
+        self.beam_status_label = QLabel()
+        main_layout.addWidget(self.beam_status_label)
+        
+        # 光束包络 ±w(z)，曲线对象只创建一次，之后用 setData 更新
+        self.beam_plot = pg.PlotWidget()
+        self.beam_plot.setBackground('w')
+        self.beam_plot.setLabel('left', 'Beam radius (mm)')
+        self.beam_plot.setLabel('bottom', 'z (mm)')
+        self.beam_plot.showGrid(x=True, y=True, alpha=0.3)
+        self.beam_plot.addLegend()
+        colors = {'vis': (0, 160, 0), 'ir': (200, 0, 0), 'sfg': (0, 0, 200)}
+        self.beam_curves = {}
+        for key, (name, *_) in defaults.items():
+            upper = self.beam_plot.plot(pen=pg.mkPen(colors[key], width=2), name=name)
+            lower = self.beam_plot.plot(pen=pg.mkPen(colors[key], width=2))
+            self.beam_curves[key] = (upper, lower)
+        main_layout.addWidget(self.beam_plot)
+        
+        main_layout.setSpacing(10)
+        main_layout.setContentsMargins(20, 20, 20, 20)
+        self.beam_paths = {}
+        self.beampath_tab.setLayout(main_layout)
+
+    def calculate_beam_paths(self):
+        """增量更新三束光的传播：只重新计算发生变化的元件之后的部分"""
+        if not hasattr(self, 'beam_inputs'):
+            return
+        try:
+            for key, (wavelength_input, waist_input, position_input, train_input) in self.beam_inputs.items():
+                beam = (float(wavelength_input.text()), float(waist_input.text()) / 2,
+                        float(position_input.text()))
+                if beam[0] <= 0 or beam[1] <= 0:
+                    raise ValueError("波长和束腰直径必须大于0")
+                path = self.beam_paths.get(key)
+                # 光束参数改变时整条光路重新计算
+                if path is None or path.parameters != beam:
+                    path = BeamPath(*beam)
+                    self.beam_paths[key] = path
+                path.set_elements(parse_elements(train_input.toPlainText()))
+        except ValueError as e:
+            self.beam_status_label.setText(f"输入无效: {e}")
+            return
+        
+        update_caustics(self.beam_paths.values())
+        
+        text = []
+        for key, path in self.beam_paths.items():
+            z, w = path.caustic()
+            upper, lower = self.beam_curves[key]
+            upper.setData(z, w)
+            lower.setData(z, -w)
+            text.append(f"{key.upper()} 终点光斑直径: {2 * path.output_radius() * 1e3:.2f} μm")
+        self.beam_status_label.setText("    ".join(text))
+
+    def setup_orientation_tab(self):
+        """设置取向分析选项卡，实验构型取自Fresnel选项卡"""
+        main_layout = QVBoxLayout()
+        
+        input_group = QWidget()
+        input_layout = QGridLayout()
+        input_layout.addWidget(QLabel("振动模式:"), 0, 0)
+        self.orient_mode_combo = QComboBox()
+        self.orient_mode_combo.addItem("C3v/C∞v 对称伸缩", 'ss')
+        self.orient_mode_combo.addItem("C3v 反对称伸缩", 'as')
+        self.orient_mode_combo.currentIndexChanged.connect(self.update_orientation)
+        input_layout.addWidget(self.orient_mode_combo, 0, 1)
+        input_layout.addWidget(QLabel("超极化率比 r = β_aac/β_ccc:"), 0, 2)
+        self.orient_r_input = QLineEdit("1.66")
+        self.orient_r_input.textChanged.connect(self.update_orientation)
+        input_layout.addWidget(self.orient_r_input, 0, 3)
+        
+        input_layout.addWidget(QLabel("偏振比值:"), 1, 0)
+        self.orient_ratio_combo = QComboBox()
+        self.orient_ratio_combo.addItems(RATIOS)
+        self.orient_ratio_combo.currentIndexChanged.connect(self.update_orientation)
+        input_layout.addWidget(self.orient_ratio_combo, 1, 1)
+        input_layout.addWidget(QLabel("分布宽度 σ (°):"), 1, 2)
+        self.orient_width_input = QLineEdit("0")
+        self.orient_width_input.textChanged.connect(self.update_orientation)
+        input_layout.addWidget(self.orient_width_input, 1, 3)
+        
+        input_layout.addWidget(QLabel("测得振幅比 |χa/χb|:"), 2, 0)
+        self.orient_measured_input = QLineEdit("0.3")
+        self.orient_measured_input.textChanged.connect(self.update_orientation)
+        input_layout.addWidget(self.orient_measured_input, 2, 1)
+        input_layout.addWidget(QLabel("（强度比需先开平方；多个值用逗号分隔）"), 2, 2, 1, 2)
+        input_group.setLayout(input_layout)
+        
+        input_title = QLabel("输入参数")
+        input_title.setStyleSheet("font-weight: bold; font-size: 16px; color: #2c3e50; padding: 5px;")
+        main_layout.addWidget(input_title)
+        main_layout.addWidget(input_group)
+        
+        self.orient_result_label = QLabel()
+        main_layout.addWidget(self.orient_result_label)
+        
+        # 不同分布宽度下比值随倾角的变化，曲线对象只创建一次
+        self.orient_plot = pg.PlotWidget()
+        self.orient_plot.setBackground('w')
+        self.orient_plot.setLabel('left', 'Ratio')
+        self.orient_plot.setLabel('bottom', 'Tilt angle θ0 (°)')
+        self.orient_plot.showGrid(x=True, y=True, alpha=0.3)
+        self.orient_plot.addLegend()
+        self.orient_curves = {}
+        for width, color in zip((0, 10, 20, 30), ('k', 'b', 'g', 'r')):
+            self.orient_curves[width] = self.orient_plot.plot(pen=pg.mkPen(color, width=2), name=f"σ = {width}°")
+        self.orient_measured_line = pg.InfiniteLine(angle=0, pen=pg.mkPen('m', style=Qt.PenStyle.DashLine))
+        self.orient_plot.addItem(self.orient_measured_line)
+        main_layout.addWidget(self.orient_plot)
+        
+        main_layout.setSpacing(10)
+        main_layout.setContentsMargins(20, 20, 20, 20)
+        self.orientation_table = None
+        self.orientation_key = None
+        self.orientation_tab.setLayout(main_layout)
+        self.update_orientation()
+
+    def update_orientation(self):
+        """构型或模式改变时重建取向表，之后测得比值只需查表"""
+        if not hasattr(self, 'orient_curves'):
+            return
+        try:
+            inputs = self.get_fresnel_inputs()
+            mode = self.orient_mode_combo.currentData()
+            r = float(self.orient_r_input.text())
+            key = (tuple(inputs.values()), mode, r)
+            if key != self.orientation_key:
+                factors = interface_factors(**inputs)
+                self.orientation_table = OrientationTable(factors, mode, r)
+                self.orientation_key = key
+            table = self.orientation_table
+            ratio = self.orient_ratio_combo.currentText()
+            width = float(self.orient_width_input.text())
+            measured = [float(value) for value in self.orient_measured_input.text().split(',') if value.strip()]
+        except (ValueError, ZeroDivisionError) as e:
+            self.orient_result_label.setText(f"输入无效: {e}")
+            return
+        
+        for curve_width, curve in self.orient_curves.items():
+            curve.setData(table.tilts, table.ratio_curve(ratio, curve_width))
+        if not measured:
+            self.orient_result_label.clear()
+            return
+        self.orient_measured_line.setValue(measured[0])
+        tilts, counts = table.solve(measured, ratio, width)
+        text = []
+        for value, tilt, count in zip(measured, tilts, counts):
+            if count == 0:
+                text.append(f"{value:g} → 无解")
+            elif count == 1:
+                text.append(f"{value:g} → θ0 = {tilt:.1f}°")
+            else:
+                text.append(f"{value:g} → θ0 = {tilt:.1f}° (共 {count} 个解)")
+        self.orient_result_label.setText("    ".join(text))
 
     def setup_focus_tab(self):
         """设置聚焦计算选项卡"""
@@ -729,6 +1356,47 @@ class SFGCalculator(QMainWindow):
         self.Spectrometer_focal_input.setText("100")
         self.Spectrometer_focal_input.textChanged.connect(self.calculate_focus)
         input_layout.addWidget(self.Spectrometer_focal_input, 4, 1)
+
+        input_layout.addWidget(QLabel("可见入射角 (°):"), 4, 2)
+        self.Visible_angle_input = QLineEdit()
+        self.Visible_angle_input.setText("45")
+        self.Visible_angle_input.textChanged.connect(self.calculate_focus)
+        input_layout.addWidget(self.Visible_angle_input, 4, 3)
+
+        input_layout.addWidget(QLabel("红外入射角 (°):"), 4, 4)
+        self.IR_angle_input = QLineEdit()
+        self.IR_angle_input.setText("55")
+        self.IR_angle_input.textChanged.connect(self.calculate_focus)
+        input_layout.addWidget(self.IR_angle_input, 4, 5)
+
+        input_layout.addWidget(QLabel("样品位移范围 ± (mm):"), 5, 0)
+        self.Shift_range_input = QLineEdit()
+        self.Shift_range_input.setText("2")
+        self.Shift_range_input.textChanged.connect(self.calculate_focus)
+        input_layout.addWidget(self.Shift_range_input, 5, 1)
+
+        input_layout.addWidget(QLabel("横向偏移范围 ± (μm):"), 5, 2)
+        self.Offset_range_input = QLineEdit()
+        self.Offset_range_input.setText("300")
+        self.Offset_range_input.textChanged.connect(self.calculate_focus)
+        input_layout.addWidget(self.Offset_range_input, 5, 3)
+
+        input_layout.addWidget(QLabel("光谱仪倒线色散 (nm/mm):"), 6, 0)
+        self.Dispersion_input = QLineEdit()
+        self.Dispersion_input.setText("2")
+        self.Dispersion_input.textChanged.connect(self.calculate_focus)
+        input_layout.addWidget(self.Dispersion_input, 6, 1)
+
+        input_layout.addWidget(QLabel("可见激光带宽 (cm⁻¹):"), 6, 2)
+        self.Laser_bandwidth_input = QLineEdit()
+        self.Laser_bandwidth_input.setText("5")
+        self.Laser_bandwidth_input.textChanged.connect(self.calculate_focus)
+        input_layout.addWidget(self.Laser_bandwidth_input, 6, 3)
+
+        input_layout.addWidget(QLabel("去卷积方法:"), 6, 4)
+        self.Deconvolution_method_combo = QComboBox()
+        self.Deconvolution_method_combo.addItems(METHODS)
+        input_layout.addWidget(self.Deconvolution_method_combo, 6, 5)
         
         input_group.setLayout(input_layout)
         
@@ -799,10 +1467,40 @@ class SFGCalculator(QMainWindow):
         self.Slit_spot_output = QLineEdit()
         self.Slit_spot_output.setReadOnly(True)
         output_layout.addWidget(self.Slit_spot_output, 2, 3)
+
+        output_layout.addWidget(QLabel("光斑重叠效率:"), 3, 0)
+        self.Overlap_efficiency_output = QLineEdit()
+        self.Overlap_efficiency_output.setReadOnly(True)
+        output_layout.addWidget(self.Overlap_efficiency_output, 3, 1)
+
+        output_layout.addWidget(QLabel("重叠积分 (mm⁻²):"), 3, 2)
+        self.Overlap_integral_output = QLineEdit()
+        self.Overlap_integral_output.setReadOnly(True)
+        output_layout.addWidget(self.Overlap_integral_output, 3, 3)
+
+        output_layout.addWidget(QLabel("仪器函数 FWHM (cm⁻¹):"), 3, 4)
+        self.Instrument_fwhm_output = QLineEdit()
+        self.Instrument_fwhm_output.setReadOnly(True)
+        output_layout.addWidget(self.Instrument_fwhm_output, 3, 5)
         
         output_group.setLayout(output_layout)
         main_layout.addWidget(output_group)
         
+        deconvolve_button = QPushButton("仪器函数去卷积（选择归一化光谱文件）")
+        deconvolve_button.clicked.connect(self.deconvolve_spectra_files)
+        main_layout.addWidget(deconvolve_button)
+        
+        # 重叠效率图: 样品位移 × 横向偏移
+        self.overlap_plot = pg.PlotWidget()
+        self.overlap_plot.setBackground('w')
+        self.overlap_plot.setLabel('left', 'Sample shift (mm)')
+        self.overlap_plot.setLabel('bottom', 'IR lateral offset (μm)')
+        self.overlap_image = pg.ImageItem()
+        self.overlap_plot.addItem(self.overlap_image)
+        self.overlap_colorbar = pg.ColorBarItem(values=(0, 1), colorMap='viridis', interactive=False)
+        self.overlap_colorbar.setImageItem(self.overlap_image, insert_in=self.overlap_plot.getPlotItem())
+        main_layout.addWidget(self.overlap_plot)
+        
         # 调整布局间距
         main_layout.setSpacing(15)
         main_layout.setContentsMargins(20, 20, 20, 20)
@@ -1050,6 +1748,35 @@ class SFGCalculator(QMainWindow):
         output_group.setLayout(output_layout)
         main_layout.addWidget(output_group)
         
+        # 第六部分:蒙特卡洛不确定度分析
+        uncertainty_group = QWidget()
+        uncertainty_layout = QGridLayout()
+        uncertainty_layout.addWidget(QLabel("角度误差 VIS/IR (°, 1σ):"), 0, 0)
+        self.mc_vis_angle_sigma = QLineEdit("1")
+        uncertainty_layout.addWidget(self.mc_vis_angle_sigma, 0, 1)
+        self.mc_ir_angle_sigma = QLineEdit("1")
+        uncertainty_layout.addWidget(self.mc_ir_angle_sigma, 0, 2)
+        uncertainty_layout.addWidget(QLabel("可见光波长误差 (nm):"), 0, 3)
+        self.mc_vis_wavelength_sigma = QLineEdit("0.5")
+        uncertainty_layout.addWidget(self.mc_vis_wavelength_sigma, 0, 4)
+        uncertainty_layout.addWidget(QLabel("红外波数误差 (cm⁻¹):"), 1, 0)
+        self.mc_ir_wavenumber_sigma = QLineEdit("0")
+        uncertainty_layout.addWidget(self.mc_ir_wavenumber_sigma, 1, 1)
+        uncertainty_layout.addWidget(QLabel("样本数:"), 1, 3)
+        self.mc_samples_input = QLineEdit("200000")
+        uncertainty_layout.addWidget(self.mc_samples_input, 1, 4)
+        self.mc_button = QPushButton("不确定度分析")
+        self.mc_button.clicked.connect(self.run_uncertainty_analysis)
+        uncertainty_layout.addWidget(self.mc_button, 0, 5, 2, 1)
+        self.mc_result_label = QLabel()
+        self.mc_result_label.setStyleSheet("font-family: monospace;")
+        self.mc_result_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        uncertainty_layout.addWidget(self.mc_result_label, 2, 0, 1, 6)
+        uncertainty_group.setLayout(uncertainty_layout)
+        main_layout.addWidget(uncertainty_group)
+        for widget in uncertainty_group.findChildren(QLineEdit):
+            widget.setStyleSheet("padding: 5px; border: 1px solid #bdc3c7; border-radius: 3px;")
+        
         # 调整布局间距
         main_layout.setSpacing(15)
         main_layout.setContentsMargins(20, 20, 20, 20)
@@ -0,0 +1,204 @@
+"""
+SFGCalculator 批量计算（命令行）
+
+从CSV读取多组实验构型（每行一组），把所有行作为数组一次送入石英、Fresnel和聚焦计算，
+输出包含全部结果的宽表。缺少的列和空单元格使用与界面相同的默认值；
+全反射或石英折射率公式不适用的行石英结果为 nan，quartz_valid 列为 0。
+
+用法：
+    python batch.py setups.csv -o results.csv
+    python batch.py --benchmark 100000
+"""
+import argparse
+import csv
+import time
+import numpy as np
+from fresnel import quartz_chi2, interface_factors, sfg_wavelength, parse_refractive_index
+from focus import focus_parameters
+
+# 输入列及默认值（与界面默认值一致）
+INPUT_COLUMNS = {
+    'vis_angle': 45.0,             # 可见光入射角 (°)
+    'ir_angle': 55.0,              # 红外入射角 (°)
+    'vis_wavelength': 532.1,       # 可见光波长 (nm)
+    'ir_wavenumber': 2900.0,       # 红外波数 (cm-1)
+    'n_sfg': 1.4727,               # 样品在SFG波长处的折射率，可为复数
+    'n_vis': 1.4727,               # 样品在可见光波长处的折射率
+    'n_ir': 1.47,                  # 样品在红外波长处的折射率
+    'vis_beam_diameter': 5.0,      # 可见光束直径 (mm)
+    'ir_beam_diameter': 5.0,       # 红外光束直径 (mm)
+    'vis_focal': 250.0,            # 可见透镜焦距 (mm)
+    'ir_focal': 150.0,             # 红外透镜焦距 (mm)
+    'sfg_focal': 200.0,            # SFG透镜焦距 (mm)
+    'spectrometer_focal': 100.0,   # 光谱仪透镜焦距 (mm)
+    'vis_defocus': 15.0,           # 可见焦点距离 (mm)
+    'ir_defocus': 7.0,             # 红外焦点距离 (mm)
+}
+COMPLEX_COLUMNS = ('n_sfg', 'n_vis', 'n_ir')
+
+
+def parse_column(name, values, line_numbers):
+    """
+    将一列字符串转换为数组，折射率列支持复数写法
+    空单元格使用该列的默认值；无法解析的单元格报告所在行号
+    """
+    values = [value.strip() or repr(INPUT_COLUMNS[name]) for value in values]
+    try:
+        return np.array(values, dtype=float)
+    except ValueError:
+        pass
+    parse = parse_refractive_index if name in COMPLEX_COLUMNS else float
+    parsed = []
+    for value, line in zip(values, line_numbers):
+        try:
+            parsed.append(parse(value))
+        except ValueError:
+            raise ValueError(f"第 {line} 行 {name} 列无法解析: {value!r}") from None
+    return np.array(parsed)
+
+
+def read_setups(file_path):
+    """
+    读取构型CSV，返回 {列名: 数组}，包含原文件中的全部列
+    空行跳过；列数与表头不同的行报错
+    """
+    with open(file_path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader)]
+        rows = []
+        line_numbers = []
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            if len(row) != len(header):
+                raise ValueError(f"第 {reader.line_num} 行有 {len(row)} 列，表头有 {len(header)} 列")
+            rows.append(row)
+            line_numbers.append(reader.line_num)
+    columns = list(zip(*rows)) if rows else [()] * len(header)
+    setups = {}
+    for name, values in zip(header, columns):
+        if name in INPUT_COLUMNS:
+            setups[name] = parse_column(name, values, line_numbers)
+        else:
+            setups[name] = np.array(values)
+    return setups, len(rows)
+
+
+def evaluate_setups(setups, size):
+    """
+    对所有构型一次完成向量化计算
+    返回有序字典 {列名: 数组}，石英结果前缀 quartz_，Fresnel结果前缀 fresnel_，聚焦结果前缀 focus_
+    """
+    inputs = {name: np.broadcast_to(setups.get(name, default), (size,))
+              for name, default in INPUT_COLUMNS.items()}
+    ir_wavelength = 1e7 / inputs['ir_wavenumber']
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        quartz = quartz_chi2(inputs['vis_angle'], inputs['ir_angle'],
+                             inputs['vis_wavelength'], inputs['ir_wavenumber'])
+        fresnel = interface_factors(inputs['n_sfg'], inputs['n_vis'], inputs['n_ir'],
+                                    inputs['vis_angle'], inputs['ir_angle'],
+                                    inputs['vis_wavelength'], inputs['ir_wavenumber'])
+        focus = focus_parameters(inputs['vis_wavelength'], ir_wavelength,
+                                 sfg_wavelength(inputs['vis_wavelength'], inputs['ir_wavenumber']),
+                                 inputs['vis_beam_diameter'], inputs['ir_beam_diameter'],
+                                 inputs['vis_focal'], inputs['ir_focal'], inputs['sfg_focal'],
+                                 inputs['spectrometer_focal'], inputs['vis_defocus'], inputs['ir_defocus'])
+
+    # 全反射或石英折射率公式不适用的行没有实数解，石英结果置为 nan，并在 quartz_valid 列记为 0
+    quartz = {name: np.broadcast_to(values, (size,)) for name, values in quartz.items()}
+    quartz_valid = np.ones(size, dtype=bool)
+    for values in quartz.values():
+        quartz_valid &= np.isfinite(values) & (np.imag(values) == 0)
+    quartz = {name: np.where(quartz_valid, np.real(values), np.nan) for name, values in quartz.items()}
+    quartz['valid'] = quartz_valid.astype(int)
+
+    results = {}
+    for name, values in setups.items():
+        if name not in INPUT_COLUMNS:
+            results[name] = values
+    results.update(inputs)
+    for prefix, group in (('quartz_', quartz), ('fresnel_', fresnel), ('focus_', focus)):
+        for name, values in group.items():
+            results[prefix + name] = np.broadcast_to(values, (size,))
+    return results
+
+
+def write_results(file_path, results):
+    """写出宽表，复数列拆分为 _re 和 _im 两列"""
+    columns = {}
+    for name, values in results.items():
+        if np.iscomplexobj(values) and np.any(np.imag(values) != 0):
+            columns[name + '_re'] = np.real(values)
+            columns[name + '_im'] = np.imag(values)
+        elif np.iscomplexobj(values):
+            columns[name] = np.real(values)
+        elif values.dtype.kind in 'US':
+            # 文本列按CSV规则加引号
+            columns[name] = np.array(['"' + value.replace('"', '""') + '"' if any(c in value for c in ',"\n')
+                                      else value for value in values.tolist()])
+        else:
+            columns[name] = values
+
+    # 每行用同一个格式串一次格式化，比逐个数值转换字符串快得多
+    line_format = ','.join('%s' if np.asarray(values).dtype.kind in 'US' else '%.10g'
+                           for values in columns.values()) + '\n'
+    with open(file_path, 'w', newline='') as f:
+        f.write(','.join(columns.keys()) + '\n')
+        f.writelines(line_format % row for row in zip(*[np.asarray(values).tolist()
+                                                         for values in columns.values()]))
+
+
+def random_setups(size, seed=0):
+    """生成随机构型，用于性能测试"""
+    rng = np.random.default_rng(seed)
+    setups = {name: np.full(size, default, dtype=complex if name in COMPLEX_COLUMNS else float)
+              for name, default in INPUT_COLUMNS.items()}
+    setups['vis_angle'] = rng.uniform(30, 70, size)
+    setups['ir_angle'] = rng.uniform(30, 70, size)
+    setups['vis_wavelength'] = rng.uniform(400, 800, size)
+    setups['ir_wavenumber'] = rng.uniform(1000, 4000, size)
+    setups['n_ir'] = rng.uniform(1.2, 1.5, size) + 1j * rng.uniform(0, 0.3, size)
+    setups['vis_focal'] = rng.choice([100.0, 150.0, 200.0, 250.0], size)
+    setups['ir_focal'] = rng.choice([100.0, 150.0, 200.0, 250.0], size)
+    return setups
+
+
+def benchmark(size, output=None):
+    """测试 size 组构型的计算和写出耗时"""
+    setups = random_setups(size)
+    start = time.perf_counter()
+    results = evaluate_setups(setups, size)
+    elapsed = time.perf_counter() - start
+    print(f"计算 {size} 组构型: {elapsed:.3f} s ({size / elapsed:.0f} 行/秒)")
+    if output:
+        start = time.perf_counter()
+        write_results(output, results)
+        print(f"写出 {output}: {time.perf_counter() - start:.3f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SFGCalculator 批量计算")
+    parser.add_argument('input', nargs='?', help="构型CSV，列名见 INPUT_COLUMNS")
+    parser.add_argument('-o', '--output', help="结果CSV，默认为 <输入文件名>_results.csv")
+    parser.add_argument('--benchmark', type=int, metavar='N', help="用 N 组随机构型测试性能")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.output)
+        return
+    if not args.input:
+        parser.error("请指定构型CSV文件")
+
+    try:
+        setups, size = read_setups(args.input)
+    except ValueError as e:
+        parser.error(str(e))
+    results = evaluate_setups(setups, size)
+    output = args.output or args.input.rsplit('.', 1)[0] + '_results.csv'
+    write_results(output, results)
+    print(f"已计算 {size} 组构型，结果保存为 {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+基于 ABCD 矩阵的高斯光束传播
+
+光路由一串元件组成：自由空间 ('space', d)、薄透镜 ('lens', f)、球面镜 ('mirror', R)。
+BeamPath 缓存每个元件入口处的复参数 q 以及每段自由空间内采样得到的光斑半径，
+修改某个元件时只从该元件开始重新传播；多束光（VIS、IR、SFG）需要重新采样的段
+在 update_caustics 中合并为一个数组一次计算。
+长度单位均为 mm。
+"""
+import numpy as np
+
+ELEMENT_TYPES = ('space', 'lens', 'mirror')
+
+
+def element_matrix(element):
+    """元件的 ABCD 矩阵"""
+    kind, value = element
+    if kind == 'space':
+        return np.array([[1.0, value], [0.0, 1.0]])
+    elif kind == 'lens':
+        return np.array([[1.0, 0.0], [-1.0 / value, 1.0]])
+    elif kind == 'mirror':
+        # 曲率半径为 R 的球面镜等效于焦距 R/2 的透镜
+        return np.array([[1.0, 0.0], [-2.0 / value, 1.0]])
+    raise ValueError(f"未知的元件类型: {kind}")
+
+
+def transform_q(q, matrix):
+    """q' = (A q + B) / (C q + D)"""
+    (a, b), (c, d) = matrix
+    return (a * q + b) / (c * q + d)
+
+
+def beam_radius_from_q(q, wavelength):
+    """由 q 参数计算光斑半径：1/q = 1/R - iλ/(πw²)"""
+    return np.sqrt(-wavelength / (np.pi * np.imag(1 / q)))
+
+
+def parse_elements(text):
+    """
+    解析光路文本，每行一个元件："space 100"、"lens 250"、"mirror 500"
+    空行和 # 开头的行忽略
+    """
+    elements = []
+    for line in text.split('\n'):
+        line = line.split('#')[0].strip()
+        if not line:
+            continue
+        fields = line.replace(',', ' ').split()
+        if len(fields) != 2 or fields[0].lower() not in ELEMENT_TYPES:
+            raise ValueError(f"元件格式错误: {line}")
+        value = float(fields[1])
+        if fields[0].lower() == 'space' and value < 0:
+            raise ValueError(f"距离不能为负: {line}")
+        if fields[0].lower() != 'space' and value == 0:
+            raise ValueError(f"焦距或曲率半径不能为0: {line}")
+        elements.append((fields[0].lower(), value))
+    return elements
+
+
+class BeamPath:
+    """
+    单束高斯光的光路
+    参数：
+    wavelength: 波长 (nm)
+    waist: 束腰半径 (mm)
+    waist_position: 束腰相对光路起点的位置 (mm)，负值表示束腰在起点之前
+    points_per_mm: 自由空间段的采样密度
+    """
+
+    def __init__(self, wavelength, waist, waist_position=0.0, points_per_mm=2.0):
+        self.parameters = (wavelength, waist, waist_position)
+        self.wavelength = wavelength * 1e-6
+        self.points_per_mm = points_per_mm
+        z_rayleigh = np.pi * waist**2 / self.wavelength
+        self.q0 = -waist_position + 1j * z_rayleigh
+        self.elements = []
+        # 每个元件入口处的 q 和 z，长度为 len(elements) + 1
+        self.q = [self.q0]
+        self.z = [0.0]
+        # 每个元件内的采样结果 (z, w)，None 表示需要重新计算
+        self.segments = []
+
+    def set_elements(self, elements):
+        """更新光路，只从第一个发生变化的元件开始重新传播；返回该元件序号"""
+        start = 0
+        while (start < len(elements) and start < len(self.elements)
+               and elements[start] == self.elements[start]):
+            start += 1
+        if start == len(elements) == len(self.elements):
+            return start
+        self.elements = list(elements)
+        self.propagate_from(start)
+        return start
+
+    def set_element(self, index, element):
+        """修改单个元件"""
+        elements = list(self.elements)
+        elements[index] = element
+        return self.set_elements(elements)
+
+    def propagate_from(self, start):
+        """从第 start 个元件开始重新计算各元件入口处的 q，并标记需要重新采样的段"""
+        del self.q[start + 1:]
+        del self.z[start + 1:]
+        del self.segments[start:]
+        for element in self.elements[start:]:
+            self.q.append(transform_q(self.q[-1], element_matrix(element)))
+            self.z.append(self.z[-1] + (element[1] if element[0] == 'space' else 0.0))
+            self.segments.append(None)
+
+    def pending_segments(self):
+        """需要重新采样的自由空间段：[(序号, 入口q, 段内距离数组, 入口z)]"""
+        pending = []
+        for i, element in enumerate(self.elements):
+            if self.segments[i] is not None:
+                continue
+            if element[0] != 'space':
+                self.segments[i] = (np.empty(0), np.empty(0))
+                continue
+            count = max(int(element[1] * self.points_per_mm), 1) + 1
+            pending.append((i, self.q[i], np.linspace(0, element[1], count), self.z[i]))
+        return pending
+
+    def caustic(self):
+        """返回整条光路的 (z, w)，调用前需先执行 update_caustics"""
+        if not self.segments:
+            return np.array([0.0]), beam_radius_from_q(np.array([self.q0]), self.wavelength)
+        z = np.concatenate([segment[0] for segment in self.segments])
+        w = np.concatenate([segment[1] for segment in self.segments])
+        return z, w
+
+    def output_radius(self):
+        """光路末端的光斑半径 (mm)"""
+        return float(beam_radius_from_q(self.q[-1], self.wavelength))
+
+
+def update_caustics(paths):
+    """将多条光路中所有待更新的段合并为一次向量化计算"""
+    jobs = []
+    for path in paths:
+        for index, q, distance, z_start in path.pending_segments():
+            jobs.append((path, index, q, distance, z_start))
+    if not jobs:
+        return 0
+
+    sizes = [len(job[3]) for job in jobs]
+    q = np.concatenate([job[2] + job[3] for job in jobs])
+    z = np.concatenate([job[4] + job[3] for job in jobs])
+    wavelength = np.repeat([job[0].wavelength for job in jobs], sizes)
+    w = beam_radius_from_q(q, wavelength)
+
+    bounds = np.cumsum(sizes)[:-1]
+    for (path, index, _, _, _), z_segment, w_segment in zip(jobs, np.split(z, bounds), np.split(w, bounds)):
+        path.segments[index] = (z_segment, w_segment)
+    return len(jobs)
@@ -0,0 +1,155 @@
+"""
+仪器函数去卷积
+
+仪器函数取为高斯型，其宽度由两部分组成：
+1. 光谱仪：狭缝处光斑 (聚焦计算选项卡的 slit_spot_size) 经线色散换算成的谱宽；
+2. 可见光激光带宽（SFG 谱宽直接继承可见光带宽）。
+两者按高斯卷积合成 FWHM = sqrt(FWHM_slit² + FWHM_laser²)。
+
+去卷积在均匀波数轴上用 FFT 进行，多条光谱按最后一维批量处理；
+核的傅里叶变换按 (点数, 步长, FWHM) 缓存，同一坐标轴上的后续光谱不再重复计算。
+"""
+from functools import lru_cache
+import numpy as np
+
+METHODS = ('wiener', 'richardson-lucy')
+
+
+def slit_fwhm(slit_spot_size, dispersion, sfg_wavelength):
+    """
+    狭缝处光斑对应的谱宽 FWHM (cm-1)
+    slit_spot_size: 狭缝处光斑 1/e² 直径 (μm)
+    dispersion: 光谱仪倒线色散 (nm/mm)
+    sfg_wavelength: SFG 波长 (nm)
+    """
+    # 高斯光斑 1/e² 直径换算为 FWHM
+    fwhm_um = slit_spot_size * np.sqrt(2 * np.log(2)) / 2
+    fwhm_nm = fwhm_um * 1e-3 * dispersion
+    return 1e7 * fwhm_nm / sfg_wavelength**2
+
+
+def instrument_fwhm(slit_spot_size, dispersion, sfg_wavelength, laser_bandwidth):
+    """合成仪器函数 FWHM (cm-1)，laser_bandwidth 为可见光带宽 FWHM (cm-1)"""
+    return np.hypot(slit_fwhm(slit_spot_size, dispersion, sfg_wavelength), laser_bandwidth)
+
+
+def uniform_spacing(wavenumber, tolerance=1e-3):
+    """返回均匀坐标轴的步长，不均匀时返回 None"""
+    step = np.diff(wavenumber)
+    if len(step) == 0 or np.any(step == 0):
+        raise ValueError("坐标轴至少需要两个不同的点")
+    if np.ptp(step) <= tolerance * np.abs(step.mean()):
+        return float(abs(step.mean()))
+    return None
+
+
+@lru_cache(maxsize=32)
+def kernel_transform(size, spacing, fwhm):
+    """
+    以 0 为中心、周期为 size 的高斯核的 rfft，归一化使直流分量为 1
+    size 为补边后的长度，结果只读并被缓存
+    """
+    sigma = fwhm / (2 * np.sqrt(2 * np.log(2))) / spacing
+    offset = np.fft.fftfreq(size, 1 / size)
+    kernel = np.exp(-offset**2 / (2 * sigma**2))
+    transform = np.fft.rfft(kernel / kernel.sum())
+    transform.setflags(write=False)
+    return transform
+
+
+def _fast_length(n):
+    """不小于 n 的 2^a·3^b·5^c，这类长度的 FFT 最快"""
+    best = 2 * n
+    power5 = 1
+    while power5 < best:
+        power35 = power5
+        while power35 < best:
+            length = power35
+            while length < n:
+                length *= 2
+            best = min(best, length)
+            power35 *= 3
+        power5 *= 5
+    return best
+
+
+def _pad(spectra, fwhm, spacing):
+    """
+    两端镜像补边，减小 FFT 周期边界造成的振铃；总长度补到 FFT 快速长度
+    返回 (补边后的光谱, 左侧补边点数)
+    """
+    size = spectra.shape[-1]
+    pad = min(size - 1, int(np.ceil(3 * fwhm / spacing)))
+    padded = np.pad(spectra, [(0, 0)] * (spectra.ndim - 1) + [(pad, pad)], mode='reflect')
+    extra = _fast_length(padded.shape[-1]) - padded.shape[-1]
+    padded = np.pad(padded, [(0, 0)] * (spectra.ndim - 1) + [(0, extra)], mode='edge')
+    return padded, pad
+
+
+def wiener(spectra, spacing, fwhm, snr=100.0):
+    """
+    Wiener 去卷积
+    spectra: 均匀波数轴上的光谱，最后一维为波数，可以是多条光谱
+    snr: 信噪比 (振幅)，越大恢复越强，噪声也越大
+    """
+    spectra = np.asarray(spectra, dtype=float)
+    size = spectra.shape[-1]
+    padded, pad = _pad(spectra, fwhm, spacing)
+    transform = kernel_transform(padded.shape[-1], spacing, fwhm)
+    gain = np.conj(transform) / (np.abs(transform)**2 + 1 / snr**2)
+    result = np.fft.irfft(np.fft.rfft(padded, axis=-1) * gain, n=padded.shape[-1], axis=-1)
+    return result[..., pad:pad + size]
+
+
+def richardson_lucy(spectra, spacing, fwhm, iterations=30):
+    """
+    Richardson–Lucy 迭代去卷积，适用于非负光谱（负值按 0 处理）
+    spectra 的最后一维为波数，所有光谱同时迭代
+    """
+    spectra = np.clip(np.asarray(spectra, dtype=float), 0, None)
+    size = spectra.shape[-1]
+    padded, pad = _pad(spectra, fwhm, spacing)
+    n = padded.shape[-1]
+    transform = kernel_transform(n, spacing, fwhm)
+    # 高斯核对称，相关运算与卷积相同
+    estimate = np.ones_like(padded) * padded.mean(axis=-1, keepdims=True)
+    for _ in range(iterations):
+        blurred = np.fft.irfft(np.fft.rfft(estimate, axis=-1) * transform, n=n, axis=-1)
+        ratio = padded / np.maximum(blurred, 1e-12 * padded.max(initial=1.0))
+        estimate *= np.fft.irfft(np.fft.rfft(ratio, axis=-1) * transform, n=n, axis=-1)
+    return estimate[..., pad:pad + size]
+
+
+def deconvolve(wavenumber, spectra, fwhm, method='wiener', snr=100.0, iterations=30):
+    """
+    对一组共用波数轴的光谱去卷积
+    wavenumber: 一维波数轴 (cm-1)，不均匀时先插值到均匀轴，结果再插值回原坐标
+    spectra: 形状 (..., len(wavenumber))
+    """
+    wavenumber = np.asarray(wavenumber, dtype=float)
+    spectra = np.asarray(spectra, dtype=float)
+    if fwhm <= 0:
+        return spectra.copy()
+
+    spacing = uniform_spacing(wavenumber)
+    resample = spacing is None
+    if resample:
+        order = np.argsort(wavenumber)
+        axis = np.linspace(wavenumber[order[0]], wavenumber[order[-1]], len(wavenumber))
+        spacing = axis[1] - axis[0]
+        flat = spectra.reshape(-1, len(wavenumber))[:, order]
+        work = np.array([np.interp(axis, wavenumber[order], row) for row in flat]).reshape(spectra.shape)
+    else:
+        work = spectra
+
+    if method == 'wiener':
+        result = wiener(work, spacing, fwhm, snr)
+    elif method == 'richardson-lucy':
+        result = richardson_lucy(work, spacing, fwhm, iterations)
+    else:
+        raise ValueError(f"未知的去卷积方法: {method}")
+
+    if resample:
+        flat = result.reshape(-1, len(wavenumber))
+        result = np.array([np.interp(wavenumber, axis, row) for row in flat]).reshape(spectra.shape)
+    return result
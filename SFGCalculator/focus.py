@@ -0,0 +1,44 @@
+"""
+聚焦计算（向量化版本）
+
+与聚焦计算选项卡使用相同的公式，所有参数按 NumPy 规则广播。
+"""
+import numpy as np
+
+
+def focus_parameters(vis_wavelength, ir_wavelength, sfg_wavelength, vis_beam_diameter, ir_beam_diameter,
+                     vis_focal, ir_focal, sfg_focal, spectrometer_focal, vis_defocus, ir_defocus):
+    """
+    计算焦点直径、焦点深度、离焦光斑直径和狭缝处光斑大小
+    参数：
+    vis_wavelength, ir_wavelength, sfg_wavelength: 波长 (nm)
+    vis_beam_diameter, ir_beam_diameter: 入射光束直径 (mm)
+    vis_focal, ir_focal, sfg_focal, spectrometer_focal: 透镜焦距 (mm)
+    vis_defocus, ir_defocus: 样品到焦点的距离 (mm)
+    """
+    # 焦点直径 (μm)
+    vis_focus_diameter = (4 * vis_focal * vis_wavelength * 1e-3) / (np.pi * vis_beam_diameter)
+    ir_focus_diameter = (4 * ir_focal * ir_wavelength * 1e-3) / (np.pi * ir_beam_diameter)
+
+    # 焦点深度 (mm)
+    vis_focus_depth = (2 * np.pi * (vis_focus_diameter * 1e-3 / 2)**2) / (vis_wavelength * 1e-6)
+    ir_focus_depth = (2 * np.pi * (ir_focus_diameter * 1e-3 / 2)**2) / (ir_wavelength * 1e-6)
+
+    # 样品处光斑直径 (μm)
+    vis_spot_diameter = vis_focus_diameter * np.sqrt(1 + (vis_defocus / (vis_focus_depth / 2))**2)
+    ir_spot_diameter = ir_focus_diameter * np.sqrt(1 + (ir_defocus / (ir_focus_depth / 2))**2)
+
+    # SFG光斑直径 (mm) 和狭缝焦点大小 (μm)
+    sfg_spot_diameter = vis_beam_diameter * (sfg_focal / vis_focal)
+    slit_spot_size = (4 * spectrometer_focal * sfg_wavelength) / (np.pi * sfg_spot_diameter) * 1e-3
+
+    return {
+        'vis_focus_diameter': vis_focus_diameter,
+        'ir_focus_diameter': ir_focus_diameter,
+        'vis_focus_depth': vis_focus_depth,
+        'ir_focus_depth': ir_focus_depth,
+        'vis_spot_diameter': vis_spot_diameter,
+        'ir_spot_diameter': ir_spot_diameter,
+        'sfg_spot_diameter': sfg_spot_diameter,
+        'slit_spot_size': slit_spot_size,
+    }
@@ -0,0 +1,272 @@
+"""
+界面光学计算（向量化版本）
+
+所有函数都支持 NumPy 广播，可以一次计算整条红外光谱（数千个波数点）。
+折射率可以是复数 n + ik，用来描述水、重水、金属等红外吸收介质，此时折射角为复数。
+角度的输入输出均为角度制，波长单位为 nm，波数单位为 cm-1。
+"""
+import numpy as np
+
+DEG = np.pi / 180
+
+# 组合因子名称，与Fresnel选项卡中的输出框一一对应
+COMBINATION_NAMES = [
+    'ssp_yyz', 'sps_yzy', 'pss_zyy',
+    'ppp_zxx', 'ppp_xxz', 'ppp_xzx', 'ppp_zzz',
+    'psp_zyx', 'psp_xyz', 'spp_yzx', 'spp_yxz', 'pps_zxy', 'pps_xzy',
+]
+
+
+def quartz_refractive_index(wavelength):
+    """根据波长(nm)计算石英折射率（Sellmeier方程）"""
+    wavelength_um = np.asarray(wavelength, dtype=float) / 1000
+    n_squared = 1.28604141 + \
+                1.07044083 * wavelength_um**2 / (wavelength_um**2 - 0.0100585997) + \
+                1.10202242 * wavelength_um**2 / (wavelength_um**2 - 100)
+    return np.sqrt(n_squared)
+
+
+def sfg_wavelength(vis_wavelength, ir_wavenumber):
+    """计算SFG波长 (nm)"""
+    ir_wavelength = 1e7 / np.asarray(ir_wavenumber, dtype=float)
+    return 1 / (1 / np.asarray(vis_wavelength, dtype=float) + 1 / ir_wavelength)
+
+
+def sfg_angle(vis_angle, ir_angle, vis_wavelength, ir_wavenumber):
+    """根据相位匹配条件计算SFG反射角度 (°)"""
+    ir_wavelength = 1e7 / np.asarray(ir_wavenumber, dtype=float)
+    wavelength = sfg_wavelength(vis_wavelength, ir_wavenumber)
+    sin_sfg = wavelength * (np.sin(np.radians(vis_angle)) / vis_wavelength +
+                            np.sin(np.radians(ir_angle)) / ir_wavelength)
+    return np.degrees(np.arcsin(sin_sfg))
+
+
+def refraction_cos(incident_angle, n1, n2):
+    """
+    计算折射角余弦 cosθ2
+    n2 为复数时取 Im(n2·cosθ2) ≥ 0 的分支，即在介质中衰减的透射波
+    """
+    sin1 = n1 * np.sin(np.radians(incident_angle))
+    return np.emath.sqrt(n2**2 - sin1**2) / n2
+
+
+def refraction_angle(incident_angle, n1, n2):
+    """计算折射角度 (°)，吸收介质返回复折射角"""
+    return np.emath.arccos(refraction_cos(incident_angle, n1, n2)) / DEG
+
+
+def fresnel_factor(n1, n2, theta1, theta2, polarization):
+    """
+    计算单个方向的菲涅耳因子
+    参数：
+    n1, n2: 入射介质和第二介质的折射率（可为复数）
+    theta1, theta2: 入射角和折射角 (°)，theta2 可为复数
+    polarization: 'xx', 'yy' 或 'zz'
+    """
+    cos_theta1 = np.cos(np.radians(theta1))
+    cos_theta2 = np.cos(np.asarray(theta2) * DEG)
+
+    # 计算n_prime（界面层折射率）
+    n_prime = np.emath.sqrt((n2**2 * (n2**2 + 5)) / (4 * n2**2 + 2))
+
+    if polarization == 'xx':
+        # Lxx = (2 * n1 * cosθ2) / (n1 * cosθ2 + n2 * cosθ1)
+        return 2 * n1 * cos_theta2 / (n1 * cos_theta2 + n2 * cos_theta1)
+    elif polarization == 'yy':
+        # Lyy = (2 * n1 * cosθ1) / (n1 * cosθ1 + n2 * cosθ2)
+        return 2 * n1 * cos_theta1 / (n1 * cos_theta1 + n2 * cos_theta2)
+    elif polarization == 'zz':
+        # Lzz = (2 * n2 * cosθ1) / (n1 * cosθ2 + n2 * cosθ1) * (n1/n')^2
+        return 2 * n2 * cos_theta1 / (n1 * cos_theta2 + n2 * cos_theta1) * (n1 / n_prime)**2
+    else:
+        return np.zeros(np.broadcast(cos_theta1, cos_theta2).shape)
+
+
+def local_field_factors(n1, n2, theta1, refraction_index=None):
+    """计算 (Lxx, Lyy, Lzz)，折射角由 refraction_index 求得，默认为 n2"""
+    theta2 = refraction_angle(theta1, n1, n2 if refraction_index is None else refraction_index)
+    return (fresnel_factor(n1, n2, theta1, theta2, 'xx'),
+            fresnel_factor(n1, n2, theta1, theta2, 'yy'),
+            fresnel_factor(n1, n2, theta1, theta2, 'zz'))
+
+
+def combination_factors(sfg_angle, vis_angle, ir_angle, l_sfg, l_vis, l_ir):
+    """
+    由三束光的 (Lxx, Lyy, Lzz) 计算各偏振组合的有效菲涅耳组合因子
+    返回以 COMBINATION_NAMES 为键的字典
+    """
+    sin_sfg, cos_sfg = np.sin(np.radians(sfg_angle)), np.cos(np.radians(sfg_angle))
+    sin_vis, cos_vis = np.sin(np.radians(vis_angle)), np.cos(np.radians(vis_angle))
+    sin_ir, cos_ir = np.sin(np.radians(ir_angle)), np.cos(np.radians(ir_angle))
+    sfg_lxx, sfg_lyy, sfg_lzz = l_sfg
+    vis_lxx, vis_lyy, vis_lzz = l_vis
+    ir_lxx, ir_lyy, ir_lzz = l_ir
+
+    return {
+        # 非手性项
+        'ssp_yyz': sfg_lyy * vis_lyy * ir_lzz * sin_ir,
+        'sps_yzy': sfg_lyy * vis_lzz * ir_lyy * sin_vis,
+        'pss_zyy': sfg_lzz * vis_lyy * ir_lyy * sin_sfg,
+        'ppp_zxx': sfg_lzz * vis_lxx * ir_lxx * sin_sfg * cos_vis * cos_ir,
+        'ppp_xxz': sfg_lxx * vis_lxx * ir_lzz * cos_sfg * cos_vis * sin_ir,
+        'ppp_xzx': sfg_lxx * vis_lzz * ir_lxx * cos_sfg * sin_vis * cos_ir,
+        'ppp_zzz': sfg_lzz * vis_lzz * ir_lzz * sin_sfg * sin_vis * sin_ir,
+        # 手性项
+        'psp_zyx': sfg_lzz * vis_lyy * ir_lxx * sin_sfg * cos_ir,
+        'psp_xyz': sfg_lxx * vis_lyy * ir_lzz * cos_sfg * sin_ir,
+        'spp_yzx': sfg_lyy * vis_lzz * ir_lxx * sin_vis * cos_ir,
+        'spp_yxz': sfg_lyy * vis_lxx * ir_lzz * cos_vis * sin_ir,
+        'pps_zxy': sfg_lzz * vis_lxx * ir_lyy * sin_sfg * cos_vis,
+        'pps_xzy': sfg_lxx * vis_lzz * ir_lyy * cos_sfg * sin_vis,
+    }
+
+
+def interface_factors(n_sfg, n_vis, n_ir, vis_angle, ir_angle, vis_wavelength, ir_wavenumber, n1=1.0,
+                      quartz_refraction=False):
+    """
+    计算空气/介质界面的相干长度、各光束菲涅耳因子和组合因子
+    参数：
+    n_sfg, n_vis, n_ir: 介质在三个波长处的折射率（可为复数数组）
+    vis_angle, ir_angle: 入射角 (°)
+    vis_wavelength: 可见光波长 (nm)
+    ir_wavenumber: 红外波数 (cm-1)，可以是整条光谱
+    n1: 入射介质折射率
+    quartz_refraction: 为 True 时折射角按石英 Sellmeier 折射率计算（旧版 Fresnel 选项卡的做法），
+        菲涅耳因子和相干长度仍使用输入的折射率
+    所有参数按 NumPy 规则广播，返回字典
+    """
+    ir_wavelength = 1e7 / np.asarray(ir_wavenumber, dtype=float)
+    wavelength = sfg_wavelength(vis_wavelength, ir_wavenumber)
+    angle = sfg_angle(vis_angle, ir_angle, vis_wavelength, ir_wavenumber)
+    if quartz_refraction:
+        refraction = (quartz_refractive_index(wavelength), quartz_refractive_index(vis_wavelength),
+                      quartz_refractive_index(ir_wavelength))
+    else:
+        refraction = (None, None, None)
+
+    # 相干长度 (nm)，吸收介质只取波矢实部
+    sfg_term = np.emath.sqrt(n_sfg**2 - (n1 * np.sin(np.radians(angle)))**2) / wavelength
+    vis_term = np.emath.sqrt(n_vis**2 - (n1 * np.sin(np.radians(vis_angle)))**2) / vis_wavelength
+    ir_term = np.emath.sqrt(n_ir**2 - (n1 * np.sin(np.radians(ir_angle)))**2) / ir_wavelength
+    coherence_length = 1 / (2 * np.pi * np.real(sfg_term + vis_term + ir_term))
+
+    l_sfg = local_field_factors(n1, n_sfg, angle, refraction[0])
+    l_vis = local_field_factors(n1, n_vis, vis_angle, refraction[1])
+    l_ir = local_field_factors(n1, n_ir, ir_angle, refraction[2])
+
+    result = {
+        'sfg_wavelength': wavelength,
+        'sfg_angle': angle,
+        'coherence_length': coherence_length,
+        'sfg_lxx': l_sfg[0], 'sfg_lyy': l_sfg[1], 'sfg_lzz': l_sfg[2],
+        'vis_lxx': l_vis[0], 'vis_lyy': l_vis[1], 'vis_lzz': l_vis[2],
+        'ir_lxx': l_ir[0], 'ir_lyy': l_ir[1], 'ir_lzz': l_ir[2],
+    }
+    result.update(combination_factors(angle, vis_angle, ir_angle, l_sfg, l_vis, l_ir))
+    return result
+
+
+def quartz_chi2(vis_angle, ir_angle, vis_wavelength, ir_wavenumber, n1=1.0):
+    """
+    计算z-cut石英的折射率、折射角、相干长度、菲涅耳因子和有效二阶极化率
+    与石英选项卡使用相同的公式，所有参数按 NumPy 规则广播，返回字典
+    """
+    ir_wavelength = 1e7 / np.asarray(ir_wavenumber, dtype=float)
+    wavelength = sfg_wavelength(vis_wavelength, ir_wavenumber)
+    angle = sfg_angle(vis_angle, ir_angle, vis_wavelength, ir_wavenumber)
+
+    # 各波长对应的石英折射率和折射角度
+    n_vis = quartz_refractive_index(vis_wavelength)
+    n_ir = quartz_refractive_index(ir_wavelength)
+    n_sfg = quartz_refractive_index(wavelength)
+    vis_ref_angle = refraction_angle(vis_angle, n1, n_vis)
+    ir_ref_angle = refraction_angle(ir_angle, n1, n_ir)
+    sfg_ref_angle = refraction_angle(angle, n1, n_sfg)
+
+    # 相干长度 (nm)
+    sfg_term = np.sqrt(n_sfg**2 - np.sin(np.radians(angle))**2) / wavelength
+    vis_term = np.sqrt(n_vis**2 - np.sin(np.radians(vis_angle))**2) / vis_wavelength
+    ir_term = np.sqrt(n_ir**2 - np.sin(np.radians(ir_angle))**2) / ir_wavelength
+    coherence_length = 1 / (2 * np.pi * (sfg_term + vis_term + ir_term))
+
+    lxx_sfg = fresnel_factor(n1, n_sfg, angle, sfg_ref_angle, 'xx')
+    lyy_sfg = fresnel_factor(n1, n_sfg, angle, sfg_ref_angle, 'yy')
+    lxx_vis = fresnel_factor(n1, n_vis, vis_angle, vis_ref_angle, 'xx')
+    lyy_vis = fresnel_factor(n1, n_vis, vis_angle, vis_ref_angle, 'yy')
+    lxx_ir = fresnel_factor(n1, n_ir, ir_angle, ir_ref_angle, 'xx')
+    lyy_ir = fresnel_factor(n1, n_ir, ir_angle, ir_ref_angle, 'yy')
+
+    cos_sfg = np.cos(np.radians(angle))
+    cos_vis = np.cos(np.radians(vis_angle))
+    cos_ir = np.cos(np.radians(ir_angle))
+
+    return {
+        'sfg_wavelength': wavelength,
+        'ir_wavelength': ir_wavelength,
+        'sfg_angle': angle,
+        'n_vis': n_vis, 'n_ir': n_ir, 'n_sfg': n_sfg,
+        'vis_ref_angle': vis_ref_angle, 'ir_ref_angle': ir_ref_angle, 'sfg_ref_angle': sfg_ref_angle,
+        'coherence_length': coherence_length,
+        'lxx_sfg': lxx_sfg, 'lyy_sfg': lyy_sfg,
+        'lxx_vis': lxx_vis, 'lyy_vis': lyy_vis,
+        'lxx_ir': lxx_ir, 'lyy_ir': lyy_ir,
+        'chi2_ssp': cos_ir * lyy_sfg * lyy_vis * lxx_ir * coherence_length * 1e-9 * 1.6e-12,
+        'chi2_ppp': cos_sfg * cos_vis * cos_ir * lxx_sfg * lxx_vis * lxx_ir * coherence_length * 1.6e-21,
+        'chi2_sps': cos_vis * lyy_sfg * lxx_vis * lyy_ir * coherence_length * 1.6e-21,
+        'chi2_pss': cos_ir * lxx_sfg * lyy_vis * lyy_ir * coherence_length * 1.6e-21,
+    }
+
+
+def require_real(result):
+    """
+    透明介质（如石英）的结果应为有限实数。全反射或 Sellmeier 公式不适用（约 1000–1300 cm-1）时
+    折射角等为复数或 nan，此时抛出 ValueError；否则返回各项取实部后的字典
+    """
+    for name, value in result.items():
+        value = np.asarray(value)
+        if not np.all(np.isfinite(value)) or (np.iscomplexobj(value) and np.any(value.imag != 0)):
+            raise ValueError(f"{name} 无实数解（全反射或折射率公式不适用）")
+    return {name: np.real(value) for name, value in result.items()}
+
+
+def parse_refractive_index(text):
+    """解析折射率输入，支持 '1.33'、'1.33+0.1j'、'1.33+0.1i' 等写法"""
+    value = complex(text.strip().replace(' ', '').replace('i', 'j'))
+    if value.imag == 0:
+        return value.real
+    return value
+
+
+def load_columns(file_path):
+    """读取逗号或空白分隔的数值表格，自动跳过表头，返回二维数组"""
+    with open(file_path, 'r') as f:
+        first_line = f.readline()
+    delimiter = ',' if ',' in first_line else None
+    first_field = first_line.split(delimiter)[0] if first_line.strip() else ''
+    has_header = not all(c.isdigit() or c in '.-+eE \t\n' for c in first_field)
+    data = np.loadtxt(file_path, delimiter=delimiter, skiprows=1 if has_header else 0, ndmin=2)
+    return data
+
+
+def load_refractive_index(file_path):
+    """
+    读取红外光学常数文件
+    文件格式：波数(cm-1), n, k 三列（k 可省略）
+    返回 (wavenumber, 复折射率)，按波数升序排列
+    """
+    data = load_columns(file_path)
+    order = np.argsort(data[:, 0])
+    data = data[order]
+    k = data[:, 2] if data.shape[1] > 2 else 0.0
+    return data[:, 0], data[:, 1] + 1j * k
+
+
+def interpolate_refractive_index(wavenumber, table_wavenumber, table_index):
+    """将光学常数表插值到给定波数"""
+    return (np.interp(wavenumber, table_wavenumber, np.real(table_index)) +
+            1j * np.interp(wavenumber, table_wavenumber, np.imag(table_index)))
+
+
+def fresnel_correct(intensity, factor):
+    """用组合因子校正SFG强度：I / |F|^2，可同时处理多条光谱（最后一维为波数）"""
+    return np.asarray(intensity) / np.abs(factor)**2
@@ -0,0 +1,135 @@
+"""
+入射角（及可见光波长）优化
+
+先在整个角度范围内做一次向量化粗网格计算，再围绕最优点逐级缩小网格做局部细化，
+全部计算都是 NumPy 批量运算，一次优化通常在一秒以内完成。
+"""
+import numpy as np
+from fresnel import COMBINATION_NAMES, interface_factors, quartz_chi2
+
+QUARTZ_TARGETS = ['chi2_ssp', 'chi2_ppp', 'chi2_sps', 'chi2_pss']
+TARGETS = COMBINATION_NAMES + QUARTZ_TARGETS
+
+
+def target_function(target, n_sfg, n_vis, n_ir, ir_wavenumber):
+    """
+    根据目标表达式构造目标函数 f(vis_angle, ir_angle, vis_wavelength)
+    参数：
+    target: 组合因子（如 'ppp_zzz'）或石英二阶极化率（如 'chi2_ssp'）名称，取模平方；
+            也可以写成 'ppp_zzz/ssp_yyz' 形式的比值
+    n_sfg, n_vis, n_ir: 计算组合因子时使用的介质折射率
+    ir_wavenumber: 红外波数 (cm-1)
+    """
+    names = [name.strip() for name in target.split('/')]
+    if len(names) > 2 or any(name not in TARGETS for name in names):
+        raise ValueError(f"未知的优化目标: {target}")
+
+    def evaluate(vis_angle, ir_angle, vis_wavelength):
+        values = {}
+        if any(name in COMBINATION_NAMES for name in names):
+            values.update(interface_factors(n_sfg, n_vis, n_ir, vis_angle, ir_angle,
+                                            vis_wavelength, ir_wavenumber))
+        if any(name in QUARTZ_TARGETS for name in names):
+            values.update(quartz_chi2(vis_angle, ir_angle, vis_wavelength, ir_wavenumber))
+        result = np.abs(values[names[0]])**2
+        if len(names) == 2:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result = result / np.abs(values[names[1]])**2
+        return result
+
+    return evaluate
+
+
+def _evaluate(objective, vis_angle, ir_angle, vis_wavelength):
+    """计算目标函数，无解（nan）的位置记为 -inf"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        value = np.real(objective(vis_angle, ir_angle, vis_wavelength))
+    value = np.broadcast_to(value, np.broadcast(vis_angle, ir_angle, vis_wavelength).shape)
+    return np.where(np.isfinite(value), value, -np.inf)
+
+
+def optimize_angles(objective, vis_wavelength, vis_bounds=(0, 89), ir_bounds=(0, 89),
+                    wavelength_bounds=None, grid_size=91, wavelength_grid_size=41,
+                    refine_size=11, refine_steps=6):
+    """
+    最大化目标函数
+    参数：
+    objective: f(vis_angle, ir_angle, vis_wavelength)，支持广播
+    vis_wavelength: 可见光波长 (nm)，wavelength_bounds 为 None 时固定不变
+    vis_bounds, ir_bounds: 入射角范围 (°)
+    wavelength_bounds: 可见光波长范围 (nm)，给定时同时优化波长
+    grid_size, wavelength_grid_size: 粗网格每个维度的点数
+    refine_size, refine_steps: 局部细化网格的点数和次数
+    返回字典，包括最优点、目标值、粗网格结果和灵敏度
+    """
+    lower = np.array([vis_bounds[0], ir_bounds[0],
+                      wavelength_bounds[0] if wavelength_bounds else vis_wavelength], dtype=float)
+    upper = np.array([vis_bounds[1], ir_bounds[1],
+                      wavelength_bounds[1] if wavelength_bounds else vis_wavelength], dtype=float)
+    sizes = [grid_size, grid_size, wavelength_grid_size if wavelength_bounds else 1]
+
+    # 粗网格
+    axes = [np.linspace(lower[i], upper[i], sizes[i]) for i in range(3)]
+    grid = np.meshgrid(*axes, indexing='ij', sparse=True)
+    values = _evaluate(objective, *grid)
+    index = np.unravel_index(np.argmax(values), values.shape)
+    best = np.array([axes[i][index[i]] for i in range(3)])
+    best_value = values[index]
+    if not np.isfinite(best_value):
+        raise ValueError("在给定范围内没有可行解")
+    coarse = {'vis_angle': axes[0], 'ir_angle': axes[1], 'values': values[:, :, index[2]]}
+
+    # 局部细化：在当前最优点附近 ±一个网格间距内重新取网格，逐级缩小
+    half_width = np.array([(upper[i] - lower[i]) / max(sizes[i] - 1, 1) for i in range(3)])
+    for _ in range(refine_steps):
+        axes = [np.linspace(max(best[i] - half_width[i], lower[i]),
+                            min(best[i] + half_width[i], upper[i]),
+                            refine_size if half_width[i] > 0 else 1) for i in range(3)]
+        grid = np.meshgrid(*axes, indexing='ij', sparse=True)
+        values = _evaluate(objective, *grid)
+        index = np.unravel_index(np.argmax(values), values.shape)
+        if values[index] >= best_value:
+            best = np.array([axes[i][index[i]] for i in range(3)])
+            best_value = values[index]
+        half_width = 2 * half_width / (refine_size - 1)
+
+    return {
+        'vis_angle': best[0],
+        'ir_angle': best[1],
+        'vis_wavelength': best[2],
+        'value': best_value,
+        'sensitivity': sensitivity(objective, best, best_value, optimize_wavelength=bool(wavelength_bounds),
+                                   lower=lower, upper=upper),
+        'coarse': coarse,
+    }
+
+
+def sensitivity(objective, point, value, angle_step=1.0, wavelength_step=1.0, optimize_wavelength=False,
+                lower=None, upper=None):
+    """
+    计算最优点附近的灵敏度：各变量偏离 -step / +step 时目标值的相对变化
+    lower, upper: 各变量 (可见光角度, 红外角度, 可见光波长) 的搜索范围，偏移点截断到范围内，
+    因此实际偏移可能小于 step；最优点在边界上时该侧没有偏移点，相对变化为 nan、偏移为 0
+    返回 {'vis_angle': ((负向相对变化, 实际偏移), (正向相对变化, 实际偏移)), 'ir_angle': ..., 'vis_wavelength': ...}
+    """
+    names = ['vis_angle', 'ir_angle', 'vis_wavelength']
+    steps = [angle_step, angle_step, wavelength_step]
+    count = 3 if optimize_wavelength else 2
+
+    # 所有偏移点一次计算
+    offsets = np.zeros((2 * count, 3))
+    for i in range(count):
+        offsets[2 * i, i] = -steps[i]
+        offsets[2 * i + 1, i] = steps[i]
+    points = point + offsets
+    if lower is not None:
+        points = np.maximum(points, lower)
+    if upper is not None:
+        points = np.minimum(points, upper)
+    values = _evaluate(objective, points[:, 0], points[:, 1], points[:, 2])
+    relative = values / value - 1
+    # 截断后与最优点重合的一侧不计
+    relative[np.all(points == point, axis=1)] = np.nan
+    shift = [points[j, j // 2] - point[j // 2] for j in range(2 * count)]
+    return {names[i]: ((relative[2 * i], shift[2 * i]), (relative[2 * i + 1], shift[2 * i + 1]))
+            for i in range(count)}
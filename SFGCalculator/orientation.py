@@ -0,0 +1,148 @@
+"""
+分子取向分析
+
+由分子超极化率和取向分布计算界面 χ(2) 张量元的系综平均，再与 Fresnel 组合因子
+(fresnel.interface_factors 的 ssp_yyz、ppp_zzz 等) 组合成有效 χ(2)。
+对一个实验构型，在 倾角 × 分布宽度 的网格上一次算出各偏振组合的比值，
+之后测得的比值通过查表反演为倾角。
+
+取向分布为以 θ0 为中心、宽度 σ 的高斯分布 f(θ) ∝ exp(-(θ-θ0)²/2σ²)·sinθ，方位角和自转角各向同性。
+张量元以 N·β_ccc = 1 归一化，只有比值有意义。
+"""
+import numpy as np
+
+# 振动模式：C3v/C∞v 对称伸缩 (参数 r = β_aac/β_ccc)，C3v 反对称伸缩
+MODES = ('ss', 'as')
+RATIOS = ('ppp/ssp', 'sps/ssp', 'ppp/sps', 'pss/ssp')
+
+DEFAULT_TILTS = (0.0, 90.0, 181)
+DEFAULT_WIDTHS = (0.0, 40.0, 41)
+
+
+def orientation_averages(tilts, widths, theta_points=721):
+    """
+    计算高斯取向分布下的 <cosθ> 和 <cos³θ>
+    tilts, widths: 分布中心和宽度 (°)，一维数组
+    返回两个形状为 (len(tilts), len(widths)) 的数组
+    """
+    tilts = np.asarray(tilts, dtype=float)
+    widths = np.asarray(widths, dtype=float)
+    theta = np.linspace(0, np.pi, theta_points)
+    cos_theta = np.cos(theta)
+    cos1 = np.empty((len(tilts), len(widths)))
+    cos3 = np.empty_like(cos1)
+    # 逐个宽度计算，每次是 (倾角 × θ) 的矩阵，控制内存
+    for j, width in enumerate(widths):
+        if width == 0:
+            # δ 分布
+            cos1[:, j] = np.cos(np.radians(tilts))
+            cos3[:, j] = cos1[:, j]**3
+            continue
+        weight = np.exp(-(theta[None, :] - np.radians(tilts)[:, None])**2 / (2 * np.radians(width)**2)) \
+            * np.sin(theta)[None, :]
+        norm = weight.sum(axis=1)
+        # 宽度远小于 θ 步长时权重可能全为 0，按 δ 分布处理
+        narrow = norm == 0
+        norm[narrow] = 1.0
+        cos1[:, j] = np.where(narrow, np.cos(np.radians(tilts)), weight @ cos_theta / norm)
+        cos3[:, j] = np.where(narrow, np.cos(np.radians(tilts))**3, weight @ cos_theta**3 / norm)
+    return cos1, cos3
+
+
+def molecular_chi2(cos1, cos3, mode='ss', r=1.66):
+    """
+    系综平均的非手性 χ(2) 张量元 (实验室坐标)，参数按 NumPy 规则广播
+    mode: 'ss' 为 C3v/C∞v 对称伸缩，r = β_aac/β_ccc；'as' 为 C3v 反对称伸缩 (以 β_caa 归一化，r 不使用)
+    返回 {'xxz', 'xzx', 'zxx', 'zzz'}，其中 yyz = xxz，yzy = xzx，zyy = zxx
+    """
+    if mode == 'ss':
+        xxz = 0.5 * ((1 + r) * cos1 - (1 - r) * cos3)
+        xzx = 0.5 * (1 - r) * (cos1 - cos3)
+        zzz = r * cos1 + (1 - r) * cos3
+    elif mode == 'as':
+        xxz = -(cos1 - cos3)
+        xzx = cos3
+        zzz = 2 * (cos1 - cos3)
+    else:
+        raise ValueError(f"未知的振动模式: {mode}")
+    return {'xxz': xxz, 'xzx': xzx, 'zxx': xzx, 'zzz': zzz}
+
+
+def effective_chi2(chi, factors):
+    """
+    由张量元和组合因子计算各偏振组合的有效 χ(2)
+    factors: 包含 COMBINATION_NAMES 中非手性项的字典 (如 interface_factors 的结果)
+    """
+    return {
+        'ssp': factors['ssp_yyz'] * chi['xxz'],
+        'sps': factors['sps_yzy'] * chi['xzx'],
+        'pss': factors['pss_zyy'] * chi['zxx'],
+        'ppp': (-factors['ppp_xxz'] * chi['xxz'] - factors['ppp_xzx'] * chi['xzx']
+                + factors['ppp_zxx'] * chi['zxx'] + factors['ppp_zzz'] * chi['zzz']),
+    }
+
+
+class OrientationTable:
+    """
+    一个实验构型下的取向分析表
+    参数：
+    factors: 组合因子字典 (标量)
+    mode, r: 振动模式和超极化率比，见 molecular_chi2
+    tilts, widths: (最小值, 最大值, 点数)，倾角和分布宽度网格 (°)
+    ratios[名称] 为 |χ_a|/|χ_b| 的二维数组，形状 (倾角, 宽度)
+    """
+
+    def __init__(self, factors, mode='ss', r=1.66, tilts=DEFAULT_TILTS, widths=DEFAULT_WIDTHS):
+        self.mode = mode
+        self.r = r
+        self.tilts = np.linspace(*tilts)
+        self.widths = np.linspace(*widths)
+        cos1, cos3 = orientation_averages(self.tilts, self.widths)
+        self.chi_eff = effective_chi2(molecular_chi2(cos1, cos3, mode, r), factors)
+        self.ratios = {}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for name in RATIOS:
+                numerator, denominator = name.split('/')
+                self.ratios[name] = np.abs(self.chi_eff[numerator]) / np.abs(self.chi_eff[denominator])
+
+    def ratio_curve(self, ratio='ppp/ssp', width=0.0):
+        """给定分布宽度下比值随倾角的变化，宽度在网格点之间线性插值"""
+        table = self.ratios[ratio]
+        if len(self.widths) == 1:
+            return table[:, 0]
+        step = self.widths[1] - self.widths[0]
+        position = np.clip((width - self.widths[0]) / step, 0, len(self.widths) - 1)
+        j = min(int(position), len(self.widths) - 2)
+        fraction = position - j
+        return table[:, j] * (1 - fraction) + table[:, j + 1] * fraction
+
+    def solve(self, measured, ratio='ppp/ssp', width=0.0):
+        """
+        将测得的振幅比 |χ_a|/|χ_b| 反演为倾角 (°)
+        测得的是强度比时先开平方。measured 可为数组；
+        返回 (最小倾角解, 解的个数)，无解时为 nan；比值随倾角不单调时可能有多个解
+        """
+        curve = self.ratio_curve(ratio, width)
+        measured = np.asarray(measured, dtype=float)
+
+        # 比值随倾角单调时直接插值
+        slope = np.diff(curve)
+        if np.all(np.isfinite(curve)) and (np.all(slope > 0) or np.all(slope < 0)):
+            order = slice(None) if slope[0] > 0 else slice(None, None, -1)
+            inside = (measured >= curve.min()) & (measured <= curve.max())
+            tilt = np.interp(measured, curve[order], self.tilts[order])
+            return np.where(inside, tilt, np.nan), inside.astype(int)
+
+        difference = curve - measured[..., None]
+        # 相邻网格点之间符号改变的位置即为解
+        crossing = np.signbit(difference[..., :-1]) != np.signbit(difference[..., 1:])
+        crossing &= np.isfinite(difference[..., :-1]) & np.isfinite(difference[..., 1:])
+        count = crossing.sum(axis=-1)
+        first = np.argmax(crossing, axis=-1)
+        d0 = np.take_along_axis(difference, first[..., None], axis=-1)[..., 0]
+        d1 = np.take_along_axis(difference, first[..., None] + 1, axis=-1)[..., 0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fraction = np.where(d0 == d1, 0.0, d0 / (d0 - d1))
+        step = self.tilts[1] - self.tilts[0]
+        tilt = self.tilts[first] + fraction * step
+        return np.where(count > 0, tilt, np.nan), count
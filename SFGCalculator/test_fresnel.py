@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from fresnel import quartz_chi2, require_real
+
+
+def quartz(ir_wavenumber, vis_angle=45.0, ir_angle=55.0):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return quartz_chi2(vis_angle, ir_angle, 532.1, ir_wavenumber)
+
+
+def test_quartz_result_is_real_in_transparent_region():
+    result = require_real(quartz(2900.0))
+    assert 0 < result['ir_ref_angle'] < 55
+    assert not np.iscomplexobj(result['chi2_ssp'])
+    assert np.isfinite(result['chi2_ppp'])
+
+
+def test_total_internal_reflection_raises():
+    # 1250 cm-1 处石英折射率约 0.63，小于 sin(55°)，红外光全反射
+    result = quartz(1250.0)
+    assert np.iscomplexobj(result['ir_ref_angle'])
+    with pytest.raises(ValueError):
+        require_real(result)
+
+
+def test_invalid_sellmeier_index_raises():
+    # 约 1000–1200 cm-1 处 Sellmeier 公式给出负的 n²
+    with pytest.raises(ValueError):
+        require_real(quartz(1100.0))
@@ -0,0 +1,18 @@
+import numpy as np
+from optimizer import sensitivity
+
+
+def test_sensitivity_reports_clipped_steps():
+    # 最优点 88.5° 距上限 89° 只有 0.5°，正向偏移被截断；红外角度就在上限上，正向没有偏移点
+    def objective(vis_angle, ir_angle, vis_wavelength):
+        return 1 - 0.01 * (vis_angle - 88.5)**2 - 0.01 * (ir_angle - 89.0)**2 + 0 * vis_wavelength
+
+    result = sensitivity(objective, np.array([88.5, 89.0, 532.1]), 1.0,
+                         lower=np.array([0.0, 0.0, 532.1]), upper=np.array([89.0, 89.0, 532.1]))
+    (minus, minus_step), (plus, plus_step) = result['vis_angle']
+    assert (minus_step, plus_step) == (-1.0, 0.5)
+    assert np.isclose(minus, -0.01) and np.isclose(plus, -0.0025)
+    (minus, minus_step), (plus, plus_step) = result['ir_angle']
+    assert minus_step == -1.0 and np.isclose(minus, -0.01)
+    assert plus_step == 0.0 and np.isnan(plus)
+    assert 'vis_wavelength' not in result
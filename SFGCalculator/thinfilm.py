@@ -0,0 +1,123 @@
+"""
+多层膜界面的局域场因子（传输矩阵法，向量化版本）
+
+样品结构：入射介质 / 膜层1 / 膜层2 / ... / 衬底，单分子层位于入射介质和第一层之间。
+每层用 2×2 特征矩阵描述，矩阵按波长、角度、膜厚批量构造后用 np.matmul 连乘，
+因此可以一次算出 膜厚 × 波数 的整张菲涅耳因子图。
+没有膜层时结果与 fresnel.py 中单界面公式完全一致。
+"""
+import numpy as np
+from fresnel import refraction_cos, sfg_wavelength, sfg_angle, combination_factors
+
+
+def _admittance(n, cos_theta, polarization):
+    """倾斜光学导纳：s 偏振 n·cosθ，p 偏振 n/cosθ"""
+    if polarization == 's':
+        return n * cos_theta
+    return n / cos_theta
+
+
+def _layer_matrix(delta, eta):
+    """单层特征矩阵，形状为 (..., 2, 2)；采用 n + ik 的符号约定"""
+    cos_d, sin_d = np.cos(delta), np.sin(delta)
+    shape = np.broadcast(delta, eta).shape
+    m = np.empty(shape + (2, 2), dtype=complex)
+    m[..., 0, 0] = cos_d
+    m[..., 0, 1] = -1j * sin_d / eta
+    m[..., 1, 0] = -1j * eta * sin_d
+    m[..., 1, 1] = cos_d
+    return m
+
+
+def stack_reflection(n0, layers, n_sub, wavelength, angle, polarization):
+    """
+    计算多层膜的总反射系数
+    参数：
+    n0: 入射介质折射率
+    layers: [(n, d), ...] 从上到下的膜层折射率和厚度 (nm)，均可为数组
+    n_sub: 衬底折射率
+    wavelength: 波长 (nm)
+    angle: 入射角 (°)
+    polarization: 's' 或 'p'
+    p 偏振的符号与 fresnel.py 一致，即单界面时 1 - r_p = Lxx
+    """
+    eta0 = _admittance(n0, np.cos(np.radians(angle)), polarization)
+    eta_sub = _admittance(n_sub, refraction_cos(angle, n0, n_sub), polarization)
+
+    matrix = None
+    for n, d in layers:
+        cos_theta = refraction_cos(angle, n0, n)
+        delta = 2 * np.pi * n * cos_theta * np.asarray(d, dtype=float) / wavelength
+        layer = _layer_matrix(delta, _admittance(n, cos_theta, polarization))
+        matrix = layer if matrix is None else matrix @ layer
+
+    if matrix is None:
+        y = eta_sub
+    else:
+        b = matrix[..., 0, 0] + matrix[..., 0, 1] * eta_sub
+        c = matrix[..., 1, 0] + matrix[..., 1, 1] * eta_sub
+        y = c / b
+
+    r = (eta0 - y) / (eta0 + y)
+    return r if polarization == 's' else -r
+
+
+def stack_local_field_factors(n0, layers, n_sub, wavelength, angle):
+    """
+    计算多层膜表面单分子层处的 (Lxx, Lyy, Lzz)
+    Lzz 中的界面层折射率 n' 由紧贴单分子层的介质（第一层或衬底）决定
+    """
+    r_s = stack_reflection(n0, layers, n_sub, wavelength, angle, 's')
+    r_p = stack_reflection(n0, layers, n_sub, wavelength, angle, 'p')
+    n2 = layers[0][0] if layers else n_sub
+    n_prime = np.emath.sqrt((n2**2 * (n2**2 + 5)) / (4 * n2**2 + 2))
+    return 1 - r_p, 1 + r_s, (1 + r_p) * (n0 / n_prime)**2
+
+
+def stack_interface_factors(layers, n_sub, vis_angle, ir_angle, vis_wavelength, ir_wavenumber, n1=1.0):
+    """
+    计算多层膜样品的菲涅耳因子和组合因子
+    参数：
+    layers: [(n_sfg, n_vis, n_ir, d), ...] 每层在三个波长处的折射率和厚度 (nm)
+    n_sub: (n_sfg, n_vis, n_ir) 衬底折射率
+    其余参数与 fresnel.interface_factors 相同，所有量按 NumPy 规则广播，
+    例如 d 取 (T, 1)、ir_wavenumber 取 (W,) 即得到 T × W 的因子图
+    """
+    ir_wavelength = 1e7 / np.asarray(ir_wavenumber, dtype=float)
+    wavelength = sfg_wavelength(vis_wavelength, ir_wavenumber)
+    angle = sfg_angle(vis_angle, ir_angle, vis_wavelength, ir_wavenumber)
+
+    def beam_layers(i):
+        return [(layer[i], layer[3]) for layer in layers]
+
+    l_sfg = stack_local_field_factors(n1, beam_layers(0), n_sub[0], wavelength, angle)
+    l_vis = stack_local_field_factors(n1, beam_layers(1), n_sub[1], vis_wavelength, vis_angle)
+    l_ir = stack_local_field_factors(n1, beam_layers(2), n_sub[2], ir_wavelength, ir_angle)
+
+    result = {
+        'sfg_wavelength': wavelength,
+        'sfg_angle': angle,
+        'sfg_lxx': l_sfg[0], 'sfg_lyy': l_sfg[1], 'sfg_lzz': l_sfg[2],
+        'vis_lxx': l_vis[0], 'vis_lyy': l_vis[1], 'vis_lzz': l_vis[2],
+        'ir_lxx': l_ir[0], 'ir_lyy': l_ir[1], 'ir_lzz': l_ir[2],
+    }
+    result.update(combination_factors(angle, vis_angle, ir_angle, l_sfg, l_vis, l_ir))
+    return result
+
+
+def parse_layers(text, parse_index):
+    """
+    解析膜层文本，每行一层："n_sfg, n_vis, n_ir, 厚度(nm)"
+    折射率用 parse_index 解析（支持复数），空行和 # 开头的行忽略
+    """
+    layers = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        fields = [field for field in line.replace(';', ',').split(',') if field.strip()]
+        if len(fields) != 4:
+            raise ValueError(f"膜层格式错误: {line}")
+        layers.append((parse_index(fields[0]), parse_index(fields[1]), parse_index(fields[2]),
+                       float(fields[3])))
+    return layers
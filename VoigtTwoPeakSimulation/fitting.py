@@ -0,0 +1,730 @@
+"""
+SFG 光谱多共振拟合
+
+模型与 Igor 中常用的形式相同：
+    I(x) = |A_NR·e^{iφ} + Σ_q χ_q(x)|²
+洛伦兹线型  χ_q = A_q / (x - ω_q + iΓ_q)，Γ_q 为半高半宽
+Voigt 线型  χ_q 为上式对 ω_q 做高斯平均，高斯全宽 G_q：
+    χ_q = A_q·(-i√π/s)·w(z)，z = (x - ω_q + iΓ_q)/s，s = G_q/(2√ln2)
+G_q → 0 时与洛伦兹线型相同，与 voigt.complex_voigt 的关系为
+    complex_voigt(x, ω_q, A_q/Γ_q, 2Γ_q, G_q) = χ_q
+
+参数向量依次为 A_NR, φ (rad)，然后每个峰 A, ω, Γ（Voigt 另有 G）。
+残差的雅可比矩阵按解析式计算：∂I/∂p = 2·Re(conj(χ)·∂χ/∂p)，Faddeeva 函数的导数
+w'(z) = -2z·w(z) + 2i/√π。
+
+全局拟合 (fit_global) 同时拟合多组数据（偏振组合、浓度或时间序列），峰位和宽度等参数
+各组共用，振幅和非共振项每组独立。雅可比矩阵分块稀疏，协方差由 Schur 补逐组计算，
+计算量与组数成正比。
+
+命令行用法：python fitting.py 归一化光谱.csv -n 2 [--profile voigt] [--processes 4]
+结果写入 *_fit.csv，每条光谱一行，包括各参数及其标准误差。
+加 --global 时所有文件中的全部光谱一起全局拟合，结果写入第一个文件旁的 *_globalfit.csv。
+加 --series 时每个文件中的各列作为时间序列按顺序热启动拟合 (fit_series)，结果逐帧写入 *_series.csv。
+"""
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy import sparse
+from scipy.optimize import least_squares, linear_sum_assignment
+from voigt import faddeeva, COMPLEX_METHODS
+from peaks import analyze_spectrum
+
+PROFILES = ('lorentz', 'voigt')
+# 全局拟合中默认各组共用的参数种类：峰位、洛伦兹宽度、高斯宽度
+SHARED = ('w', 'Gamma', 'G')
+
+
+class ResonanceModel:
+    """
+    n_peaks 个共振峰加非共振项的 SFG 强度模型
+    profile: 'lorentz' 或 'voigt'
+    method: Voigt 线型的 Faddeeva 函数计算方式，见 voigt.COMPLEX_METHODS
+    """
+
+    def __init__(self, n_peaks, profile='lorentz', method='wofz'):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile: {profile}")
+        if method not in COMPLEX_METHODS:
+            raise ValueError(f"Unknown Faddeeva method: {method}")
+        self.n_peaks = n_peaks
+        self.profile = profile
+        self.method = method
+        self.per_peak = 4 if profile == 'voigt' else 3
+
+    @property
+    def names(self):
+        """参数名，与参数向量的顺序一致"""
+        names = ['A_NR', 'phi']
+        for q in range(1, self.n_peaks + 1):
+            names += [f'A{q}', f'w{q}', f'Gamma{q}']
+            if self.profile == 'voigt':
+                names.append(f'G{q}')
+        return names
+
+    def split(self, p):
+        """参数向量拆成 (A_NR, φ, 各峰参数 (峰数, 每峰参数数))"""
+        p = np.asarray(p, dtype=float)
+        return p[0], p[1], p[2:].reshape(self.n_peaks, self.per_peak)
+
+    def chi(self, x, p, derivatives=False):
+        """
+        复数 χ(x)；derivatives 为 True 时同时返回 ∂χ/∂p，形状 (参数数, 点数)
+        所有峰一次广播计算
+        """
+        x = np.asarray(x, dtype=float)
+        a_nr, phi, peaks = self.split(p)
+        amplitude, center, gamma = (peaks[:, i, None] for i in range(3))
+        nonres = a_nr * np.exp(1j * phi)
+        denominator = x - center + 1j * gamma
+
+        if self.profile == 'lorentz':
+            unit = 1 / denominator
+            chi = nonres + (amplitude * unit).sum(axis=0)
+            if not derivatives:
+                return chi
+            # ∂/∂A = 1/D，∂/∂ω = A/D²，∂/∂Γ = -iA/D²
+            squared = amplitude * unit**2
+            peak_derivatives = np.stack([unit, squared, -1j * squared], axis=1)
+        else:
+            s = peaks[:, 3, None] / (2 * np.sqrt(np.log(2)))
+            z = denominator / s
+            w = faddeeva(z, self.method)
+            factor = -1j * np.sqrt(np.pi) / s
+            unit = factor * w
+            chi = nonres + (amplitude * unit).sum(axis=0)
+            if not derivatives:
+                return chi
+            # ∂z/∂ω = -1/s，∂z/∂Γ = i/s；∂χ/∂s = -χ_q/s - A·factor·w'(z)·z/s
+            dw = amplitude * factor * (-2 * z * w + 2j / np.sqrt(np.pi))
+            d_s = -(amplitude * unit) / s - dw * z / s
+            peak_derivatives = np.stack([unit, -dw / s, 1j * dw / s, d_s / (2 * np.sqrt(np.log(2)))], axis=1)
+
+        jacobian = np.concatenate([[np.exp(1j * phi) + 0 * x, 1j * nonres + 0 * x],
+                                   peak_derivatives.reshape(-1, len(x))])
+        return chi, jacobian
+
+    def intensity(self, x, p):
+        return np.abs(self.chi(x, p))**2
+
+    def intensity_jacobian(self, x, p):
+        """∂I/∂p，形状 (点数, 参数数)，供 least_squares 使用"""
+        chi, jacobian = self.chi(x, p, derivatives=True)
+        return 2 * np.real(np.conj(chi) * jacobian).T
+
+    def bounds(self, x):
+        """参数范围：宽度为正，峰中心在数据范围内，其余不限"""
+        lower = [0.0, -np.inf]
+        upper = [np.inf, np.inf]
+        span = np.ptp(x)
+        for _ in range(self.n_peaks):
+            lower += [-np.inf, np.min(x), 1e-3 * span / len(x)]
+            upper += [np.inf, np.max(x), span]
+            if self.profile == 'voigt':
+                lower.append(1e-3 * span / len(x))
+                upper.append(span)
+        return np.array(lower), np.array(upper)
+
+    def initial_guess(self, x, y):
+        """
+        由光谱估计初值：取最显著的 n_peaks 个峰或凹陷（与非共振项相消的共振表现为凹陷），
+        显著度 h、半高宽 f 对应 Γ = f/2、|A| = √h·Γ；非共振项取低位强度的平方根。
+        峰不够时在范围内均匀补齐
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        order = np.argsort(x)
+        x, y = x[order], y[order]
+        background = np.sqrt(max(np.percentile(y, 10), 0.0))
+        peak_info, dip_info = analyze_spectrum(x, y, height=0.1)
+        features = ([(info['prominence'], info['position'], info['fwhm']) for info in peak_info]
+                    + [(info['depth'], info['position'], info['fwhm']) for info in dip_info])
+        features = sorted(features, reverse=True)[:self.n_peaks]
+
+        span = np.ptp(x)
+        default_gamma = span / (8 * self.n_peaks)
+        guess = [background, 0.0]
+        fill = np.linspace(x[0], x[-1], self.n_peaks + 2)[1:-1]
+        for q in range(self.n_peaks):
+            if q < len(features):
+                height, center, fwhm = features[q]
+                gamma = fwhm / 2 if np.isfinite(fwhm) else default_gamma
+            else:
+                gamma, height, center = default_gamma, np.ptp(y) / 10, fill[q]
+            gamma = min(max(gamma, 2 * span / len(x)), span / 2)
+            guess += [np.sqrt(max(height, 0.0)) * gamma, center, gamma]
+            if self.profile == 'voigt':
+                guess.append(gamma)
+        lower, upper = self.bounds(x)
+        return np.clip(guess, lower, upper)
+
+
+def starting_points(model, x, y, phases=4, guess=None, scales=(1, 3)):
+    """
+    多个初值：guess（默认为 initial_guess）的基础上非共振相位取 phases 个值，各峰振幅符号取所有组合，
+    峰振幅再分别乘以 scales（与非共振项相消时由强度估计的振幅偏小）。
+    χ → -χ 时强度不变，因此第一个峰的符号固定；峰数多时只取前 3 个峰的符号组合
+    """
+    guess = model.initial_guess(x, y) if guess is None else np.asarray(guess, dtype=float)
+    amplitudes = 2 + np.arange(model.n_peaks) * model.per_peak
+    points = []
+    for scale in scales:
+        for phi in np.linspace(0, 2 * np.pi, phases, endpoint=False):
+            for signs in np.ndindex(*([2] * min(model.n_peaks - 1, 3))):
+                point = guess.copy()
+                point[1] = phi
+                point[amplitudes] *= scale
+                for q, sign in enumerate(signs, 1):
+                    point[amplitudes[q]] *= 1 - 2 * sign
+                points.append(point)
+    return points
+
+
+def _solve(x, y, model, weights, start, free=None, max_nfev=None):
+    """只调整 free 为 True 的参数，其余固定在 start 的值；返回 (完整参数, least_squares 结果)"""
+    start = np.asarray(start, dtype=float)
+    free = np.ones(len(start), dtype=bool) if free is None else free
+    lower, upper = model.bounds(x)
+    full = start.copy()
+
+    def expand(p):
+        full[free] = p
+        return full
+
+    result = least_squares(
+        lambda p: (model.intensity(x, expand(p)) - y) * weights,
+        np.clip(start[free], lower[free], upper[free]),
+        jac=lambda p: model.intensity_jacobian(x, expand(p))[:, free] * weights[:, None],
+        bounds=(lower[free], upper[free]), x_scale='jac', max_nfev=max_nfev)
+    return expand(result.x).copy(), result
+
+
+def _screen(x, y, model, weights, starts, free=None, screen_nfev=20):
+    """每个初值迭代 screen_nfev 次，返回 (残差最小的参数, 总迭代次数)"""
+    screened = [_solve(x, y, model, weights, start, free, screen_nfev) for start in starts]
+    best = min(screened, key=lambda item: item[1].cost)
+    return best[0], sum(result.nfev for _, result in screened)
+
+
+def fit_spectrum(x, y, model, p0=None, weights=None, max_nfev=None, screen_nfev=20):
+    """
+    拟合一条光谱
+    p0: 初值；默认由 starting_points 给出多个初值，每个先迭代 screen_nfev 次，
+        残差最小的一个再迭代至收敛（干涉使 |χ|² 有多个局部极小）
+    weights: 每点残差的权重 (1/σ)，默认等权
+    返回字典：names, params, errors（由 (JᵀJ)⁻¹·残差方差估计的标准误差，矩阵奇异时为 nan）,
+    covariance, chi2（加权残差平方和）, reduced_chi2, success, message, nfev（含筛选的总次数）
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    weights = np.ones_like(y) if weights is None else np.asarray(weights, dtype=float)
+
+    total_nfev = 0
+    if p0 is None:
+        p0, total_nfev = _screen(x, y, model, weights, starting_points(model, x, y), screen_nfev=screen_nfev)
+    params, result = _solve(x, y, model, weights, p0, max_nfev=max_nfev)
+
+    dof = max(len(y) - len(params), 1)
+    chi2 = 2 * result.cost
+    try:
+        covariance = np.linalg.inv(result.jac.T @ result.jac) * chi2 / dof
+        with np.errstate(invalid='ignore'):
+            errors = np.sqrt(np.diag(covariance))
+    except np.linalg.LinAlgError:
+        covariance = np.full((len(params), len(params)), np.nan)
+        errors = np.full(len(params), np.nan)
+
+    return {
+        'names': model.names, 'params': params, 'errors': errors, 'covariance': covariance,
+        'chi2': chi2, 'reduced_chi2': chi2 / dof,
+        'success': result.success, 'message': result.message, 'nfev': total_nfev + result.nfev,
+    }
+
+
+class GlobalModel:
+    """
+    多组数据（偏振组合、浓度或时间序列）的全局拟合模型
+    每组数据使用同一个 ResonanceModel，shared 中的参数种类各组共用，其余每组独立。
+    参数种类：'A_NR', 'phi', 'A', 'w', 'Gamma', 'G'（G 只用于 Voigt 线型）
+    全局参数向量先排共用参数，再依次排各组的独立参数；index[d] 给出第 d 组的完整
+    参数向量在全局向量中的位置
+    """
+
+    def __init__(self, model, n_datasets, shared=SHARED, labels=None):
+        self.model = model
+        self.n_datasets = n_datasets
+        self.labels = list(labels) if labels is not None else [str(d + 1) for d in range(n_datasets)]
+        kinds = [re.sub(r'\d+$', '', name) for name in model.names]
+        self.shared = np.array([kind in shared for kind in kinds])
+        self.n_shared = int(self.shared.sum())
+        self.n_local = len(kinds) - self.n_shared
+
+        self.index = np.empty((n_datasets, len(kinds)), dtype=int)
+        self.index[:, self.shared] = np.arange(self.n_shared)
+        self.index[:, ~self.shared] = (self.n_shared + np.arange(n_datasets)[:, None] * self.n_local
+                                       + np.arange(self.n_local))
+        self.size = self.n_shared + n_datasets * self.n_local
+
+    @property
+    def names(self):
+        names = [name for name, shared in zip(self.model.names, self.shared) if shared]
+        for label in self.labels:
+            names += [f"{name}[{label}]" for name, shared in zip(self.model.names, self.shared) if not shared]
+        return names
+
+    def bounds(self, datasets):
+        """各组完整参数的范围取交集"""
+        lower = np.full(self.size, -np.inf)
+        upper = np.full(self.size, np.inf)
+        for index, (x, _) in zip(self.index, datasets):
+            low, high = self.model.bounds(x)
+            lower[index] = np.maximum(lower[index], low)
+            upper[index] = np.minimum(upper[index], high)
+        return lower, upper
+
+    def residuals(self, p, datasets, weights):
+        return np.concatenate([(self.model.intensity(x, p[index]) - y) * w
+                               for index, (x, y), w in zip(self.index, datasets, weights)])
+
+    def jacobian(self, p, datasets, weights):
+        """
+        分块稀疏的雅可比矩阵：第 d 组残差只与共用参数和本组参数有关，
+        非零元个数与组数成正比
+        """
+        rows, columns, values = [], [], []
+        offset = 0
+        for index, (x, _), w in zip(self.index, datasets, weights):
+            block = self.model.intensity_jacobian(x, p[index]) * w[:, None]
+            rows.append(np.repeat(np.arange(offset, offset + len(x)), len(index)))
+            columns.append(np.tile(index, len(x)))
+            values.append(block.ravel())
+            offset += len(x)
+        return sparse.csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(columns))),
+                                 shape=(offset, self.size))
+
+    def covariance(self, p, datasets, weights):
+        """
+        (JᵀJ)⁻¹ 的分块形式（Schur 补），计算量与组数成正比
+        返回 (全局参数的方差, 每组完整参数的协方差矩阵列表)
+        """
+        local = ~self.shared
+        blocks = []
+        normal = np.zeros((self.n_shared, self.n_shared))
+        for index, (x, _), w in zip(self.index, datasets, weights):
+            block = self.model.intensity_jacobian(x, p[index]) * w[:, None]
+            js, jl = block[:, self.shared], block[:, local]
+            coupling = js.T @ jl
+            local_inverse = np.linalg.inv(jl.T @ jl)
+            normal += js.T @ js - coupling @ local_inverse @ coupling.T
+            blocks.append((coupling, local_inverse))
+        shared_covariance = np.linalg.inv(normal) if self.n_shared else normal
+
+        variance = np.empty(self.size)
+        variance[:self.n_shared] = np.diag(shared_covariance)
+        covariances = []
+        for index, (coupling, local_inverse) in zip(self.index, blocks):
+            cross = -shared_covariance @ coupling @ local_inverse
+            local_covariance = local_inverse - local_inverse @ coupling.T @ cross
+            full = np.empty((len(index), len(index)))
+            full[np.ix_(self.shared, self.shared)] = shared_covariance
+            full[np.ix_(self.shared, local)] = cross
+            full[np.ix_(local, self.shared)] = cross.T
+            full[np.ix_(local, local)] = local_covariance
+            variance[index[local]] = np.diag(local_covariance)
+            covariances.append(full)
+        return variance, covariances
+
+    def local_fit(self, p, datasets, weights, screen_nfev=20):
+        """
+        固定共用参数，逐组对本组参数做多初值拟合，计算量与组数成正比
+        每组的初值为当前参数，以及由本组在各峰位处的强度估计的振幅
+        返回 (新的全局参数, 总迭代次数)
+        """
+        p = np.array(p, dtype=float)
+        local = ~self.shared
+        if not np.any(local):
+            return p, 0
+        kinds = np.array([re.sub(r'\d+$', '', name) for name in self.model.names])
+        peak_amplitude = np.flatnonzero(kinds == 'A')
+        nfev = 0
+        for index, (x, y), w in zip(self.index, datasets, weights):
+            current = p[index]
+            # 单位振幅的峰在中心处的 |χ|，由本组在峰位处的强度得到振幅大小
+            own = current.copy()
+            own[0] = np.sqrt(max(np.percentile(y, 10), 0.0))
+            unit = current.copy()
+            unit[0] = 0.0
+            order = np.argsort(x)
+            for position, center in zip(peak_amplitude, current[kinds == 'w']):
+                unit[peak_amplitude] = 0.0
+                unit[position] = 1.0
+                response = np.abs(self.model.chi(np.array([center]), unit))[0]
+                height = np.interp(center, x[order], y[order])
+                own[position] = np.sqrt(max(height, 0.0)) / max(response, 1e-300)
+
+            starts = [current] + starting_points(self.model, x, y, guess=own)
+            p[index], used = _screen(x, y, self.model, w, starts, local, screen_nfev)
+            nfev += used
+        return p, nfev
+
+    def initial_guess(self, datasets, weights, screen_nfev=20, n_references=3):
+        """
+        先对信号最强的 n_references 组分别做完整拟合，按峰位把各组的峰对应到最强一组，
+        每个峰的共用参数取自该峰最显著（|A|/σ_A 最大）的一组；
+        然后固定共用参数，逐组对本组参数做多初值拟合（参考组的振幅按强度比的平方根缩放后作为初值之一）。
+        共用参数在各组间一致，峰的编号不会错位
+        返回 (全局初值, 总迭代次数)
+        """
+        strength = np.array([np.max(y) for _, y in datasets])
+        fits = [fit_spectrum(*datasets[d], self.model, weights=weights[d], screen_nfev=screen_nfev)
+                for d in np.argsort(strength)[::-1][:n_references]]
+        nfev = sum(fit['nfev'] for fit in fits)
+
+        reference = fits[0]['params'].copy()
+        _, _, reference_peaks = self.model.split(reference)
+        significance = np.abs(reference_peaks[:, 0]) / fits[0]['errors'][2:].reshape(reference_peaks.shape)[:, 0]
+        for fit in fits[1:]:
+            _, _, peaks = self.model.split(fit['params'])
+            errors = fit['errors'][2:].reshape(peaks.shape)
+            for q in range(self.model.n_peaks):
+                match = np.argmin(np.abs(peaks[:, 1] - reference_peaks[q, 1]))
+                value = np.abs(peaks[match, 0]) / errors[match, 0]
+                # 峰位相差超过参考宽度时认为不是同一个峰
+                if value > significance[q] and abs(peaks[match, 1] - reference_peaks[q, 1]) < reference_peaks[q, 2]:
+                    significance[q] = value
+                    reference_peaks[q, 1:] = peaks[match, 1:]
+        reference[2:] = reference_peaks.ravel()
+
+        amplitude = np.isin([re.sub(r'\d+$', '', name) for name in self.model.names], ('A_NR', 'A'))
+        p = np.empty(self.size)
+        for index, (_, y) in zip(self.index, datasets):
+            guess = reference.copy()
+            guess[amplitude] *= np.sqrt(max(np.max(y), 0.0) / max(np.max(strength), 1e-300))
+            p[index] = guess
+        p, used = self.local_fit(p, datasets, weights, screen_nfev)
+        return p, nfev + used
+
+
+def fit_global(datasets, model, shared=SHARED, labels=None, p0=None, weights=None, max_nfev=None):
+    """
+    全局拟合多组数据
+    datasets: [(x, y), ...]，各组波数轴可以不同
+    shared: 各组共用的参数种类，默认共用峰位和宽度，振幅和非共振项每组独立
+    p0: 全局参数向量的初值，默认由 GlobalModel.initial_guess 估计
+    weights: 每组一个权重数组 (1/σ)，默认等权
+    返回字典：names, params, errors（全局参数向量）, datasets（每组一个与 fit_spectrum 格式相同的结果，
+    含该组的完整参数）, chi2, reduced_chi2, success, message, nfev
+    """
+    datasets = [(np.asarray(x, dtype=float), np.asarray(y, dtype=float)) for x, y in datasets]
+    weights = ([np.ones_like(y) for _, y in datasets] if weights is None
+               else [np.asarray(w, dtype=float) for w in weights])
+    global_model = GlobalModel(model, len(datasets), shared, labels)
+    lower, upper = global_model.bounds(datasets)
+
+    nfev = 0
+    if p0 is None:
+        p0, nfev = global_model.initial_guess(datasets, weights)
+    # 稀疏雅可比矩阵使用 LSMR 求解信赖域子问题
+    result = least_squares(
+        global_model.residuals, np.clip(p0, lower, upper), jac=global_model.jacobian,
+        bounds=(lower, upper), x_scale='jac', tr_solver='lsmr', max_nfev=max_nfev,
+        args=(datasets, weights))
+    nfev += result.nfev
+
+    n_points = sum(len(y) for _, y in datasets)
+    dof = max(n_points - global_model.size, 1)
+    chi2 = 2 * result.cost
+    try:
+        variance, covariances = global_model.covariance(result.x, datasets, weights)
+        variance *= chi2 / dof
+        covariances = [covariance * chi2 / dof for covariance in covariances]
+    except np.linalg.LinAlgError:
+        variance = np.full(global_model.size, np.nan)
+        covariances = [np.full((len(index), len(index)), np.nan) for index in global_model.index]
+
+    per_dataset = []
+    for index, (x, y), w, covariance in zip(global_model.index, datasets, weights, covariances):
+        dataset_chi2 = float(np.sum(((model.intensity(x, result.x[index]) - y) * w)**2))
+        per_dataset.append({
+            'names': model.names, 'params': result.x[index], 'errors': np.sqrt(np.diag(covariance)),
+            'covariance': covariance, 'chi2': dataset_chi2,
+            'reduced_chi2': dataset_chi2 / max(len(y) - len(index), 1),
+            'success': result.success, 'message': result.message, 'nfev': result.nfev,
+        })
+
+    return {
+        'names': global_model.names, 'params': result.x, 'errors': np.sqrt(variance),
+        'datasets': per_dataset, 'chi2': chi2, 'reduced_chi2': chi2 / dof,
+        'success': result.success, 'message': result.message, 'nfev': nfev,
+    }
+
+
+def _fit_task(task):
+    x, y, n_peaks, profile, method, p0 = task
+    return fit_spectrum(x, y, ResonanceModel(n_peaks, profile, method), p0)
+
+
+def fit_many(x, spectra, n_peaks, profile='lorentz', method='wofz', p0=None, processes=None):
+    """
+    共用波数轴的多条光谱分别拟合，多个进程并行
+    spectra: (光谱数, 点数)
+    p0: None、一个共用的初值，或每条光谱一个初值 (光谱数, 参数数)
+    processes: 进程数，默认为 CPU 数；为 1 时在当前进程中依次拟合
+    返回 fit_spectrum 结果的列表，顺序与 spectra 相同
+    """
+    spectra = np.atleast_2d(np.asarray(spectra, dtype=float))
+    if p0 is None or np.ndim(p0) == 1:
+        p0 = [p0] * len(spectra)
+    tasks = [(x, y, n_peaks, profile, method, guess) for y, guess in zip(spectra, p0)]
+    if processes == 1:
+        return [_fit_task(task) for task in tasks]
+    with ProcessPoolExecutor(processes) as executor:
+        # 每个进程一次领取多条光谱，减少进程间通信
+        chunksize = max(1, len(tasks) // (4 * (processes or os.cpu_count() or 1)))
+        return list(executor.map(_fit_task, tasks, chunksize=chunksize))
+
+
+def load_spectra(file_path):
+    """
+    读取归一化光谱 CSV（第一列为波数，其余每列一条光谱，可有表头）
+    返回 (波数, 光谱 (光谱数, 点数), 列名)，按波数升序排列
+    """
+    with open(file_path, 'r') as f:
+        first_line = f.readline()
+    delimiter = ',' if ',' in first_line else None
+    fields = [field.strip() for field in first_line.split(delimiter)]
+    has_header = not all(c.isdigit() or c in '.-+eE \t\n' for c in fields[0])
+    data = np.loadtxt(file_path, delimiter=delimiter, skiprows=1 if has_header else 0, ndmin=2)
+    base = os.path.splitext(os.path.basename(file_path))[0]
+    names = fields[1:] if has_header else [f"{base}_{i}" for i in range(1, data.shape[1])]
+    order = np.argsort(data[:, 0])
+    return data[order, 0], data[order, 1:].T, names
+
+
+def _result_header(names):
+    return ','.join(['spectrum', 'chi2', 'reduced_chi2', 'success']
+                    + [column for name in names for column in (name, name + '_err')])
+
+
+def _result_row(label, result):
+    values = [f"{v:.10g}" for pair in zip(result['params'], result['errors']) for v in pair]
+    return ','.join([f'"{label}"', f"{result['chi2']:.10g}", f"{result['reduced_chi2']:.10g}",
+                     str(bool(result['success']))] + values)
+
+
+def write_results(path, labels, results):
+    """拟合结果写成 CSV：每条光谱一行，各参数及其误差各占一列"""
+    with open(path, 'w') as f:
+        f.write(_result_header(results[0]['names']) + '\n')
+        for label, result in zip(labels, results):
+            f.write(_result_row(label, result) + '\n')
+
+
+def align_solution(model, params, reference):
+    """
+    把解的表示方式对齐到参考解：χ → -χ 的等价解中取相位接近参考的一个，
+    峰按峰位就近对应到参考解的编号，避免序列中参数跳变
+    返回 (对齐后的参数, 下标排列, 符号向量)；误差按排列取值，协方差先乘以符号向量的外积再排列
+    """
+    params = np.array(params, dtype=float)
+    sign = np.ones(params.size)
+    if np.cos(params[1] - reference[1]) < 0:
+        params[1] += np.pi
+        params[2::model.per_peak] *= -1
+        sign[2::model.per_peak] = -1
+    params[1] = reference[1] + np.angle(np.exp(1j * (params[1] - reference[1])))
+
+    _, _, peaks = model.split(params)
+    _, _, reference_peaks = model.split(reference)
+    # 峰位差 |Δω| 之和最小的一一对应，与峰宽和峰的先后顺序无关
+    _, order = linear_sum_assignment(np.abs(reference_peaks[:, 1, None] - peaks[None, :, 1]))
+    params[2:] = peaks[order].ravel()
+    index = np.concatenate([[0, 1], 2 + (order[:, None] * model.per_peak
+                                         + np.arange(model.per_peak)).ravel()])
+    return params, index, sign
+
+
+def noise_variance(y):
+    """由二阶差分的中位数绝对偏差估计光谱的白噪声方差，不受线型影响"""
+    difference = np.diff(np.asarray(y, dtype=float), 2)
+    sigma = 1.4826 * np.median(np.abs(difference - np.median(difference))) / np.sqrt(6)
+    return max(sigma**2, 1e-300)
+
+
+def fit_series(x, frames, model, p0=None, weights=None, output=None, labels=None,
+               reset_ratio=3.0, window=20):
+    """
+    按顺序拟合时间序列的各帧，每帧以上一帧的解为初值（热启动），只迭代一次求解
+    发散判断：求解失败、参数非有限，或约化 χ² 与本帧噪声方差 (noise_variance) 之比超过
+    最近 window 帧中位数的 reset_ratio 倍（与强度大小无关）。
+    发散时重新做多初值拟合（冷启动），取两者中残差较小的一个，并对齐到上一帧的表示方式
+    frames: 可迭代的光谱，可以是生成器，不需要一次读入全部帧
+    output: 可选 CSV 路径，每拟合完一帧写入一行并刷新，中断时已完成的结果不会丢失
+    逐帧产生 fit_spectrum 格式的结果，另含 'frame' 和 'reset'（本帧结果是否取自冷启动）
+    """
+    x = np.asarray(x, dtype=float)
+    history = []
+    previous = None if p0 is None else np.asarray(p0, dtype=float)
+    stream = None
+    try:
+        for frame, y in enumerate(frames):
+            if previous is None:
+                result, reset = fit_spectrum(x, y, model, weights=weights), True
+            else:
+                result, reset = fit_spectrum(x, y, model, previous, weights), False
+                typical = np.median(history[-window:]) if history else np.inf
+                diverged = (not result['success'] or not np.all(np.isfinite(result['params']))
+                            or result['reduced_chi2'] / noise_variance(y) > reset_ratio * typical)
+                if diverged:
+                    cold = fit_spectrum(x, y, model, weights=weights)
+                    if cold['chi2'] < result['chi2']:
+                        params, order, sign = align_solution(model, cold['params'], previous)
+                        covariance = cold['covariance'] * np.outer(sign, sign)
+                        cold['params'] = params
+                        cold['errors'] = cold['errors'][order]
+                        cold['covariance'] = covariance[np.ix_(order, order)]
+                        cold['nfev'] += result['nfev']
+                        result, reset = cold, True
+
+            result['frame'] = frame
+            result['reset'] = reset
+            history.append(result['reduced_chi2'] / noise_variance(y))
+            previous = result['params']
+
+            if output is not None:
+                if stream is None:
+                    stream = open(output, 'w')
+                    stream.write(_result_header(result['names']) + ',reset\n')
+                label = labels[frame] if labels is not None else frame
+                stream.write(_result_row(label, result) + f',{reset}\n')
+                stream.flush()
+            yield result
+    finally:
+        if stream is not None:
+            stream.close()
+
+
+def synthetic_series(x, model, start, stop, n_frames, noise=0.01, seed=0):
+    """
+    合成动力学序列：参数从 start 到 stop 按指数趋近变化，每帧加入相对最大值为 noise 的高斯噪声
+    返回 (帧 (帧数, 点数), 真实参数 (帧数, 参数数))
+    """
+    start = np.asarray(start, dtype=float)
+    stop = np.asarray(stop, dtype=float)
+    progress = 1 - np.exp(-np.linspace(0, 5, n_frames))[:, None]
+    truth = start + (stop - start) * progress
+    clean = np.array([model.intensity(x, p) for p in truth])
+    rng = np.random.default_rng(seed)
+    frames = clean + rng.normal(0, noise * clean.max(axis=1, keepdims=True), clean.shape)
+    return frames, truth
+
+
+def series_benchmark(n_frames=500, profile='lorentz', seed=0):
+    """
+    在合成序列上比较三种方式：热启动 (fit_series)、每帧都从第一帧的解开始的固定初值拟合、
+    每帧多初值拟合
+    返回 {方式: (s, 总迭代次数, 峰位相对真值误差的中位数)}，热启动另附冷启动帧数
+    """
+    model = ResonanceModel(2, profile)
+    x = np.linspace(2800, 3100, 600)
+    if profile == 'voigt':
+        start, stop = [0.3, 0.7, 2.0, 2900, 8, 6, 0.1, 2960, 5, 10], [0.3, 0.7, 0.5, 2905, 10, 6, -2.0, 2955, 5, 10]
+    else:
+        start, stop = [0.3, 0.7, 2.0, 2900, 8, 0.1, 2960, 5], [0.3, 0.7, 0.5, 2905, 10, -2.0, 2955, 5]
+    frames, truth = synthetic_series(x, model, start, stop, n_frames, seed=seed)
+
+    def run(fit):
+        begin = time.perf_counter()
+        results = fit()
+        elapsed = time.perf_counter() - begin
+        # 峰位误差，与表示方式无关
+        centers = np.array([np.sort(model.split(r['params'])[2][:, 1]) for r in results])
+        error = np.median(np.abs(centers - np.sort(truth[:, 3::model.per_peak], axis=1)))
+        return results, (elapsed, sum(r['nfev'] for r in results), error)
+
+    warm, report = run(lambda: list(fit_series(x, frames, model)))
+    first = warm[0]['params']
+    report = {'warm': report + (sum(r['reset'] for r in warm),)}
+    report['fixed'] = run(lambda: [fit_spectrum(x, y, model, first) for y in frames])[1]
+    report['multistart'] = run(lambda: [fit_spectrum(x, y, model) for y in frames])[1]
+    return report
+
+
+def benchmark(x, y, n_peaks, profile='lorentz', method='wofz', copies=200, processes=None, seed=0):
+    """
+    拟合吞吐量：以 y 的拟合结果为真值，加入与残差同量级的噪声生成 copies 条光谱后并行拟合
+    返回 (条/s, 结果列表)
+    """
+    model = ResonanceModel(n_peaks, profile, method)
+    reference = fit_spectrum(x, y, model)
+    clean = model.intensity(x, reference['params'])
+    noise = np.sqrt(reference['reduced_chi2'])
+    spectra = clean + np.random.default_rng(seed).normal(0, noise, (copies, len(x)))
+    start = time.perf_counter()
+    results = fit_many(x, spectra, n_peaks, profile, method, reference['params'], processes)
+    return copies / (time.perf_counter() - start), results
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="SFG 光谱多共振拟合")
+    parser.add_argument('files', nargs='+', help="归一化光谱 CSV 文件")
+    parser.add_argument('-n', '--n-peaks', type=int, default=1, help="共振峰数")
+    parser.add_argument('--profile', choices=PROFILES, default='lorentz', help="共振线型")
+    parser.add_argument('--method', choices=COMPLEX_METHODS, default='wofz', help="Faddeeva 函数计算方式")
+    parser.add_argument('--processes', type=int, default=None, help="进程数，默认为 CPU 数")
+    parser.add_argument('--benchmark', type=int, default=0, metavar='COPIES',
+                        help="以第一条光谱生成 COPIES 条带噪声的光谱测试拟合吞吐量")
+    parser.add_argument('--global', dest='global_fit', action='store_true', help="所有光谱一起全局拟合")
+    parser.add_argument('--shared', nargs='+', default=list(SHARED),
+                        help="全局拟合中各组共用的参数种类 (A_NR phi A w Gamma G)")
+    parser.add_argument('--series', action='store_true', help="各列作为时间序列，以上一帧的解为初值依次拟合")
+    args = parser.parse_args()
+
+    if args.series:
+        model = ResonanceModel(args.n_peaks, args.profile, args.method)
+        for file_path in args.files:
+            x, spectra, labels = load_spectra(file_path)
+            output_path = os.path.splitext(file_path)[0] + '_series.csv'
+            start = time.perf_counter()
+            resets = sum(result['reset'] for result in fit_series(x, spectra, model, output=output_path,
+                                                                   labels=labels))
+            print(f"{file_path}: {len(spectra)} 帧, {time.perf_counter() - start:.1f} s, 冷启动 {resets} 次")
+            print(f"结果已保存: {output_path}")
+        sys.exit()
+
+    if args.global_fit:
+        datasets, labels = [], []
+        for file_path in args.files:
+            x, spectra, names = load_spectra(file_path)
+            datasets += [(x, y) for y in spectra]
+            labels += names
+        result = fit_global(datasets, ResonanceModel(args.n_peaks, args.profile, args.method),
+                            args.shared, labels)
+        output_path = os.path.splitext(args.files[0])[0] + '_globalfit.csv'
+        write_results(output_path, labels, result['datasets'])
+        print(f"reduced χ² = {result['reduced_chi2']:.4g}")
+        for name, value, error in zip(result['names'], result['params'], result['errors']):
+            print(f"  {name}: {value:.8g} ± {error:.3g}")
+        print(f"结果已保存: {output_path}")
+        sys.exit()
+
+    for file_path in args.files:
+        x, spectra, labels = load_spectra(file_path)
+        if args.benchmark:
+            rate, _ = benchmark(x, spectra[0], args.n_peaks, args.profile, args.method,
+                                args.benchmark, args.processes)
+            print(f"{file_path}: {rate:.1f} 条/s ({len(x)} 点, {args.n_peaks} 峰, {args.profile})")
+            continue
+        results = fit_many(x, spectra, args.n_peaks, args.profile, args.method, processes=args.processes)
+        output_path = os.path.splitext(file_path)[0] + '_fit.csv'
+        write_results(output_path, labels, results)
+        for label, result in zip(labels, results):
+            print(f"{label}: reduced χ² = {result['reduced_chi2']:.4g}")
+            for name, value, error in zip(result['names'], result['params'], result['errors']):
+                print(f"  {name}: {value:.8g} ± {error:.3g}")
+        print(f"结果已保存: {output_path}")
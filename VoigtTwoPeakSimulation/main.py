@@ -1,15 +1,47 @@
 import sys
 import numpy as np
 from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
-                            QLabel, QSlider, QDoubleSpinBox, QGroupBox)
-from PyQt6.QtCore import Qt
+                            QLabel, QSlider, QDoubleSpinBox, QGroupBox, QComboBox,
+                            QPushButton, QScrollArea, QCheckBox, QSpinBox)
+from PyQt6.QtCore import Qt, QTimer, QRectF, QObject, QThread, pyqtSignal
 import pyqtgraph as pg
-from voigt import voigt
+from voigt import complex_voigt, COMPLEX_METHODS
+from peaks import analyze_spectrum
+from sampling import adaptive_grid, effective_fwhm
+from phasemap import SWEEPS, SWEEP_RANGES, METRICS, compute_rows
+
+class MapWorker(QObject):
+    """在后台线程中逐块计算相图，每算完几行发出一次结果"""
+    tile_ready = pyqtSignal(int, object)
+    finished = pyqtSignal()
+
+    def __init__(self, x, base, sweep_x, sweep_y, method, rows_per_tile=4):
+        super().__init__()
+        self.x = x
+        self.base = base
+        self.sweep_x = sweep_x
+        self.sweep_y = sweep_y
+        self.method = method
+        self.rows_per_tile = rows_per_tile
+        self.cancelled = False
+
+    def run(self):
+        for start in range(0, len(self.sweep_y[1]), self.rows_per_tile):
+            # 开始新的相图时旧的计算在块之间停止
+            if self.cancelled:
+                break
+            rows = np.arange(start, min(start + self.rows_per_tile, len(self.sweep_y[1])))
+            self.tile_ready.emit(start, compute_rows(self.x, self.base, self.sweep_x, self.sweep_y,
+                                                     rows, self.method))
+        self.finished.emit()
+
 
 class VoigtSimulator(QWidget):
     def __init__(self):
         super().__init__()
         self.controls = []  # 初始化控件列表
+        self.map_threads = []  # 正在运行的相图线程
+        self.map_worker = None
         self.initUI()
         
     def initUI(self):
@@ -20,14 +52,8 @@ class VoigtSimulator(QWidget):
         self.info_group = QGroupBox("Peak Analysis")
         self.info_layout = QHBoxLayout()
         
-        # 创建两个独立的标签用于显示峰信息
-        self.info_label1 = QLabel()
-        self.info_label1.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
-        self.info_label2 = QLabel()
-        self.info_label2.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
-        
-        self.info_layout.addWidget(self.info_label1)
-        self.info_layout.addWidget(self.info_label2)
+        # 每个识别到的峰一个标签，按需创建
+        self.info_labels = []
         self.info_group.setLayout(self.info_layout)
         self.plot.setLabel('left', 'Intensity')
         self.plot.setLabel('bottom', 'Wavenumber (cm-1)')
@@ -38,6 +64,25 @@ class VoigtSimulator(QWidget):
             self.plot.getAxis(axis).setPen(pg.mkPen('k'))
         self.plot.showGrid(x=True, y=True, alpha=0.3)
         
+        # 光谱曲线只创建一次，之后用 setData 更新
+        self.curve = self.plot.plot(pen='k')
+        
+        # 参数变化先合并，每帧最多重绘一次；峰分析在停止拖动后再进行
+        self.redraw_timer = QTimer(self)
+        self.redraw_timer.setSingleShot(True)
+        self.redraw_timer.setInterval(16)
+        self.redraw_timer.timeout.connect(self.redraw)
+        self.analysis_timer = QTimer(self)
+        self.analysis_timer.setSingleShot(True)
+        self.analysis_timer.setInterval(250)
+        self.analysis_timer.timeout.connect(self.run_peak_analysis)
+        self.spectrum = None
+        self.component_cache = []
+        self.resonance_cache = None
+        self.resum_interval = 1000
+        self.n_points = 1000
+        self.grid = None
+        
         # 创建范围设置控件
         range_group = QGroupBox("Plot Range")
         range_layout = QHBoxLayout()
@@ -56,13 +101,44 @@ class VoigtSimulator(QWidget):
         range_layout.addWidget(self.min_spin)
         range_layout.addWidget(QLabel("Max:"))
         range_layout.addWidget(self.max_spin)
+        
+        # Voigt 计算方式：精确的 wofz 或更快的近似
+        self.method_combo = QComboBox()
+        self.method_combo.addItems(COMPLEX_METHODS)
+        self.method_combo.currentIndexChanged.connect(self.update_plot)
+        range_layout.addWidget(QLabel("Voigt:"))
+        range_layout.addWidget(self.method_combo)
+        
+        # 自适应采样：在共振中心附近加密
+        self.adaptive_check = QCheckBox("Adaptive sampling")
+        self.adaptive_check.setChecked(True)
+        self.adaptive_check.toggled.connect(self.update_plot)
+        range_layout.addWidget(self.adaptive_check)
         range_group.setLayout(range_layout)
         
-        # 创建峰参数控件
-        control_layout = QHBoxLayout()
-        for i in range(2):  # 两个峰
-            layout = self.create_peak_controls(i+1)
-            control_layout.addLayout(layout)
+        # 创建峰参数控件，峰的数量可以增减
+        self.peak_layout = QHBoxLayout()
+        self.peak_layout.addStretch()
+        peak_container = QWidget()
+        peak_container.setLayout(self.peak_layout)
+        peak_scroll = QScrollArea()
+        peak_scroll.setWidgetResizable(True)
+        peak_scroll.setWidget(peak_container)
+        
+        button_layout = QHBoxLayout()
+        add_button = QPushButton("Add Peak")
+        add_button.clicked.connect(self.add_peak)
+        remove_button = QPushButton("Remove Peak")
+        remove_button.clicked.connect(self.remove_peak)
+        button_layout.addWidget(add_button)
+        button_layout.addWidget(remove_button)
+        button_layout.addStretch()
+        
+        control_layout = QVBoxLayout()
+        control_layout.addLayout(button_layout)
+        control_layout.addWidget(peak_scroll)
+        for i in range(2):  # 默认两个峰
+            self.peak_layout.insertWidget(i, self.create_peak_controls(i+1))
         
         # 非共振项输入
         nonres_group = QGroupBox("Nonresonance Term")
@@ -88,12 +164,28 @@ class VoigtSimulator(QWidget):
         nonres_layout.addWidget(self.imag_spin)
         nonres_group.setLayout(nonres_layout)
         
+        # 相图：两个参数网格扫描，显示线型指标
+        map_group = self.create_map_controls()
+        
+        self.map_plot = pg.PlotWidget()
+        self.map_plot.setBackground('w')
+        self.map_image = pg.ImageItem()
+        self.map_plot.addItem(self.map_image)
+        self.map_colorbar = pg.ColorBarItem(colorMap='viridis', interactive=False)
+        self.map_colorbar.setImageItem(self.map_image, insert_in=self.map_plot.getPlotItem())
+        self.map_data = None
+        
+        plot_layout = QHBoxLayout()
+        plot_layout.addWidget(self.plot, 3)
+        plot_layout.addWidget(self.map_plot, 2)
+        
         # 布局
         main_layout = QVBoxLayout()
         main_layout.addWidget(range_group)
         main_layout.addWidget(nonres_group)
+        main_layout.addWidget(map_group)
         main_layout.addWidget(self.info_group)
-        main_layout.addWidget(self.plot)
+        main_layout.addLayout(plot_layout)
         main_layout.addLayout(control_layout)
         
         self.setLayout(main_layout)
@@ -102,10 +194,65 @@ class VoigtSimulator(QWidget):
         # 连接信号
         self.min_spin.valueChanged.connect(self.update_range)
         self.max_spin.valueChanged.connect(self.update_range)
-        self.update_plot()
+        self.real_spin.valueChanged.connect(self.update_plot)
+        self.imag_spin.valueChanged.connect(self.update_plot)
+        self.redraw()
+        self.run_peak_analysis()
+        
+    def create_map_controls(self):
+        """创建相图设置控件：X/Y 扫描参数及其范围、网格点数、显示的指标"""
+        map_group = QGroupBox("Phase Map")
+        map_layout = QHBoxLayout()
+        
+        self.map_axes = {}
+        for axis, default in (('X', 'NR phase (°)'), ('Y', 'Peak separation (cm-1)')):
+            combo = QComboBox()
+            combo.addItems(SWEEPS)
+            min_spin = QDoubleSpinBox()
+            max_spin = QDoubleSpinBox()
+            for spin in (min_spin, max_spin):
+                spin.setRange(-1000, 1000)
+            steps_spin = QSpinBox()
+            steps_spin.setRange(2, 512)
+            steps_spin.setValue(64)
+            # 切换参数时换成该参数的默认范围
+            combo.currentTextChanged.connect(
+                lambda name, lo=min_spin, hi=max_spin: (lo.setValue(SWEEP_RANGES[name][0]),
+                                                        hi.setValue(SWEEP_RANGES[name][1])))
+            # 默认参数可能已是当前项，不会触发 currentTextChanged，范围需直接设置
+            combo.setCurrentText(default)
+            min_spin.setValue(SWEEP_RANGES[default][0])
+            max_spin.setValue(SWEEP_RANGES[default][1])
+            
+            map_layout.addWidget(QLabel(f"{axis}:"))
+            map_layout.addWidget(combo)
+            map_layout.addWidget(min_spin)
+            map_layout.addWidget(QLabel("to"))
+            map_layout.addWidget(max_spin)
+            map_layout.addWidget(QLabel("Steps:"))
+            map_layout.addWidget(steps_spin)
+            self.map_axes[axis] = (combo, min_spin, max_spin, steps_spin)
+        
+        self.map_metric_combo = QComboBox()
+        self.map_metric_combo.addItems(METRICS)
+        self.map_metric_combo.currentIndexChanged.connect(self.show_map)
+        map_layout.addWidget(QLabel("Show:"))
+        map_layout.addWidget(self.map_metric_combo)
+        
+        map_button = QPushButton("Compute Map")
+        map_button.clicked.connect(self.compute_map)
+        map_layout.addWidget(map_button)
+        self.map_status_label = QLabel()
+        map_layout.addWidget(self.map_status_label)
+        map_layout.addStretch()
+        
+        map_group.setLayout(map_layout)
+        return map_group
         
     def create_peak_controls(self, peak_num):
-        layout = QVBoxLayout()
+        """创建一个峰的参数控件，返回包含这些控件的 QWidget"""
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
         
         # 中心位置
         pos_group = QGroupBox(f'Peak {peak_num} Position')
@@ -122,9 +269,11 @@ class VoigtSimulator(QWidget):
         pos_slider.setValue(3700)
         
         # 同步滑块和输入框
-        pos_spin.valueChanged.connect(lambda val: pos_slider.setValue(int(val)))
+        # 输入框到滑块的同步不回传信号，避免一次改动触发多次计算
+        pos_spin.valueChanged.connect(lambda val: self.sync_slider(pos_slider, val))
         pos_slider.valueChanged.connect(pos_spin.setValue)
         pos_spin.valueChanged.connect(self.update_plot)
+        pos_slider.sliderReleased.connect(self.analysis_timer.start)
         
         pos_layout.addWidget(pos_spin)
         pos_layout.addWidget(pos_slider)
@@ -169,10 +318,32 @@ class VoigtSimulator(QWidget):
             'intensity': int_spin,
             'lorentz_width': lw_spin,
             'gauss_width': gw_spin,
-            'slider': pos_slider
+            'slider': pos_slider,
+            'widget': widget
         })
         
-        return layout
+        return widget
+
+    def add_peak(self):
+        """在当前范围中点添加一个峰"""
+        min_val = self.min_spin.value()
+        max_val = self.max_spin.value()
+        widget = self.create_peak_controls(len(self.controls) + 1)
+        controls = self.controls[-1]
+        controls['position'].setRange(min_val, max_val)
+        controls['slider'].setRange(int(min_val), int(max_val))
+        controls['position'].setValue((min_val + max_val) / 2)
+        self.peak_layout.insertWidget(len(self.controls) - 1, widget)
+        self.update_plot()
+
+    def remove_peak(self):
+        """删除最后一个峰"""
+        if not self.controls:
+            return
+        controls = self.controls.pop()
+        self.peak_layout.removeWidget(controls['widget'])
+        controls['widget'].deleteLater()
+        self.update_plot()
         
     def update_range(self):
         min_val = self.min_spin.value()
@@ -186,107 +357,218 @@ class VoigtSimulator(QWidget):
         self.update_plot()
         
     def analyze_peaks(self, x, y):
-        """分析光谱峰，返回峰位置和FWHM"""
-        from scipy.signal import find_peaks
-        from scipy.interpolate import interp1d
-        
-        # 找峰
-        peaks, _ = find_peaks(y, height=0.1*max(y))
-        peak_info = []
+        """分析光谱峰和凹陷，返回 (峰信息, 凹陷信息)，见 peaks.analyze_spectrum"""
+        return analyze_spectrum(x, y, height=0.1)
         
-        for peak in peaks:
-            # 计算半高全宽
-            half_max = y[peak]/2
-            
-            # 找到左交叉点的索引
-            left_cross = np.where(y[:peak] <= half_max)[0]
-            if len(left_cross) == 0:
-                x_left = x[peak] - 10  # 默认10cm-1宽度
-            else:
-                left_idx = left_cross[-1]
-                # 使用线性插值找到精确的左交叉点
-                x_left = x[left_idx] + (half_max - y[left_idx]) * (x[left_idx+1] - x[left_idx]) / (y[left_idx+1] - y[left_idx])
-            
-            # 找到右交叉点的索引
-            right_cross = np.where(y[peak:] <= half_max)[0]
-            if len(right_cross) == 0:
-                x_right = x[peak] + 10  # 默认10cm-1宽度
-            else:
-                right_idx = right_cross[0] + peak
-                # 使用线性插值找到精确的右交叉点
-                x_right = x[right_idx-1] + (half_max - y[right_idx-1]) * (x[right_idx] - x[right_idx-1]) / (y[right_idx] - y[right_idx-1])
-            
-            fwhm = x_right - x_left
-            
-            peak_info.append({
-                'position': x[peak],
-                'fwhm': fwhm,
-                'intensity': y[peak]
-            })
-            
-        return peak_info
-        
-    def update_peak_info(self, peak_info):
-        """更新峰信息显示"""
-        if not hasattr(self, 'info_label1'):
+    def update_peak_info(self, peak_info, dip_info=()):
+        """更新峰和凹陷信息显示"""
+        if not hasattr(self, 'info_labels'):
             return
-            
-            
-        # 更新显示内容
-        text1 = ""
-        text2 = ""
+        
+        texts = []
         for i, info in enumerate(peak_info):
-            if i == 0:
-                text1 += f"Peak {i+1}:\n"
-                text1 += f"  Position: {info['position']:.2f} cm-1\n"
-                text1 += f"  FWHM: {info['fwhm']:.2f} cm-1\n"
-                text1 += f"  Intensity: {info['intensity']:.4f}\n\n"
-            elif i == 1:
-                text2 += f"Peak {i+1}:\n"
-                text2 += f"  Position: {info['position']:.2f} cm-1\n"
-                text2 += f"  FWHM: {info['fwhm']:.2f} cm-1\n"
-                text2 += f"  Intensity: {info['intensity']:.4f}\n\n"
-        
-        self.info_label1.setText(text1)
-        self.info_label2.setText(text2)
+            # 半高处没有交点（峰位于范围边缘或叠在更高的背景上）时宽度无法确定
+            fwhm = f"{info['fwhm']:.2f} cm-1" if np.isfinite(info['fwhm']) else "n/a"
+            text = f"Peak {i+1}:\n"
+            text += f"  Position: {info['position']:.2f} cm-1\n"
+            text += f"  FWHM: {fwhm}\n"
+            text += f"  Intensity: {info['intensity']:.4f}\n"
+            text += f"  Prominence: {info['prominence']:.4f}\n"
+            text += f"  Area: {info['area']:.4f}\n"
+            texts.append(text)
+        for i, info in enumerate(dip_info):
+            fwhm = f"{info['fwhm']:.2f} cm-1" if np.isfinite(info['fwhm']) else "n/a"
+            text = f"Dip {i+1}:\n"
+            text += f"  Position: {info['position']:.2f} cm-1\n"
+            text += f"  Width: {fwhm}\n"
+            text += f"  Depth: {info['depth']:.4f}\n"
+            texts.append(text)
+        
+        # 标签数量与识别到的峰和凹陷数一致
+        while len(self.info_labels) < len(texts):
+            label = QLabel()
+            label.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
+            self.info_layout.addWidget(label)
+            self.info_labels.append(label)
+        for i, label in enumerate(self.info_labels):
+            if i < len(texts):
+                label.setText(texts[i])
+                label.show()
+            else:
+                label.hide()
         
+    def sync_slider(self, slider, value):
+        slider.blockSignals(True)
+        slider.setValue(int(value))
+        slider.blockSignals(False)
+
     def update_plot(self):
+        """参数改变时调用，安排在下一帧重绘"""
+        if not self.redraw_timer.isActive():
+            self.redraw_timer.start()
+
+    def resonance_sum(self, x, grid_key):
+        """
+        共振项之和 Σ A_q·线型_q
+        各峰单位振幅的复数线型按峰缓存，键为 (位置, 洛伦兹宽度, 高斯宽度, 计算方式, 网格)。
+        网格或峰数不变时只把变化的峰的差值 A·线型(新) - A·线型(旧) 加到缓存的和上，
+        拖动一个峰时计算量与峰数无关；每 resum_interval 次增量更新后重新求和，避免舍入误差积累
+        """
+        method = self.method_combo.currentText()
+        keys = [(controls['position'].value(), controls['lorentz_width'].value(),
+                 controls['gauss_width'].value(), method, grid_key) for controls in self.controls]
+        amplitudes = np.array([controls['intensity'].value() for controls in self.controls])
+        cached = self.resonance_cache
+        incremental = (cached is not None and cached[0] == grid_key and len(cached[1]) == len(keys)
+                       and cached[3] < self.resum_interval)
+        # 峰被删除后丢弃多余的缓存
+        del self.component_cache[len(keys):]
+        self.component_cache.extend([None] * (len(keys) - len(self.component_cache)))
+        
+        stale = [i for i, key in enumerate(keys)
+                 if self.component_cache[i] is None or self.component_cache[i][0] != key]
+        if incremental:
+            changed = [i for i in range(len(keys)) if i in stale or amplitudes[i] != cached[1][i]]
+            total = cached[2]
+            for i in changed:
+                total -= cached[1][i] * self.component_cache[i][1]
+        
+        # 所有需要更新的峰一次广播计算
+        if stale:
+            params = np.array([keys[i][:3] for i in stale], dtype=float).T[..., None]
+            position, lorentz_width, gauss_width = params
+            values = complex_voigt(x, position, 1.0, lorentz_width, gauss_width, method=method)
+            for i, value in zip(stale, values):
+                self.component_cache[i] = (keys[i], value)
+        
+        if incremental:
+            for i in changed:
+                total += amplitudes[i] * self.component_cache[i][1]
+            updates = cached[3] + bool(changed)
+        else:
+            total = np.zeros(len(x), dtype=complex)
+            for amplitude, (_, value) in zip(amplitudes, self.component_cache):
+                total += amplitude * value
+            updates = 0
+        self.resonance_cache = (grid_key, amplitudes, total, updates)
+        return total
+
+    def sampling_grid(self):
+        """
+        返回 (x, 网格键)
+        自适应网格按 (范围, 各峰中心, 各峰全宽) 缓存：只改变强度或非共振项时网格不变，
+        各峰的缓存线型可以复用；峰移动或宽度改变后按新的中心重新生成
+        """
         min_val = self.min_spin.value()
         max_val = self.max_spin.value()
-        x = np.linspace(min_val, max_val, 1000)
-        y = np.zeros_like(x, dtype=complex)  # 使用复数数组
-        
-        for controls in self.controls:
-            pos = controls['position'].value()
-            intensity = controls['intensity'].value()
-            lw = controls['lorentz_width'].value()
-            gw = controls['gauss_width'].value()
-            
-            if gw == 0:
-                # 复数形式的洛伦兹线型
-                y += intensity * (lw/2) / (x - pos + 1j*(lw/2))
-            else:
-                y += voigt(x, pos, intensity, lw, gw)
+        if not self.adaptive_check.isChecked():
+            return np.linspace(min_val, max_val, self.n_points), ('uniform', min_val, max_val, self.n_points)
+        
+        centers = tuple(controls['position'].value() for controls in self.controls)
+        fwhm = tuple(effective_fwhm([controls['lorentz_width'].value() for controls in self.controls],
+                                    [controls['gauss_width'].value() for controls in self.controls]).tolist())
+        key = ('adaptive', min_val, max_val, centers, fwhm)
+        if self.grid is None or self.grid[1] != key:
+            self.grid = (adaptive_grid(min_val, max_val, centers, fwhm, self.n_points), key)
+        return self.grid
+
+    def compute_spectrum(self):
+        """计算当前参数下的光谱 (x, |χ|²)"""
+        x, grid_key = self.sampling_grid()
         
-        # 加入非共振项
+        # 高斯宽度为 0 时即为复数洛伦兹线型，否则为保留相位的复数 Voigt 线型；
+        # 加入非共振项时生成新数组，缓存的共振项之和不能原地修改
         nonres = self.real_spin.value() + 1j * self.imag_spin.value()
-        y += nonres
+        y = self.resonance_sum(x, grid_key) + nonres
         
         # 对复数结果取模平方
-        y = np.abs(y)**2
-        
-        self.plot.clear()
-        self.plot.plot(x, y, pen='k')
-        
-        # 连接非共振项的信号
-        if not hasattr(self, '_nonres_connected'):
-            self.real_spin.valueChanged.connect(self.update_plot)
-            self.imag_spin.valueChanged.connect(self.update_plot)
-            self._nonres_connected = True
-        
-        # 峰识别和计算
-        peak_info = self.analyze_peaks(x, y)
-        self.update_peak_info(peak_info)
+        return x, np.abs(y)**2
+
+    def redraw(self):
+        """更新曲线数据，并推迟峰分析"""
+        self.spectrum = self.compute_spectrum()
+        self.curve.setData(*self.spectrum)
+        self.analysis_timer.start()
+
+    def run_peak_analysis(self):
+        """峰识别和计算，拖动滑块期间不进行"""
+        if self.spectrum is None:
+            return
+        if any(controls['slider'].isSliderDown() for controls in self.controls):
+            return
+        peak_info, dip_info = self.analyze_peaks(*self.spectrum)
+        self.update_peak_info(peak_info, dip_info)
+
+    def map_sweep(self, axis):
+        """返回 (参数名, 数值数组)"""
+        combo, min_spin, max_spin, steps_spin = self.map_axes[axis]
+        return combo.currentText(), np.linspace(min_spin.value(), max_spin.value(), steps_spin.value())
+
+    def compute_map(self):
+        """以当前参数为基准开始计算相图，正在进行的计算被取消"""
+        sweep_x = self.map_sweep('X')
+        sweep_y = self.map_sweep('Y')
+        if sweep_x[0] == sweep_y[0]:
+            self.map_status_label.setText("X and Y must be different parameters")
+            return
+        if len(self.controls) < 2 and any(name.startswith('Peak') for name in (sweep_x[0], sweep_y[0])):
+            self.map_status_label.setText("Peak sweeps need at least two peaks")
+            return
+        if self.map_worker is not None:
+            self.map_worker.cancelled = True
+        
+        base = {key: np.array([controls[key].value() for controls in self.controls])
+                for key in ('position', 'intensity', 'lorentz_width', 'gauss_width')}
+        base['nonres'] = self.real_spin.value() + 1j * self.imag_spin.value()
+        # 相图中的指标需要均匀网格上的线性插值，点数取为绘图的两倍
+        x = np.linspace(self.min_spin.value(), self.max_spin.value(), 2 * self.n_points)
+        
+        self.map_sweeps = (sweep_x, sweep_y)
+        self.map_data = {name: np.full((len(sweep_y[1]), len(sweep_x[1])), np.nan) for name in METRICS}
+        self.map_plot.setLabel('bottom', sweep_x[0])
+        self.map_plot.setLabel('left', sweep_y[0])
+        self.map_status_label.setText("Computing...")
+        
+        thread = QThread()
+        worker = MapWorker(x, base, sweep_x, sweep_y, self.method_combo.currentText())
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.tile_ready.connect(self.update_map_tile)
+        worker.finished.connect(self.map_finished)
+        worker.finished.connect(thread.quit)
+        thread.finished.connect(self.cleanup_map_threads)
+        self.map_threads.append((thread, worker))
+        self.map_worker = worker
+        thread.start()
+
+    def update_map_tile(self, start, metrics):
+        """填入一块结果并刷新图像；被取消的旧计算发来的结果丢弃"""
+        if self.sender() is not self.map_worker:
+            return
+        for name, values in metrics.items():
+            self.map_data[name][start:start + len(values)] = values
+        self.show_map()
+
+    def map_finished(self):
+        if self.sender() is self.map_worker:
+            self.map_status_label.setText("Done")
+
+    def cleanup_map_threads(self):
+        """释放已结束的相图线程"""
+        self.map_threads = [(thread, worker) for thread, worker in self.map_threads if not thread.isFinished()]
+
+    def show_map(self):
+        """显示当前选择的指标，未算完的部分为 nan"""
+        if self.map_data is None:
+            return
+        values = self.map_data[self.map_metric_combo.currentText()]
+        finite = values[np.isfinite(values)]
+        if len(finite) == 0:
+            return
+        (name_x, x), (name_y, y) = self.map_sweeps
+        self.map_image.setImage(values.T, autoLevels=False)
+        self.map_image.setRect(QRectF(x[0], y[0], x[-1] - x[0], y[-1] - y[0]))
+        self.map_colorbar.setLevels((finite.min(), max(finite.max(), finite.min() + 1e-12)))
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
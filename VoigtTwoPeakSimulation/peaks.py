@@ -0,0 +1,187 @@
+import numpy as np
+
+
+class RangeTable:
+    """
+    区间最小/最大值的稀疏表，建表 O(n log n)，每次查询 O(1)，查询可以是数组
+    """
+
+    def __init__(self, y):
+        y = np.asarray(y, dtype=float)
+        self.size = len(y)
+        levels = max(int(np.log2(max(self.size, 1))) + 1, 1)
+        self.min_table = np.empty((levels, self.size))
+        self.max_table = np.empty((levels, self.size))
+        self.min_table[0] = y
+        self.max_table[0] = y
+        for k in range(1, levels):
+            span = 1 << (k - 1)
+            # 超出末尾的部分沿用上一层的值，不影响合法查询
+            self.min_table[k] = self.min_table[k - 1]
+            self.max_table[k] = self.max_table[k - 1]
+            self.min_table[k, :-span] = np.minimum(self.min_table[k - 1, :-span], self.min_table[k - 1, span:])
+            self.max_table[k, :-span] = np.maximum(self.max_table[k - 1, :-span], self.max_table[k - 1, span:])
+
+    def _query(self, table, start, stop, func):
+        """闭区间 [start, stop] 的最值，start > stop 的空区间返回 nan"""
+        start = np.asarray(start)
+        stop = np.asarray(stop)
+        empty = stop < start
+        length = np.where(empty, 1, stop - start + 1)
+        k = np.floor(np.log2(length)).astype(int)
+        start = np.where(empty, 0, start)
+        stop = np.where(empty, 0, stop)
+        result = func(table[k, start], table[k, stop - (1 << k) + 1])
+        return np.where(empty, np.nan, result)
+
+    def min(self, start, stop):
+        return self._query(self.min_table, start, stop, np.minimum)
+
+    def max(self, start, stop):
+        return self._query(self.max_table, start, stop, np.maximum)
+
+
+def _search_left(query, peaks, condition):
+    """对每个峰找最大的 j < peak，使 condition(query(j, peak-1)) 成立；不存在时返回 -1"""
+    lo = np.zeros_like(peaks)
+    hi = peaks - 1
+    found = (hi >= 0) & condition(query(lo, hi))
+    lo = np.where(found, lo, hi)
+    # 所有峰同时二分
+    while np.any(lo < hi):
+        mid = (lo + hi + 1) // 2
+        ok = condition(query(mid, peaks - 1))
+        lo = np.where(ok, mid, lo)
+        hi = np.where(ok, hi, mid - 1)
+    return np.where(found, lo, -1)
+
+
+def _search_right(query, peaks, condition, size):
+    """对每个峰找最小的 j > peak，使 condition(query(peak+1, j)) 成立；不存在时返回 -1"""
+    lo = peaks + 1
+    hi = np.full_like(peaks, size - 1)
+    found = (lo <= hi) & condition(query(lo, hi))
+    hi = np.where(found, hi, lo)
+    while np.any(lo < hi):
+        mid = (lo + hi) // 2
+        ok = condition(query(peaks + 1, mid))
+        hi = np.where(ok, mid, hi)
+        lo = np.where(ok, lo, mid + 1)
+    return np.where(found, lo, -1)
+
+
+def local_maxima(y):
+    """局部极大值的下标，平台取最左侧的点，两端点不计"""
+    y = np.asarray(y)
+    if len(y) < 3:
+        return np.empty(0, dtype=int)
+    rising = y[1:-1] > y[:-2]
+    # 平台：向右找第一个不相等的点
+    change = np.flatnonzero(np.diff(y) != 0)
+    # 常数光谱 (例如所有峰强度为 0) 没有极大值
+    if change.size == 0:
+        return np.empty(0, dtype=int)
+    next_change = np.searchsorted(change, np.arange(1, len(y) - 1))
+    valid = next_change < len(change)
+    after = np.where(valid, change[np.minimum(next_change, len(change) - 1)] + 1, 0)
+    falling = valid & (y[after] < y[1:-1])
+    return np.flatnonzero(rising & falling) + 1
+
+
+def prominences(table, y, peaks):
+    """
+    峰的显著度及左右基线位置，定义与 scipy.signal.peak_prominences 相同
+    返回 (prominence, left_base, right_base)
+    """
+    heights = y[peaks]
+    higher = lambda values: values > heights
+    left_higher = _search_left(table.max, peaks, higher)
+    right_higher = _search_right(table.max, peaks, higher, len(y))
+    left_start = np.where(left_higher < 0, 0, left_higher)
+    right_stop = np.where(right_higher < 0, len(y) - 1, right_higher)
+
+    # 两侧区间内的最低点作为基线
+    left_min = table.min(left_start, peaks)
+    right_min = table.min(peaks, right_stop)
+    left_base = _search_left(table.min, peaks + 1, lambda values: values <= left_min)
+    right_base = _search_right(table.min, peaks - 1, lambda values: values <= right_min, len(y))
+    return heights - np.maximum(left_min, right_min), left_base, right_base
+
+
+def crossings(x, y, table, peaks, levels):
+    """
+    各峰两侧与 levels 的交点，线性插值
+    返回 (左交点, 右交点)，找不到交点时为 nan
+    """
+    below = lambda values: values <= levels
+    left = _search_left(table.min, peaks, below)
+    right = _search_right(table.min, peaks, below, len(y))
+
+    left_next = np.minimum(left + 1, len(y) - 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_left = x[left] + (levels - y[left]) * (x[left_next] - x[left]) / (y[left_next] - y[left])
+        right_prev = np.maximum(right - 1, 0)
+        x_right = x[right_prev] + (levels - y[right_prev]) * (x[right] - x[right_prev]) / (y[right] - y[right_prev])
+    return np.where(left >= 0, x_left, np.nan), np.where(right >= 0, x_right, np.nan)
+
+
+def analyze_spectrum(x, y, height=0.1, dip_depth=0.05):
+    """
+    一次分析光谱中所有峰和凹陷（负干涉），计算量随点数增长而与峰数基本无关
+    参数：
+    x, y: 光谱，x 单调
+    height: 峰高阈值，相对 max(y)
+    dip_depth: 凹陷深度阈值，相对 max(y)
+    返回 (peaks, dips)：
+    peaks 的每项包含 position, intensity, fwhm（半高 y/2 处的全宽，交点不存在时为 nan）,
+        left, right（半高交点）, prominence, area（左右基线之间扣除线性基线后的面积）
+    dips 的每项包含 position, intensity, depth（显著度）, fwhm（半深度处的全宽）
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    y_max = np.max(y) if len(y) else 0.0
+
+    table = RangeTable(y)
+    peaks = local_maxima(y)
+    peaks = peaks[y[peaks] >= height * y_max]
+    prominence, left_base, right_base = prominences(table, y, peaks)
+    left, right = crossings(x, y, table, peaks, y[peaks] / 2)
+
+    # 梯形累积积分，一次得到所有峰的面积
+    cumulative = np.concatenate([[0.0], np.cumsum(np.diff(x) * (y[1:] + y[:-1]) / 2)])
+    area = (cumulative[right_base] - cumulative[left_base]
+            - (y[left_base] + y[right_base]) / 2 * (x[right_base] - x[left_base]))
+
+    peak_info = [{'position': x[p], 'intensity': y[p], 'fwhm': r - l, 'left': l, 'right': r,
+                  'prominence': pr, 'area': a}
+                 for p, l, r, pr, a in zip(peaks, left, right, prominence, area)]
+
+    # 凹陷：对 -y 做同样的分析
+    inverted = RangeTable(-y)
+    dips = local_maxima(-y)
+    depth, _, _ = prominences(inverted, -y, dips)
+    keep = depth >= dip_depth * y_max
+    dips, depth = dips[keep], depth[keep]
+    dip_left, dip_right = crossings(x, -y, inverted, dips, -(y[dips] + depth / 2))
+    dip_info = [{'position': x[d], 'intensity': y[d], 'depth': dp, 'fwhm': r - l}
+                for d, dp, l, r in zip(dips, depth, dip_left, dip_right)]
+    return peak_info, dip_info
+
+
+if __name__ == '__main__':
+    # 与 scipy.signal.find_peaks 对照 (平台取最左侧的点)，并检查常数、过短等退化的光谱
+    from scipy.signal import find_peaks
+
+    def reference(y):
+        return find_peaks(y, plateau_size=1)[1]['left_edges']
+
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        # 取整后的随机游走含有许多平台
+        y = np.round(np.cumsum(rng.normal(size=rng.integers(1, 60))))
+        assert np.array_equal(local_maxima(y), reference(y))
+    for y in (np.full(300, 0.09), np.zeros(1000), np.ones(2), np.ones(1), np.arange(5.0)):
+        assert np.array_equal(local_maxima(y), reference(y))
+        x = np.arange(len(y), dtype=float)
+        assert analyze_spectrum(x, y) == ([], [])
+    print("peaks: 全部检查通过")
@@ -0,0 +1,111 @@
+import numpy as np
+from voigt import complex_voigt
+
+# 可扫描的参数
+SWEEPS = ('NR phase (°)', 'NR amplitude', 'Peak separation (cm-1)', 'Peak 2 intensity', 'Peak 2 Lorentzian FWHM')
+# 各扫描参数的默认范围 (最小值, 最大值)
+SWEEP_RANGES = {
+    'NR phase (°)': (0.0, 360.0),
+    'NR amplitude': (0.0, 1.0),
+    'Peak separation (cm-1)': (-40.0, 40.0),
+    'Peak 2 intensity': (-1.0, 1.0),
+    'Peak 2 Lorentzian FWHM': (1.0, 40.0),
+}
+# 由每条光谱得到的线型指标
+METRICS = ('Apparent shift (cm-1)', 'Apparent FWHM (cm-1)', 'Dip depth')
+
+
+def sweep_parameters(base, sweep_a, sweep_b):
+    """
+    由当前参数和两个扫描参数生成一批光谱的参数
+    base: {'position', 'intensity', 'lorentz_width', 'gauss_width'} 为 (峰数,) 数组，'nonres' 为复数
+    sweep_a, sweep_b: (参数名, 数值数组)，两组数值须可广播到同一形状 (N,)
+    返回参数字典，峰参数形状 (N, 峰数)，'nonres' 形状 (N,)
+    """
+    size = np.broadcast(sweep_a[1], sweep_b[1]).shape
+    params = {key: np.broadcast_to(base[key], size + np.shape(base[key])).copy()
+              for key in ('position', 'intensity', 'lorentz_width', 'gauss_width')}
+    params['nonres'] = np.full(size, base['nonres'], dtype=complex)
+
+    for name, values in (sweep_a, sweep_b):
+        values = np.broadcast_to(values, size)
+        if name == 'NR phase (°)':
+            params['nonres'] = np.abs(params['nonres']) * np.exp(1j * np.radians(values))
+        elif name == 'NR amplitude':
+            params['nonres'] = values * np.exp(1j * np.angle(params['nonres']))
+        elif name == 'Peak separation (cm-1)':
+            params['position'][..., 1] = params['position'][..., 0] + values
+        elif name == 'Peak 2 intensity':
+            params['intensity'][..., 1] = values
+        elif name == 'Peak 2 Lorentzian FWHM':
+            params['lorentz_width'][..., 1] = values
+        else:
+            raise ValueError(f"Unknown sweep parameter: {name}")
+    return params
+
+
+def batch_spectra(x, params, method='wofz'):
+    """一次计算一批光谱 |Σχ + χ_NR|²，返回形状 (N, 点数)"""
+    chi = complex_voigt(x, params['position'][..., None], params['intensity'][..., None],
+                        params['lorentz_width'][..., None], params['gauss_width'][..., None],
+                        method=method).sum(axis=-2)
+    return np.abs(chi + params['nonres'][..., None])**2
+
+
+def lineshape_metrics(x, y, reference):
+    """
+    每条光谱的线型指标，所有光谱同时计算
+    x: (点数,)；y: (N, 点数)；reference: 峰 1 的真实中心 (N,)
+    返回 {指标名: (N,)}：
+    视在位移 = 最高峰位置 - 峰 1 中心；视在半高宽 = 最高峰在半高处的全宽（交点不在范围内时为 nan）；
+    凹陷深度 = 最深凹陷（两侧较低的最高点与凹陷底部之差）相对最高峰的比值
+    """
+    n = y.shape[-1]
+    index = np.arange(n)
+    top = np.argmax(y, axis=-1)
+    peak = np.take_along_axis(y, top[:, None], axis=-1)[:, 0]
+    level = peak / 2
+
+    # 最高峰两侧第一个不高于半高的点
+    below = y <= level[:, None]
+    left = np.where(below & (index < top[:, None]), index, -1).max(axis=-1)
+    right = np.where(below & (index > top[:, None]), index, n).min(axis=-1)
+    valid = (left >= 0) & (right < n)
+    left = np.clip(left, 0, n - 2)
+    right = np.clip(right, 1, n - 1)
+
+    def crossing(i, j):
+        yi = np.take_along_axis(y, i[:, None], axis=-1)[:, 0]
+        yj = np.take_along_axis(y, j[:, None], axis=-1)[:, 0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return x[i] + (level - yi) * (x[j] - x[i]) / (yj - yi)
+
+    fwhm = np.where(valid, crossing(right - 1, right) - crossing(left, left + 1), np.nan)
+
+    # 两侧累计最大值中较小者减去当前值即为该点的凹陷深度
+    left_max = np.maximum.accumulate(y, axis=-1)
+    right_max = np.maximum.accumulate(y[:, ::-1], axis=-1)[:, ::-1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dip = (np.minimum(left_max, right_max) - y).max(axis=-1) / peak
+
+    return {
+        'Apparent shift (cm-1)': x[top] - reference,
+        'Apparent FWHM (cm-1)': fwhm,
+        'Dip depth': dip,
+    }
+
+
+def compute_rows(x, base, sweep_x, sweep_y, rows, method='wofz'):
+    """
+    计算相图中若干行
+    sweep_x, sweep_y: (参数名, 数值数组)，图的列对应 sweep_x，行对应 sweep_y
+    rows: 行下标数组
+    返回 {指标名: (len(rows), len(sweep_x 数值))}
+    """
+    x_values = np.asarray(sweep_x[1], dtype=float)
+    y_values = np.asarray(sweep_y[1], dtype=float)[rows]
+    grid_x, grid_y = np.meshgrid(x_values, y_values)
+    params = sweep_parameters(base, (sweep_x[0], grid_x.ravel()), (sweep_y[0], grid_y.ravel()))
+    spectra = batch_spectra(x, params, method)
+    metrics = lineshape_metrics(x, spectra, params['position'][:, 0])
+    return {name: values.reshape(grid_x.shape) for name, values in metrics.items()}
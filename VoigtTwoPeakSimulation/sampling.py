@@ -0,0 +1,42 @@
+import numpy as np
+
+
+def effective_fwhm(lorentz_fwhm, gauss_fwhm):
+    """Voigt 线型全宽的近似 (Olivero & Longbothum 1977)，精度约 0.02%"""
+    lorentz_fwhm = np.asarray(lorentz_fwhm, dtype=float)
+    gauss_fwhm = np.asarray(gauss_fwhm, dtype=float)
+    return 0.5346 * lorentz_fwhm + np.sqrt(0.2166 * lorentz_fwhm**2 + gauss_fwhm**2)
+
+
+def adaptive_grid(x_min, x_max, centers, fwhm, n_points=1000, background=0.3):
+    """
+    在固定点数下生成非均匀波数网格，采样点集中在各共振中心附近
+    采样密度 = background 比例的均匀分布 + 其余按各峰在范围内的权重分配的洛伦兹分布，
+    洛伦兹分布的半宽取峰的半高宽，因此窄峰附近点更密。网格由密度的累积分布反解得到，
+    两端点与 x_min、x_max 重合。
+    参数：
+    centers, fwhm: 各峰中心和全宽 (cm-1)，宽度为 0 的峰不参与
+    background: 均匀分布所占的比例
+    """
+    centers = np.asarray(centers, dtype=float)
+    fwhm = np.asarray(fwhm, dtype=float)
+    keep = fwhm > 0
+    centers, half = centers[keep], fwhm[keep] / 2
+    if len(centers) == 0 or x_max <= x_min:
+        return np.linspace(x_min, x_max, n_points)
+
+    # 辅助网格：均匀点加上每个峰附近按 tan 分布的点，足够分辨所有峰的累积分布
+    local = np.tan(np.linspace(-1.55, 1.55, 201))
+    auxiliary = np.concatenate([np.linspace(x_min, x_max, 4 * n_points),
+                                (centers[:, None] + half[:, None] * local).ravel()])
+    auxiliary = np.unique(auxiliary[(auxiliary >= x_min) & (auxiliary <= x_max)])
+
+    # 各峰洛伦兹分布的累积函数，按峰在范围内的质量加权
+    lower = np.arctan((x_min - centers) / half)[:, None]
+    upper = np.arctan((x_max - centers) / half)[:, None]
+    cumulative = (np.arctan((auxiliary - centers[:, None]) / half[:, None]) - lower).sum(axis=0)
+    cumulative /= (upper - lower).sum()
+
+    cdf = background * (auxiliary - x_min) / (x_max - x_min) + (1 - background) * cumulative
+    return np.interp(np.linspace(0, 1, n_points), cdf, auxiliary)
+
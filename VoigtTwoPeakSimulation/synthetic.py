@@ -0,0 +1,197 @@
+"""
+合成 SFG 光谱数据集，用于训练和检验峰拟合、去宇宙射线等方法
+
+线型模型与 VoigtSimulator 相同：I(x) = |Σ A_k·χ_k(x) + χ_NR|²，χ_k 为复数 Voigt 共振项
+(voigt.complex_voigt)，χ_NR 为复数非共振项。每条光谱随机抽取共振峰组、非共振项，
+按随机的计数水平加入散粒噪声 (泊松) 和读出噪声，再注入宇宙射线尖峰。
+
+数据按块写入目录：chunk_00000.npz, chunk_00001.npz, ... 以及 manifest.json。
+每块包含光谱和全部真值参数 (见 generate_batch)。第 i 块的随机数只由 (seed, i) 决定，
+因此结果与进程数无关，可以完全复现。
+
+命令行用法：python synthetic.py 输出目录 -n 1000000 --seed 0
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from voigt import complex_voigt
+
+# 默认的生成参数，(a, b) 表示取值范围
+DEFAULT_CONFIG = {
+    'x_min': 2800.0,             # 波数范围 (cm-1)
+    'x_max': 3200.0,
+    'n_points': 1000,
+    'n_peaks': (1, 6),           # 共振峰数，含两端
+    'amplitude': (0.1, 1.0),     # 共振振幅的绝对值，符号随机
+    'lorentz_fwhm': (2.0, 30.0),  # 对数均匀分布
+    'gauss_fwhm': (0.0, 20.0),
+    'edge_margin': 0.05,         # 峰中心离范围两端至少留出的比例
+    'nonres_amplitude': (0.0, 0.5),  # 非共振项相位在 0–2π 均匀分布
+    'counts': (100.0, 1e4),      # 光谱最大值对应的光子计数，对数均匀分布
+    'read_noise': 2.0,           # 读出噪声 (计数，标准差)
+    'cosmic_rate': 0.5,          # 每条光谱平均的宇宙射线数
+    'cosmic_height': (0.5, 20.0),  # 宇宙射线高度相对光谱最大计数，对数均匀分布
+    'cosmic_width': (1, 3),      # 宇宙射线宽度 (像素)，含两端
+}
+
+
+def wavenumber_axis(config):
+    return np.linspace(config['x_min'], config['x_max'], config['n_points'])
+
+
+def _log_uniform(rng, bounds, size):
+    return np.exp(rng.uniform(np.log(bounds[0]), np.log(bounds[1]), size))
+
+
+def generate_batch(rng, size, config=None, method='wofz', save_clean=True):
+    """
+    生成一批光谱，全部参数和线型按批向量化计算
+    rng: numpy.random.Generator
+    返回字典：
+    x (点数,), spectra (size, 点数) 计数, clean 不含噪声和宇宙射线的计数 (save_clean 时),
+    spike_mask (size, 点数) 宇宙射线所在像素, n_peaks (size,),
+    position, amplitude, lorentz_fwhm, gauss_fwhm (size, 最大峰数)，不存在的峰振幅为 0,
+    nonres (size,) 复数, scale (size,) 模型强度到计数的换算系数
+    """
+    config = {**DEFAULT_CONFIG, **(config or {})}
+    x = wavenumber_axis(config)
+    max_peaks = config['n_peaks'][1]
+
+    # 共振峰参数，多余的峰槽振幅为 0
+    n_peaks = rng.integers(config['n_peaks'][0], max_peaks + 1, size)
+    margin = config['edge_margin'] * (config['x_max'] - config['x_min'])
+    position = rng.uniform(config['x_min'] + margin, config['x_max'] - margin, (size, max_peaks))
+    amplitude = rng.uniform(*config['amplitude'], (size, max_peaks)) * rng.choice([-1.0, 1.0], (size, max_peaks))
+    amplitude[np.arange(max_peaks) >= n_peaks[:, None]] = 0.0
+    lorentz_fwhm = _log_uniform(rng, config['lorentz_fwhm'], (size, max_peaks))
+    gauss_fwhm = rng.uniform(*config['gauss_fwhm'], (size, max_peaks))
+    nonres = (rng.uniform(*config['nonres_amplitude'], size)
+              * np.exp(1j * rng.uniform(0, 2 * np.pi, size)))
+
+    # 逐个峰槽累加，每次对整批中含有该峰的光谱广播计算
+    chi = np.repeat(nonres[:, None], len(x), axis=1)
+    for k in range(max_peaks):
+        rows = np.flatnonzero(n_peaks > k)
+        chi[rows] += complex_voigt(x, position[rows, k, None], amplitude[rows, k, None],
+                                   lorentz_fwhm[rows, k, None], gauss_fwhm[rows, k, None], method=method)
+    intensity = np.abs(chi)**2
+
+    # 散粒噪声和读出噪声
+    counts = _log_uniform(rng, config['counts'], size)
+    scale = counts / np.maximum(intensity.max(axis=1), 1e-12)
+    clean = intensity * scale[:, None]
+    spectra = rng.poisson(clean) + rng.normal(0, config['read_noise'], clean.shape)
+
+    # 宇宙射线：每条光谱的个数服从泊松分布，位置、宽度、高度随机
+    n_rays = rng.poisson(config['cosmic_rate'], size)
+    owner = np.repeat(np.arange(size), n_rays)
+    start = rng.integers(0, len(x), len(owner))
+    width = rng.integers(config['cosmic_width'][0], config['cosmic_width'][1] + 1, len(owner))
+    height = _log_uniform(rng, config['cosmic_height'], len(owner)) * counts[owner]
+    spike_mask = np.zeros(spectra.shape, dtype=bool)
+    for offset in range(config['cosmic_width'][1]):
+        hit = (offset < width) & (start + offset < len(x))
+        # 尖峰中心最高，两侧减半
+        weight = np.where(offset == (width - 1) // 2, 1.0, 0.5)
+        np.add.at(spectra, (owner[hit], start[hit] + offset), (height * weight)[hit])
+        spike_mask[owner[hit], start[hit] + offset] = True
+
+    batch = {
+        'x': x, 'spectra': spectra.astype(np.float32), 'spike_mask': spike_mask,
+        'n_peaks': n_peaks, 'position': position, 'amplitude': amplitude,
+        'lorentz_fwhm': lorentz_fwhm, 'gauss_fwhm': gauss_fwhm,
+        'nonres': nonres, 'scale': scale,
+    }
+    if save_clean:
+        batch['clean'] = clean.astype(np.float32)
+    return batch
+
+
+def chunk_path(directory, index):
+    return os.path.join(directory, f'chunk_{index:05d}.npz')
+
+
+def _write_chunk(task):
+    """在子进程中生成并写入一块，先写临时文件再改名，中断时不会留下不完整的块"""
+    directory, index, seed, size, config, method, save_clean = task
+    batch = generate_batch(np.random.default_rng(seed), size, config, method, save_clean)
+    path = chunk_path(directory, index)
+    with open(path + '.tmp', 'wb') as f:
+        np.savez(f, **batch)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def generate_dataset(directory, n_spectra, chunk_size=4096, seed=0, config=None, method='wofz',
+                     save_clean=True, processes=None, progress=None):
+    """
+    生成数据集并写入 directory，多个进程并行生成各块
+    processes: 进程数，默认为 CPU 数；为 1 时在当前进程中依次生成
+    progress: 可选回调 progress(已完成块数, 总块数)
+    返回 manifest 字典
+    """
+    config = {**DEFAULT_CONFIG, **(config or {})}
+    os.makedirs(directory, exist_ok=True)
+    n_chunks = -(-n_spectra // chunk_size)
+    # 每块独立的种子，由总种子派生
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    tasks = [(directory, i, seeds[i], min(chunk_size, n_spectra - i * chunk_size), config, method, save_clean)
+             for i in range(n_chunks)]
+
+    manifest = {'n_spectra': n_spectra, 'chunk_size': chunk_size, 'seed': seed, 'method': method,
+                'config': config, 'chunks': []}
+    if processes == 1:
+        results = map(_write_chunk, tasks)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(processes)
+        results = executor.map(_write_chunk, tasks)
+    try:
+        for done, path in enumerate(results, 1):
+            manifest['chunks'].append(os.path.basename(path))
+            if progress is not None:
+                progress(done, n_chunks)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    with open(os.path.join(directory, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_chunk(path):
+    """读入一块，返回字典"""
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def iter_dataset(directory):
+    """按顺序逐块读入数据集"""
+    with open(os.path.join(directory, 'manifest.json'), 'r') as f:
+        manifest = json.load(f)
+    for name in manifest['chunks']:
+        yield load_chunk(os.path.join(directory, name))
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="生成合成 SFG 光谱数据集")
+    parser.add_argument('directory', help="输出目录")
+    parser.add_argument('-n', '--n-spectra', type=int, default=100000, help="光谱条数")
+    parser.add_argument('--chunk-size', type=int, default=4096, help="每个文件的光谱条数")
+    parser.add_argument('--seed', type=int, default=0, help="随机数种子")
+    parser.add_argument('--processes', type=int, default=None, help="进程数，默认为 CPU 数")
+    parser.add_argument('--method', default='wofz', help="Faddeeva 函数计算方式，见 voigt.COMPLEX_METHODS")
+    parser.add_argument('--no-clean', action='store_true', help="不保存无噪声光谱")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generate_dataset(args.directory, args.n_spectra, args.chunk_size, args.seed, method=args.method,
+                     save_clean=not args.no_clean, processes=args.processes,
+                     progress=lambda done, total: print(f"\r{done}/{total} 块", end='', flush=True))
+    elapsed = time.perf_counter() - start
+    print(f"\n完成: {args.n_spectra} 条光谱, {elapsed:.1f} s ({args.n_spectra / elapsed:.0f} 条/s)")
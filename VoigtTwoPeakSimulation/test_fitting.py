@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from fitting import GlobalModel, ResonanceModel, align_solution, fit_spectrum
+
+
+def test_align_solution_transforms_covariance():
+    # 参考解与待对齐解相差 χ → -χ 且两峰顺序互换，协方差应与参数做相同的线性变换
+    model = ResonanceModel(2)
+    reference = np.array([0.1, 0.3, 1.0, 2850.0, 8.0, -0.5, 2920.0, 10.0])
+    params = np.array([0.1, 0.3 + np.pi, 0.5, 2920.0, 10.0, -1.0, 2850.0, 8.0])
+    rng = np.random.default_rng(0)
+    root = rng.normal(size=(params.size, params.size))
+    covariance = root @ root.T
+
+    aligned, order, sign = align_solution(model, params, reference)
+    assert np.allclose(aligned, reference)
+    # 除相位的常数平移外，对齐是线性映射 aligned = T @ params
+    transform = np.eye(params.size)[order] * sign[order]
+    assert np.allclose(np.delete(transform @ params, 1), np.delete(aligned, 1))
+    expected = transform @ covariance @ transform.T
+    actual = (covariance * np.outer(sign, sign))[np.ix_(order, order)]
+    assert np.allclose(actual, expected)
+
+
+def numerical_jacobian(model, x, p):
+    """中心差分 ∂I/∂p，步长随参数大小缩放"""
+    columns = []
+    for i in range(len(p)):
+        step = 1e-6 * max(abs(p[i]), 1.0)
+        upper, lower = np.array(p, dtype=float), np.array(p, dtype=float)
+        upper[i] += step
+        lower[i] -= step
+        columns.append((model.intensity(x, upper) - model.intensity(x, lower)) / (2 * step))
+    return np.stack(columns, axis=1)
+
+
+@pytest.mark.parametrize('profile, method, tolerance', [
+    ('lorentz', 'wofz', 1e-7),
+    ('voigt', 'wofz', 1e-7),
+    ('voigt', 'weideman', 1e-6),
+    # Humlíček 近似本身的导数与解析式 w' = -2zw + 2i/√π 只在近似精度内一致
+    ('voigt', 'humlicek', 1e-4),
+])
+def test_intensity_jacobian_matches_finite_differences(profile, method, tolerance):
+    model = ResonanceModel(2, profile, method)
+    x = np.linspace(2800, 3000, 201)
+    p = [0.2, 0.7, 1.0, 2870.0, 8.0, -0.6, 2935.0, 12.0]
+    if profile == 'voigt':
+        p = p[:5] + [10.0] + p[5:] + [6.0]
+    analytic = model.intensity_jacobian(x, p)
+    numeric = numerical_jacobian(model, x, p)
+    error = np.max(np.abs(analytic - numeric)) / np.max(np.abs(numeric))
+    assert error < tolerance
+
+
+@pytest.mark.parametrize('profile', ['lorentz', 'voigt'])
+def test_fit_spectrum_recovers_parameters(profile):
+    model = ResonanceModel(2, profile)
+    x = np.linspace(2800, 3000, 401)
+    truth = np.array([0.2, 0.7, 1.0, 2870.0, 8.0, -0.6, 2935.0, 12.0])
+    if profile == 'voigt':
+        truth = np.insert(truth, [5, 8], [10.0, 6.0])
+    clean = model.intensity(x, truth)
+    y = clean + np.random.default_rng(1).normal(0, 0.01 * clean.max(), x.size)
+
+    result = fit_spectrum(x, y, model)
+    params, order, _ = align_solution(model, result['params'], truth)
+    errors = result['errors'][order]
+    assert result['success']
+    assert np.all(np.isfinite(errors))
+    assert np.all(np.abs(params - truth) < 4 * errors)
+
+
+def test_global_covariance_matches_dense_inverse():
+    model = ResonanceModel(2)
+    global_model = GlobalModel(model, 4)
+    rng = np.random.default_rng(2)
+    datasets = [(np.linspace(2800, 3000, 150 + 10 * d), None) for d in range(4)]
+    weights = [rng.uniform(0.5, 2.0, len(x)) for x, _ in datasets]
+    p = np.empty(global_model.size)
+    for index in global_model.index:
+        p[index] = [rng.uniform(0.1, 0.3), rng.uniform(0, 2 * np.pi), rng.uniform(0.5, 1.5), 2870.0, 8.0,
+                    rng.uniform(-1.0, -0.3), 2935.0, 12.0]
+
+    variance, covariances = global_model.covariance(p, datasets, weights)
+    jacobian = global_model.jacobian(p, datasets, weights).toarray()
+    dense = np.linalg.inv(jacobian.T @ jacobian)
+    assert np.allclose(variance, np.diag(dense), rtol=1e-12, atol=0)
+    for index, covariance in zip(global_model.index, covariances):
+        block = dense[np.ix_(index, index)]
+        assert np.max(np.abs(covariance - block)) < 1e-12 * np.max(np.abs(block))
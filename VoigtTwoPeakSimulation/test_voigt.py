@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from scipy.special import wofz
+from voigt import complex_voigt, faddeeva, humlicek, voigt, weideman
+
+
+@pytest.fixture(scope='module')
+def grid():
+    """z = x + iy，|x| 取 1e-3–1e3，y 取 1e-4–1e3，覆盖峰中心、远翼以及很小和很大的 |y|"""
+    x = np.concatenate([-np.logspace(-3, 3, 200)[::-1], [0.0], np.logspace(-3, 3, 200)])
+    y = np.logspace(-4, 3, 150)
+    z = (x[:, None] + 1j * y[None, :]).ravel()
+    return z, wofz(z)
+
+
+def relative_error(value, reference):
+    return np.max(np.abs(value - reference) / np.abs(reference))
+
+
+def test_weideman_accuracy(grid):
+    z, reference = grid
+    assert relative_error(weideman(z), reference) <= 1e-6
+
+
+def test_humlicek_accuracy(grid):
+    z, reference = grid
+    assert relative_error(humlicek(z), reference) <= 1e-4
+
+
+@pytest.mark.parametrize('method', ['wofz', 'weideman', 'humlicek'])
+def test_faddeeva_dispatch(grid, method):
+    z, reference = grid
+    assert relative_error(faddeeva(z, method), reference) <= 1e-4
+
+
+def test_complex_voigt_reduces_to_lorentzian():
+    x = np.linspace(2800, 3200, 401)
+    lorentz = 2.0 * 5.0 / (x - 3000 + 5j)
+    assert np.allclose(complex_voigt(x, 3000, 2.0, 10.0, 0.0), lorentz, rtol=1e-14)
+
+
+def test_real_voigt_matches_wofz_profile():
+    x = np.linspace(-50, 50, 1001)
+    reference = voigt(x, 0.0, 1.0, 2.0, 1.5, 'wofz')
+    for method, tolerance in (('weideman', 1e-6), ('humlicek', 1e-4), ('pseudo', 2e-2)):
+        error = np.max(np.abs(voigt(x, 0.0, 1.0, 2.0, 1.5, method) - reference)) / reference.max()
+        assert error <= tolerance, method
@@ -1,7 +1,102 @@
+import time
 import numpy as np
 from scipy.special import wofz
 
-def voigt(x, center, intensity, gamma_L, gamma_G):
+# Voigt 计算方式，精度和速度由 compare_methods 给出 (python voigt.py)，误差上限由 test_voigt.py 检查：
+# 'wofz'      scipy.special.wofz，机器精度，约 155 ns/点
+# 'weideman'  Weideman (1994) 有理近似，N=16 项：复数 w(z) 相对误差 < 1e-6，
+#             实数线型相对峰值误差 ~1e-7（远翼实部相对误差 ~2e-4），约 135–145 ns/点；只适用于 gamma_L >= 0
+# 'humlicek'  Humlíček (1982) W4 分区有理近似：相对误差 < 1e-4，约 105–130 ns/点
+# 'pseudo'    Thompson-Cox-Hastings 伪 Voigt（洛伦兹与高斯的加权和）：相对峰值误差约 1%，
+#             远翼相对误差可达 40%，约 90–115 ns/点；只有实数线型
+# 这些近似在 NumPy 中并不比 wofz 明显更快（最多约 1.5 倍，受临时数组限制），
+# 保留它们是为了比较精度上的取舍，不是为了提速；一般情况下使用 wofz 即可
+METHODS = ('wofz', 'weideman', 'humlicek', 'pseudo')
+# 可用于复数线型的计算方式
+COMPLEX_METHODS = ('wofz', 'weideman', 'humlicek')
+
+
+def _weideman_coefficients(n):
+    """Weideman 有理近似的多项式系数"""
+    m = 2 * n
+    k = np.arange(-m + 1, m)
+    length = np.sqrt(n / np.sqrt(2))
+    t = length * np.tan(k * np.pi / (2 * m))
+    f = np.concatenate([[0.0], np.exp(-t**2) * (length**2 + t**2)])
+    a = np.real(np.fft.fft(np.fft.fftshift(f))) / (2 * m)
+    return length, a[1:n + 1][::-1]
+
+
+_WEIDEMAN = _weideman_coefficients(16)
+
+
+def weideman(z):
+    """Faddeeva 函数 w(z) 的 Weideman 近似，Im z >= 0"""
+    length, coefficients = _WEIDEMAN
+    denominator = length - 1j * z
+    ratio = (length + 1j * z) / denominator
+    p = np.zeros_like(ratio)
+    for c in coefficients:
+        p = p * ratio + c
+    return 2 * p / denominator**2 + 1 / (np.sqrt(np.pi) * denominator)
+
+
+def humlicek(z):
+    """Faddeeva 函数 w(z) 的 Humlíček W4 近似，Im z >= 0"""
+    z = np.asarray(z, dtype=complex)
+    x, y = z.real, z.imag
+    t = y - 1j * x
+    s = np.abs(x) + y
+    u = t * t
+    w = np.empty_like(t)
+
+    # 四个区域分别使用不同的有理式
+    region1 = s >= 15
+    region2 = (s >= 5.5) & ~region1
+    region3 = (s < 5.5) & (y >= 0.195 * np.abs(x) - 0.176)
+    region4 = ~(region1 | region2 | region3)
+
+    t1 = t[region1]
+    w[region1] = t1 * 0.5641896 / (0.5 + t1 * t1)
+    t2, u2 = t[region2], u[region2]
+    w[region2] = t2 * (1.410474 + u2 * 0.5641896) / (0.75 + u2 * (3 + u2))
+    t3 = t[region3]
+    w[region3] = ((16.4955 + t3 * (20.20933 + t3 * (11.96482 + t3 * (3.778987 + t3 * 0.5642236))))
+                  / (16.4955 + t3 * (38.82363 + t3 * (39.27121 + t3 * (21.69274 + t3 * (6.699398 + t3))))))
+    t4, u4 = t[region4], u[region4]
+    w[region4] = np.exp(u4) - t4 * (36183.31 - u4 * (3321.9905 - u4 * (1540.787 - u4 * (
+        219.0313 - u4 * (35.76683 - u4 * (1.320522 - u4 * 0.56419)))))) / (
+        32066.6 - u4 * (24322.84 - u4 * (9022.228 - u4 * (2186.181 - u4 * (
+            364.2191 - u4 * (61.57037 - u4 * (1.841439 - u4)))))))
+    return w
+
+
+def faddeeva(z, method='wofz'):
+    """Faddeeva 函数 w(z) = exp(-z²)·erfc(-iz)，method 见 METHODS（'pseudo' 除外）"""
+    if method == 'wofz':
+        return wofz(z)
+    elif method == 'weideman':
+        return weideman(z)
+    elif method == 'humlicek':
+        return humlicek(z)
+    raise ValueError(f"Unknown Faddeeva method: {method}")
+
+
+def pseudo_voigt(x, center, intensity, gamma_L, gamma_G):
+    """Thompson-Cox-Hastings 伪 Voigt，参数与 voigt 相同"""
+    f_l, f_g = 2 * gamma_L, 2 * gamma_G
+    f = (f_g**5 + 2.69269 * f_g**4 * f_l + 2.42843 * f_g**3 * f_l**2 + 4.47163 * f_g**2 * f_l**3
+         + 0.07842 * f_g * f_l**4 + f_l**5)**0.2
+    ratio = f_l / f
+    eta = 1.36603 * ratio - 0.47719 * ratio**2 + 0.11116 * ratio**3
+    dx = x - center
+    lorentz = (f / 2) / (np.pi * (dx**2 + (f / 2)**2))
+    sigma = f / (2 * np.sqrt(2 * np.log(2)))
+    gauss = np.exp(-dx**2 / (2 * sigma**2)) / (sigma * np.sqrt(2 * np.pi))
+    return intensity * (eta * lorentz + (1 - eta) * gauss)
+
+
+def voigt(x, center, intensity, gamma_L, gamma_G, method='wofz'):
     """
     Voigt线型函数
     参数：
@@ -9,8 +104,70 @@ def voigt(x, center, intensity, gamma_L, gamma_G):
     center: 中心位置 (cm-1)
     intensity: 峰强度
     gamma_L: 洛伦兹半高宽
-    gamma_G: 高斯半高宽 
+    gamma_G: 高斯半高宽
+    method: 计算方式，见 METHODS；需要速度时可选近似算法
     """
+    if method == 'pseudo':
+        return pseudo_voigt(x, center, intensity, gamma_L, gamma_G)
     sigma = gamma_G / np.sqrt(2 * np.log(2))
     z = ((x - center) + 1j * gamma_L) / (sigma * np.sqrt(2))
-    return intensity * np.real(wofz(z)) / (sigma * np.sqrt(2 * np.pi))
+    return intensity * np.real(faddeeva(z, method)) / (sigma * np.sqrt(2 * np.pi))
+
+
+def complex_voigt(x, center, amplitude, lorentz_fwhm, gauss_fwhm, method='wofz'):
+    """
+    复数 Voigt 共振项：复洛伦兹项 A·(Γ/2)/(x-ω+iΓ/2) 对共振频率做高斯 (非均匀展宽) 平均
+        χ(x) = A·(Γ/2)·(-i·√π/(σ√2))·w(z)，z = (x-ω+iΓ/2)/(σ√2)
+    保留相位，可与非共振项相干叠加。所有参数按 NumPy 规则广播，
+    例如 center 等取形状 (n_peaks, 1)、x 取 (n_points,) 即可一次算出全部峰。
+    参数：
+    x: 波数数组
+    center: 共振中心 ω (cm-1)
+    amplitude: 共振振幅 A
+    lorentz_fwhm: 洛伦兹全宽 Γ
+    gauss_fwhm: 高斯全宽，为 0 时与复洛伦兹项完全相同
+    method: Faddeeva 函数计算方式，见 COMPLEX_METHODS
+    """
+    x, center, amplitude, lorentz_fwhm, gauss_fwhm = np.broadcast_arrays(
+        x, center, amplitude, lorentz_fwhm, gauss_fwhm)
+    gamma = lorentz_fwhm / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = amplitude * gamma / (x - center + 1j * gamma)
+
+    # 只对高斯宽度不为 0 的点计算 Faddeeva 函数
+    inhomogeneous = gauss_fwhm > 0
+    if np.any(inhomogeneous):
+        sigma_root2 = gauss_fwhm[inhomogeneous] / (2 * np.sqrt(np.log(2)))
+        z = (x[inhomogeneous] - center[inhomogeneous] + 1j * gamma[inhomogeneous]) / sigma_root2
+        result[inhomogeneous] = (amplitude[inhomogeneous] * gamma[inhomogeneous]
+                                 * (-1j * np.sqrt(np.pi) / sigma_root2) * faddeeva(z, method))
+    return result
+
+
+def compare_methods(points=200000, repeat=5):
+    """
+    对比各计算方式相对 wofz 的最大相对误差和每点耗时
+    测试覆盖 洛伦兹/高斯 宽度比 0.01–100、距峰中心 ±50 个半高宽的范围
+    返回 {方式: (最大相对误差, 相对峰值的最大误差, 每点耗时 ns)}
+    """
+    rng = np.random.default_rng(0)
+    gamma_G = np.ones(points)
+    gamma_L = 10 ** rng.uniform(-2, 2, points)
+    x = rng.uniform(-50, 50, points) * (gamma_L + gamma_G)
+    reference = voigt(x, 0.0, 1.0, gamma_L, gamma_G, 'wofz')
+    peak = voigt(0.0, 0.0, 1.0, gamma_L, gamma_G, 'wofz')
+
+    results = {}
+    for method in METHODS:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            value = voigt(x, 0.0, 1.0, gamma_L, gamma_G, method)
+        elapsed = (time.perf_counter() - start) / repeat / points * 1e9
+        error = np.abs(value - reference)
+        results[method] = (np.max(error / np.abs(reference)), np.max(error / peak), elapsed)
+    return results
+
+
+if __name__ == '__main__':
+    for method, (error, peak_error, elapsed) in compare_methods().items():
+        print(f"{method:10s} 最大相对误差 {error:.2e}  相对峰值误差 {peak_error:.2e}  {elapsed:6.1f} ns/点")